@@ -7,6 +7,7 @@ Alembic環境設定ファイル（非同期PostgreSQL対応）
 """
 
 import os
+import re
 import sys
 from logging.config import fileConfig
 
@@ -34,6 +35,21 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# SQLiteのFTS5検索テーブル（backend/search.pyがDDLで作成）と内部テーブルの名前
+FTS_TABLE_PATTERN = re.compile(r"^\w+_search(_data|_idx|_content|_docsize|_config)?$")
+
+
+def include_object(object_, name, type_, reflected, compare_to) -> bool:
+    """
+    autogenerateの比較対象を絞り込みます。
+
+    モデルに定義されていないFTS5の検索テーブルを削除対象として扱わないようにします。
+    """
+    if type_ == "table" and reflected and compare_to is None:
+        return not FTS_TABLE_PATTERN.match(name)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,10 +60,11 @@ def get_sync_database_url() -> str:
     """
     環境変数DATABASE_URLから同期的なデータベースURLを取得します。
 
-    asyncpgドライバーをpsycopg2（または標準postgresql）に変換します。
+    asyncpgドライバーをpsycopg2（または標準postgresql）に、
+    aiosqliteドライバーを標準のsqlite3に変換します。
 
     Returns:
-        str: 同期用のPostgreSQL接続URL
+        str: 同期用のデータベース接続URL
     """
     database_url = os.getenv(
         "DATABASE_URL",
@@ -64,6 +81,9 @@ def get_sync_database_url() -> str:
     elif database_url.startswith("postgres://"):
         # Railway等、古い形式のURLを変換
         database_url = database_url.replace("postgres://", "postgresql+psycopg2://", 1)
+    elif database_url.startswith("sqlite+aiosqlite"):
+        # ローカル開発・テスト用のSQLiteは標準のsqlite3ドライバーを使用
+        database_url = database_url.replace("sqlite+aiosqlite", "sqlite", 1)
 
     return database_url
 
@@ -107,6 +127,7 @@ def do_run_migrations(connection: Connection) -> None:
         include_schemas=True,
         # カスタム型の比較を有効化
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
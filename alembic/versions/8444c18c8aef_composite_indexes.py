@@ -0,0 +1,50 @@
+"""composite indexes
+
+crudのクエリが絞り込み・JOINに使う列のインデックス。
+
+- filings(filer_id, issuer_id, submit_date): 提出者×発行体の履歴（提出日順）、
+  提出者単位の報告書一覧・集計、集計テーブル更新時の組の検索
+- filings(issuer_id, filer_id): 発行体単位の絞り込み（名称変更時の影響範囲など）
+- filings(submit_date): 提出日の範囲指定
+- holding_details(filing_id): 報告書と保有詳細のJOIN
+- filer_codes(filer_id, id): 提出者の代表EDINETコード
+
+backend/tests/test_query_plans.py がこれらを前提に実行計画を検証する。
+
+Revision ID: 8444c18c8aef
+Revises: de1751f454ab
+Create Date: 2026-10-19 10:00:02.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8444c18c8aef"
+down_revision: str | Sequence[str] | None = "de1751f454ab"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+INDEXES = [
+    (
+        "ix_filings_filer_id_issuer_id_submit_date",
+        "filings",
+        ["filer_id", "issuer_id", "submit_date"],
+    ),
+    ("ix_filings_issuer_id_filer_id", "filings", ["issuer_id", "filer_id"]),
+    ("ix_filings_submit_date", "filings", ["submit_date"]),
+    ("ix_holding_details_filing_id", "holding_details", ["filing_id"]),
+    ("ix_filer_codes_filer_id_id", "filer_codes", ["filer_id", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
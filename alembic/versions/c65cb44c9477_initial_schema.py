@@ -0,0 +1,116 @@
+"""initial schema
+
+提出者・EDINETコード・発行体・報告書・保有詳細の基本テーブル。
+Base.metadata.create_allで作成済みのデータベースは、このリビジョンを
+`alembic stamp c65cb44c9477` で記録してから `alembic upgrade head` を実行する。
+
+Revision ID: c65cb44c9477
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c65cb44c9477"
+down_revision: str | Sequence[str] | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "filers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("edinet_code", sa.String(length=10), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("sec_code", sa.String(length=10), nullable=True),
+        sa.Column("jcn", sa.String(length=13), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_filers_id", "filers", ["id"])
+    op.create_index("ix_filers_edinet_code", "filers", ["edinet_code"])
+
+    op.create_table(
+        "issuers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("edinet_code", sa.String(length=10), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=True),
+        sa.Column("sec_code", sa.String(length=10), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_issuers_id", "issuers", ["id"])
+    op.create_index("ix_issuers_edinet_code", "issuers", ["edinet_code"], unique=True)
+
+    op.create_table(
+        "filer_codes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("filer_id", sa.Integer(), nullable=False),
+        sa.Column("edinet_code", sa.String(length=10), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["filer_id"], ["filers.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_filer_codes_id", "filer_codes", ["id"])
+    op.create_index("ix_filer_codes_edinet_code", "filer_codes", ["edinet_code"], unique=True)
+
+    op.create_table(
+        "filings",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("doc_id", sa.String(length=20), nullable=False),
+        sa.Column("filer_id", sa.Integer(), nullable=False),
+        sa.Column("issuer_id", sa.Integer(), nullable=True),
+        sa.Column("doc_type", sa.String(length=50), nullable=True),
+        sa.Column("doc_description", sa.String(length=255), nullable=True),
+        sa.Column("submit_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("parent_doc_id", sa.String(length=20), nullable=True),
+        sa.Column("csv_flag", sa.Boolean(), nullable=False),
+        sa.Column("xbrl_flag", sa.Boolean(), nullable=False),
+        sa.Column("pdf_flag", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["filer_id"], ["filers.id"]),
+        sa.ForeignKeyConstraint(["issuer_id"], ["issuers.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_filings_id", "filings", ["id"])
+    op.create_index("ix_filings_doc_id", "filings", ["doc_id"], unique=True)
+
+    op.create_table(
+        "holding_details",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("filing_id", sa.Integer(), nullable=False),
+        sa.Column("shares_held", sa.Integer(), nullable=True),
+        sa.Column("holding_ratio", sa.Float(), nullable=True),
+        sa.Column("purpose", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["filing_id"], ["filings.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_holding_details_id", "holding_details", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_holding_details_id", table_name="holding_details")
+    op.drop_table("holding_details")
+    op.drop_index("ix_filings_doc_id", table_name="filings")
+    op.drop_index("ix_filings_id", table_name="filings")
+    op.drop_table("filings")
+    op.drop_index("ix_filer_codes_edinet_code", table_name="filer_codes")
+    op.drop_index("ix_filer_codes_id", table_name="filer_codes")
+    op.drop_table("filer_codes")
+    op.drop_index("ix_issuers_edinet_code", table_name="issuers")
+    op.drop_index("ix_issuers_id", table_name="issuers")
+    op.drop_table("issuers")
+    op.drop_index("ix_filers_edinet_code", table_name="filers")
+    op.drop_index("ix_filers_id", table_name="filers")
+    op.drop_table("filers")
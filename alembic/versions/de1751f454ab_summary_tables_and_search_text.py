@@ -0,0 +1,194 @@
+"""summary tables and search text
+
+データバージョン（data_versions）、集計テーブル（filer_stats・current_positions）、
+保有詳細の前回比率・増減、部分一致検索用のsearch_textと検索インデックス
+（PostgreSQL: pg_trgmのGIN、SQLite: FTS5のtrigramテーブルと同期トリガー）。
+
+filer_stats・current_positions・保有詳細の前回比率・search_textは既存データから埋める。
+オフライン（--sql）で適用した場合は、適用後に次を実行して値を埋める:
+    python -m backend.summaries
+    python -m backend.search
+
+Revision ID: de1751f454ab
+Revises: c65cb44c9477
+Create Date: 2026-10-19 10:00:01.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision: str = "de1751f454ab"
+down_revision: str | Sequence[str] | None = "c65cb44c9477"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# テーブル → (search_textの長さ, SQLiteのFTS5テーブル名)
+SEARCH_TABLES = {
+    "filers": (255, "filers_search"),
+    "issuers": (300, "issuers_search"),
+    "filings": (255, "filings_search"),
+    "holding_details": (255, "holding_details_search"),
+}
+
+
+def _fts_statements(table: str, fts: str) -> list[str]:
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"search_text, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_text) "
+        f"VALUES ('delete', old.id, old.search_text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF search_text ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_text) "
+        f"VALUES ('delete', old.id, old.search_text); "
+        f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "data_versions",
+        sa.Column("scope", sa.String(length=32), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+
+    op.create_table(
+        "filer_stats",
+        sa.Column("filer_id", sa.Integer(), nullable=False),
+        sa.Column("filing_count", sa.Integer(), nullable=False),
+        sa.Column("issuer_count", sa.Integer(), nullable=False),
+        sa.Column("latest_filing_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["filer_id"], ["filers.id"]),
+        sa.PrimaryKeyConstraint("filer_id"),
+    )
+    op.create_index(
+        "ix_filer_stats_issuer_count_filer_id", "filer_stats", ["issuer_count", "filer_id"]
+    )
+    # 提出者一覧はfiler_statsと結合して並べるため、既存の提出者の集計値をここで埋める
+    # （backend/summaries.pyの_filer_stats_selectと同じ集計）
+    op.execute(
+        "INSERT INTO filer_stats "
+        "(filer_id, filing_count, issuer_count, latest_filing_date, updated_at) "
+        "SELECT filers.id, count(filings.id), count(DISTINCT filings.issuer_id), "
+        "max(filings.submit_date), CURRENT_TIMESTAMP "
+        "FROM filers LEFT OUTER JOIN filings ON filings.filer_id = filers.id "
+        "GROUP BY filers.id"
+    )
+
+    with op.batch_alter_table("holding_details") as batch_op:
+        batch_op.add_column(sa.Column("previous_ratio", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("ratio_change", sa.Float(), nullable=True))
+
+    op.create_table(
+        "current_positions",
+        sa.Column("filer_id", sa.Integer(), nullable=False),
+        sa.Column("issuer_id", sa.Integer(), nullable=False),
+        sa.Column("latest_filing_id", sa.Integer(), nullable=True),
+        sa.Column("latest_submit_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("latest_holding_id", sa.Integer(), nullable=True),
+        sa.Column("shares_held", sa.Integer(), nullable=True),
+        sa.Column("holding_ratio", sa.Float(), nullable=True),
+        sa.Column("purpose", sa.String(length=255), nullable=True),
+        sa.Column("previous_ratio", sa.Float(), nullable=True),
+        sa.Column("ratio_change", sa.Float(), nullable=True),
+        sa.Column("filing_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["filer_id"], ["filers.id"]),
+        sa.ForeignKeyConstraint(["issuer_id"], ["issuers.id"]),
+        sa.ForeignKeyConstraint(["latest_filing_id"], ["filings.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(
+            ["latest_holding_id"], ["holding_details.id"], ondelete="SET NULL"
+        ),
+        sa.PrimaryKeyConstraint("filer_id", "issuer_id"),
+    )
+    op.create_index(
+        "ix_current_positions_filer_id_latest_submit_date",
+        "current_positions",
+        ["filer_id", "latest_submit_date"],
+    )
+    op.create_index(
+        "ix_current_positions_issuer_id_holding_ratio",
+        "current_positions",
+        ["issuer_id", "holding_ratio"],
+    )
+    op.create_index(
+        "ix_current_positions_filer_id_ratio_change",
+        "current_positions",
+        ["filer_id", "ratio_change"],
+    )
+
+    for table, (length, _) in SEARCH_TABLES.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("search_text", sa.String(length=length), nullable=True))
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table in SEARCH_TABLES:
+            op.create_index(
+                f"ix_{table}_search_text_trgm",
+                table,
+                ["search_text"],
+                postgresql_using="gin",
+                postgresql_ops={"search_text": "gin_trgm_ops"},
+            )
+    elif dialect == "sqlite":
+        for table, (_, fts) in SEARCH_TABLES.items():
+            for statement in _fts_statements(table, fts):
+                op.execute(statement)
+
+    # 銘柄一覧・保有者一覧はcurrent_positionsのみを、名称・書類の検索はsearch_textのみを
+    # 参照するため、既存データから埋める（提出日順の系列をたどる処理・検索用の正規化は
+    # backend/summaries.py・backend/search.pyと共通）。オフライン（--sql）の場合は適用後に
+    # python -m backend.summaries と python -m backend.search を実行する
+    if not context.is_offline_mode():
+        from backend.search import rebuild_search_text
+        from backend.summaries import rebuild_current_positions
+
+        with Session(bind=op.get_bind()) as session:
+            rebuild_current_positions(session)
+            rebuild_search_text(session)
+            session.flush()
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for table in SEARCH_TABLES:
+            op.drop_index(f"ix_{table}_search_text_trgm", table_name=table)
+    elif dialect == "sqlite":
+        for _, fts in SEARCH_TABLES.values():
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+
+    for table in SEARCH_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("search_text")
+
+    op.drop_index("ix_current_positions_filer_id_ratio_change", table_name="current_positions")
+    op.drop_index("ix_current_positions_issuer_id_holding_ratio", table_name="current_positions")
+    op.drop_index(
+        "ix_current_positions_filer_id_latest_submit_date", table_name="current_positions"
+    )
+    op.drop_table("current_positions")
+
+    with op.batch_alter_table("holding_details") as batch_op:
+        batch_op.drop_column("ratio_change")
+        batch_op.drop_column("previous_ratio")
+
+    op.drop_index("ix_filer_stats_issuer_count_filer_id", table_name="filer_stats")
+    op.drop_table("filer_stats")
+    op.drop_table("data_versions")
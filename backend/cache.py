@@ -3,14 +3,108 @@
 This module provides Redis-based caching functionality using fastapi-cache2.
 """
 
+import hashlib
 import os
+from collections.abc import Callable, Iterable, Mapping
 from typing import Any
 
 import redis.asyncio as redis
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.key_builder import default_key_builder
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.metrics import InstrumentedBackend
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_PREFIX = "edinet"
+
+# Scope segment of keys for endpoints without filer/issuer path parameters
+LIST_SCOPE = "list"
+
+
+def cache_scope(path_params: Mapping[str, Any]) -> str:
+    """Return the scope segment of a cache key for the given path parameters.
+
+    Args:
+        path_params: Path parameters of the request.
+
+    Returns:
+        str: ``filer:{id}``, ``issuer:{id}``, both joined by ``:``, or ``list``.
+    """
+    parts = [
+        f"{kind}:{path_params[f'{kind}_id']}"
+        for kind in ("filer", "issuer")
+        if f"{kind}_id" in path_params
+    ]
+    return ":".join(parts) or LIST_SCOPE
+
+
+def is_key_affected(key: str, filer_ids: set[str], issuer_ids: set[str]) -> bool:
+    """Check whether a cache key may hold data for the changed filers/issuers.
+
+    List keys are always affected since totals and orderings are global.
+    Keys in an unknown format (e.g. from an older key builder) are treated
+    as affected.
+
+    Args:
+        key: Full cache key (``prefix:scope...:digest``).
+        filer_ids: Changed filer IDs as strings.
+        issuer_ids: Changed issuer IDs as strings.
+
+    Returns:
+        bool: True if the key should be invalidated.
+    """
+    parts = key.split(":")[1:-1]
+    if parts == [LIST_SCOPE] or not parts or len(parts) % 2:
+        return True
+
+    for kind, value in zip(parts[::2], parts[1::2], strict=True):
+        if kind == "filer" and value in filer_ids:
+            return True
+        if kind == "issuer" and value in issuer_ids:
+            return True
+        if kind not in ("filer", "issuer"):
+            return True
+    return False
+
+
+def request_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    request: Request | None = None,
+    response: Response | None = None,
+    args: tuple[Any, ...] | None = None,
+    kwargs: dict[str, Any] | None = None,
+) -> str:
+    """Build a cache key from the request URL and the current data version.
+
+    The default key builder hashes the repr of all handler arguments, which
+    includes the per-request database session, so keys never matched across
+    requests. Including the ETag computed by ``conditional_get`` makes entries
+    written before a data version bump unreachable, and the scope segment lets
+    ``invalidate_changes`` delete them for the touched filers/issuers only.
+
+    Args:
+        func: The cached endpoint function.
+        namespace: Optional namespace passed to ``@cache``.
+        request: The incoming request.
+        response: The outgoing response (unused).
+        args: Positional arguments of the endpoint.
+        kwargs: Keyword arguments of the endpoint.
+
+    Returns:
+        str: Cache key with the configured prefix.
+    """
+    if request is None:
+        return default_key_builder(func, namespace, request, response, args, kwargs)
+
+    query = sorted(request.query_params.multi_items())
+    etag = getattr(request.state, "etag", "")
+    raw = f"{namespace}:{func.__module__}:{func.__name__}:{request.url.path}:{query}:{etag}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{cache_scope(request.path_params)}:{digest}"
 
 
 async def init_cache() -> None:
@@ -19,7 +113,11 @@ async def init_cache() -> None:
     Should be called during application startup event.
     """
     redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    FastAPICache.init(RedisBackend(redis_client), prefix="edinet")
+    FastAPICache.init(
+        InstrumentedBackend(RedisBackend(redis_client)),
+        prefix=CACHE_PREFIX,
+        key_builder=request_key_builder,
+    )
 
 
 async def get_cache_client() -> redis.Redis:
@@ -58,6 +156,43 @@ async def clear_cache(pattern: str | None = None) -> None:
     await redis_client.close()
 
 
+async def invalidate_changes(filer_ids: Iterable[int], issuer_ids: Iterable[int]) -> int:
+    """Delete cache entries affected by changes to the given filers/issuers.
+
+    Scans the ``edinet*`` keyspace once and deletes list entries plus any
+    filer detail, filer issuers, filings, issuer ownerships or history entry
+    whose scope matches a changed ID. Entries of untouched filers/issuers are
+    kept warm.
+
+    Args:
+        filer_ids: IDs of filers touched by ingestion.
+        issuer_ids: IDs of issuers touched by ingestion.
+
+    Returns:
+        Number of keys deleted.
+    """
+    filer_keys = {str(i) for i in filer_ids}
+    issuer_keys = {str(i) for i in issuer_ids}
+    if not filer_keys and not issuer_keys:
+        return 0
+
+    redis_client = await get_cache_client()
+    deleted = 0
+
+    cursor = 0
+    while True:
+        cursor, keys = await redis_client.scan(cursor, match=f"{CACHE_PREFIX}*", count=500)
+        affected = [key for key in keys if is_key_affected(key, filer_keys, issuer_keys)]
+        if affected:
+            deleted += await redis_client.delete(*affected)
+
+        if cursor == 0:
+            break
+
+    await redis_client.close()
+    return deleted
+
+
 async def cache_get(key: str) -> Any | None:
     """Get a value from cache by key.
 
@@ -1,73 +1,136 @@
-from sqlalchemy import desc, func, select
+from datetime import UTC, date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Row,
+    desc,
+    func,
+    literal,
+    select,
+    true,
+    tuple_,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
-from backend.models import Filer, FilerCode, Filing, HoldingDetail, Issuer
+from backend import totals
+from backend.models import (
+    CurrentPosition,
+    Filer,
+    FilerCode,
+    FilerStats,
+    Filing,
+    HoldingDetail,
+    Issuer,
+)
+from backend.pagination import datetime_to_key, decode_cursor, encode_cursor, key_to_datetime
+from backend.search import matching_filing_ids, search_condition, split_terms
+from backend.totals import (
+    TotalMode,
+    estimate_rows,
+    execute_with_total,
+    normalize_search,
+    resolve_total,
+    search_key,
+)
+
+
+def _primary_edinet_code() -> Any:
+    """提出者の代表EDINETコード（Filer.primary_edinet_codeと同じ、最初に登録されたコード）"""
+    return (
+        select(FilerCode.edinet_code)
+        .where(FilerCode.filer_id == Filer.id)
+        .order_by(FilerCode.id)
+        .limit(1)
+        .correlate(Filer)
+        .scalar_subquery()
+    )
 
 
-async def get_filers(
-    db: AsyncSession, skip: int = 0, limit: int = 50, search: str | None = None
-) -> dict:
-    """提出者をページネーション付きで取得（統計情報も含む）"""
-    # ベースクエリの構築
-    base_stmt = select(Filer)
+def _dialect(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
 
-    # 検索フィルタ
-    if search:
-        base_stmt = base_stmt.where(Filer.name.ilike(f"%{search}%"))
 
-    # 総数を取得
-    count_stmt = select(func.count()).select_from(Filer)
-    if search:
-        count_stmt = count_stmt.where(Filer.name.ilike(f"%{search}%"))
-    total_result = await db.execute(count_stmt)
-    total = total_result.scalar_one()
+def _issuer_name() -> Any:
+    """表示用の銘柄名（名称未取得ならEDINETコード）"""
+    return func.coalesce(func.nullif(Issuer.name, ""), Issuer.edinet_code)
 
-    # 統計情報をサブクエリで一括取得
-    filing_stats = (
-        select(
-            Filing.filer_id,
-            func.count(Filing.id).label("filing_count"),
-            func.count(func.distinct(Filing.issuer_id)).label("issuer_count"),
-            func.max(Filing.submit_date).label("latest_filing_date"),
-        )
-        .group_by(Filing.filer_id)
-        .subquery()
-    )
 
-    # メインクエリ（統計情報をJOIN）
+async def get_filers(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 50,
+    search: str | None = None,
+    cursor: str | None = None,
+    total_mode: TotalMode = "exact",
+    data_version: int | None = None,
+) -> dict:
+    """
+    提出者をページネーション付きで取得（統計情報も含む）
+
+    銘柄数の降順・IDの降順で並べる。cursorを指定した場合はskipを無視し、
+    カーソル位置の次の行からキーセットで取得する。
+    itemsはFilerResponseの項目名を持つRow（ORMエンティティは生成しない）。
+    data_version（globalの世代番号）を指定すると総数をメモ化する。
+
+    Raises:
+        InvalidCursorError: cursorの形式が不正な場合
+    """
+    seek = decode_cursor(cursor, 2) if cursor else None
+    search = normalize_search(search)
+
+    # 総数の対象行（可能ならページとは別の接続で並行に数える）
+    rows_stmt = select(Filer.id)
+    search_filter = search_condition(Filer, search, _dialect(db)) if search else None
+    if search_filter is not None:
+        rows_stmt = rows_stmt.where(search_filter)
+    key = ("filers", data_version, search_key(search)) if data_version is not None else None
+
+    # 統計情報は集計テーブル（filer_stats）から取得する。フックを経由しない書き込みで
+    # 集計行がない提出者も総数と一致するよう、0件として一覧に含める
+    issuer_count = func.coalesce(FilerStats.issuer_count, 0)
     stmt = (
         select(
-            Filer,
-            filing_stats.c.filing_count,
-            filing_stats.c.issuer_count,
-            filing_stats.c.latest_filing_date,
+            Filer.id,
+            func.coalesce(_primary_edinet_code(), Filer.edinet_code).label("edinet_code"),
+            Filer.name,
+            Filer.sec_code,
+            Filer.created_at,
+            func.coalesce(FilerStats.filing_count, 0).label("filing_count"),
+            issuer_count.label("issuer_count"),
+            FilerStats.latest_filing_date,
         )
-        .options(selectinload(Filer.filer_codes))
-        .select_from(Filer)
-        .outerjoin(filing_stats, Filer.id == filing_stats.c.filer_id)
-        .order_by(desc(filing_stats.c.issuer_count))
-        .offset(skip)
+        .outerjoin(FilerStats, FilerStats.filer_id == Filer.id)
+        .order_by(desc(issuer_count), desc(Filer.id))
         .limit(limit)
     )
-    if search:
-        stmt = stmt.where(Filer.name.ilike(f"%{search}%"))
+    if search_filter is not None:
+        stmt = stmt.where(search_filter)
+    # キーセット: カーソル位置より後ろをシーク / それ以外はOFFSET
+    stmt = (
+        stmt.where(tuple_(issuer_count, Filer.id) < tuple_(*map(literal, seek)))
+        if seek
+        else stmt.offset(skip)
+    )
 
-    result = await db.execute(stmt)
-    rows = result.all()
+    result, total, estimated = await execute_with_total(db, stmt, rows_stmt, key, total_mode)
+    rows = list(result.all())
 
-    filers = []
-    for filer, filing_count, issuer_count, latest_filing_date in rows:
-        filers.append(
-            {
-                "filer": filer,
-                "filing_count": filing_count or 0,
-                "issuer_count": issuer_count or 0,
-                "latest_filing_date": latest_filing_date,
-            }
-        )
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor([last.issuer_count, last.id])
 
-    return {"items": filers, "total": total, "skip": skip, "limit": limit}
+    return {
+        "items": rows,
+        "total": total,
+        "total_estimated": estimated,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
 
 
 async def get_filer_by_id(db: AsyncSession, filer_id: int) -> Filer | None:
@@ -77,6 +140,40 @@ async def get_filer_by_id(db: AsyncSession, filer_id: int) -> Filer | None:
     return result.scalar_one_or_none()
 
 
+async def get_filer_detail(db: AsyncSession, filer_id: int) -> dict | None:
+    """
+    提出者の基本情報と統計情報を1クエリで取得
+
+    Returns:
+        dict | None: 提出者が存在しなければNone
+    """
+    stmt = (
+        select(
+            Filer.id,
+            Filer.name,
+            Filer.sec_code,
+            Filer.created_at,
+            func.coalesce(_primary_edinet_code(), Filer.edinet_code).label("edinet_code"),
+            FilerStats.filer_id.label("stats_filer_id"),
+            FilerStats.filing_count,
+            FilerStats.issuer_count,
+            FilerStats.latest_filing_date,
+        )
+        .outerjoin(FilerStats, FilerStats.filer_id == Filer.id)
+        .where(Filer.id == filer_id)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+
+    detail: dict = row._asdict()
+    del detail["stats_filer_id"]
+    if row.stats_filer_id is None:
+        # 未集計の提出者のみfilingsから集計
+        detail.update(await get_filer_stats(db, filer_id))
+    return detail
+
+
 async def get_filer_by_edinet_code(db: AsyncSession, edinet_code: str) -> Filer | None:
     """EDINETコードで提出者を取得"""
     stmt = (
@@ -106,122 +203,172 @@ async def create_filer(
 
 
 async def get_issuers_by_filer(
-    db: AsyncSession, filer_id: int, skip: int = 0, limit: int = 50, search: str | None = None
-) -> dict:
-    """提出者が保有している発行体（銘柄）一覧をページネーション付きで取得"""
-    # 各発行体について、最新の報告書情報を取得
-    subquery = (
+    db: AsyncSession,
+    filer_id: int,
+    skip: int = 0,
+    limit: int = 50,
+    search: str | None = None,
+    sort: str = "latest",
+    total_mode: TotalMode = "exact",
+    data_version: int | None = None,
+) -> dict | None:
+    """提出者が保有している発行体（銘柄）一覧をページネーション付きで取得
+
+    最新の報告書・保有比率・前回からの増減はcurrent_positionsから読む。
+    sortが"latest"なら最新提出日の降順、"ratio_change"なら増減の降順（増減なしは末尾）。
+    提出者の存在確認・総数・ページを1クエリで取得する。
+
+    総数は検索なしならfiler_statsの銘柄数、検索ありなら（提出者のデータバージョン,
+    検索語）ごとのメモを使い、未計算の場合のみページと同時にウィンドウ関数で数える。
+
+    Returns:
+        dict | None: 提出者が存在しなければNone。itemsはIssuerResponseの項目名を持つRow
+    """
+    search = normalize_search(search)
+    rows_stmt = (
         select(
-            Filing.issuer_id,
-            func.max(Filing.submit_date).label("latest_date"),
-            func.count(Filing.id).label("filing_count"),
+            Issuer.id,
+            Issuer.edinet_code,
+            _issuer_name().label("name"),
+            Issuer.sec_code,
+            CurrentPosition.latest_submit_date.label("latest_filing_date"),
+            CurrentPosition.filing_count,
+            CurrentPosition.holding_ratio.label("latest_ratio"),
+            CurrentPosition.purpose.label("latest_purpose"),
+            CurrentPosition.ratio_change,
         )
-        .where(Filing.filer_id == filer_id)
-        .where(Filing.issuer_id.isnot(None))
-        .group_by(Filing.issuer_id)
-        .subquery()
-    )
-
-    # ベースクエリ
-    base_stmt = select(Issuer, subquery.c.latest_date, subquery.c.filing_count).join(
-        subquery, Issuer.id == subquery.c.issuer_id
+        .join(CurrentPosition, CurrentPosition.issuer_id == Issuer.id)
+        .where(CurrentPosition.filer_id == filer_id)
     )
 
     # 検索フィルタ
+    key = None
+    known_total = None
+    estimated = False
     if search:
-        search_filter = (
-            Issuer.name.ilike(f"%{search}%")
-            | Issuer.sec_code.ilike(f"%{search}%")
-            | Issuer.edinet_code.ilike(f"%{search}%")
-        )
-        base_stmt = base_stmt.where(search_filter)
-
-    # 総数を取得
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    count_result = await db.execute(count_stmt)
-    total = count_result.scalar_one()
-
-    # ページネーション適用
-    stmt = base_stmt.order_by(desc(subquery.c.latest_date)).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    rows = result.all()
+        search_filter = search_condition(Issuer, search, _dialect(db))
+        rows_stmt = rows_stmt.where(search_filter)
+
+        if total_mode == "estimate":
+            known_total = await estimate_rows(db, rows_stmt)
+            estimated = known_total is not None
+        if data_version is not None:
+            key = ("filer_issuers", filer_id, data_version, search_key(search))
+            if known_total is None:
+                known_total = totals.memo.get(key)
+
+    # ウィンドウ関数はLIMIT前に評価されるため、絞り込み後の総数になる
+    count_in_page = bool(search) and known_total is None
+    page_stmt = (
+        rows_stmt.add_columns(func.count().over().label("total")) if count_in_page else rows_stmt
+    )
 
-    # 各銘柄の最新保有比率と増減比を取得（バッチ処理）
-    issuer_ids = [issuer.id for issuer, _, _ in rows]
-
-    # 最新のFiling IDを取得するサブクエリ
-    holdings_map = {}
-    if issuer_ids:
-        latest_filing_subq = (
-            select(Filing.issuer_id, func.max(Filing.id).label("latest_filing_id"))
-            .where(Filing.filer_id == filer_id)
-            .where(Filing.issuer_id.in_(issuer_ids))
-            .group_by(Filing.issuer_id)
-            .subquery()
+    def sort_keys(latest_date, ratio_change, issuer_id) -> tuple[ColumnElement[Any], ...]:
+        sort_key = (
+            ratio_change.desc().nulls_last() if sort == "ratio_change" else latest_date.desc()
         )
-
-        # 最新のHoldingDetailを取得
-        holdings_stmt = select(
-            latest_filing_subq.c.issuer_id,
-            HoldingDetail.holding_ratio,
-            HoldingDetail.purpose,
-        ).join(HoldingDetail, HoldingDetail.filing_id == latest_filing_subq.c.latest_filing_id)
-        holdings_result = await db.execute(holdings_stmt)
-        latest_holdings = holdings_result.all()
-
-        holdings_map = {
-            issuer_id: {"ratio": ratio, "purpose": purpose}
-            for issuer_id, ratio, purpose in latest_holdings
-        }
-
-    # 結果を構築
-    issuer_data = []
-    for issuer, latest_date, filing_count in rows:
-        holding_info = holdings_map.get(issuer.id, {})
-        latest_ratio = holding_info.get("ratio")
-        latest_purpose = holding_info.get("purpose")
-
-        issuer_data.append(
-            {
-                "issuer": issuer,
-                "latest_filing_date": latest_date,
-                "filing_count": filing_count,
-                "latest_ratio": latest_ratio,
-                "latest_purpose": latest_purpose,
-                "ratio_change": None,  # 簡略化のため増減は省略（詳細ページで表示）
-            }
+        return sort_key, issuer_id.desc()
+
+    page = (
+        page_stmt.order_by(
+            *sort_keys(
+                CurrentPosition.latest_submit_date,
+                CurrentPosition.ratio_change,
+                CurrentPosition.issuer_id,
+            )
         )
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
 
-    return {"items": issuer_data, "total": total, "skip": skip, "limit": limit}
+    # 提出者が存在すれば少なくとも1行（保有銘柄がなければページ側の列がNULL）
+    stmt = (
+        select(Filer.id.label("filer_id"), FilerStats.issuer_count.label("stats_total"), *page.c)
+        .select_from(Filer)
+        .outerjoin(FilerStats, FilerStats.filer_id == Filer.id)
+        .outerjoin(page, true())
+        .where(Filer.id == filer_id)
+        .order_by(*sort_keys(page.c.latest_filing_date, page.c.ratio_change, page.c.id))
+    )
+    result = await db.execute(stmt)
+    rows = list(result.all())
+    if not rows:
+        return None
+
+    stats_total = rows[0].stats_total
+    rows = [row for row in rows if row.id is not None]
+    if known_total is not None:
+        total = known_total
+    elif not search and stats_total is not None:
+        total = stats_total
+    elif count_in_page and rows:
+        total = rows[0].total
+    elif 0 < len(rows) < limit or (not rows and not skip):
+        # 最終ページなら件数から総数が分かる
+        total = skip + len(rows)
+    else:
+        # 範囲外のページ・未集計の提出者は別途数える
+        total, _ = await resolve_total(db, rows_stmt)
+    if key is not None and not estimated:
+        totals.memo.put(key, total)
+
+    return {
+        "items": rows,
+        "total": total,
+        "total_estimated": estimated,
+        "skip": skip,
+        "limit": limit,
+    }
 
 
 async def get_issuers(
-    db: AsyncSession, skip: int = 0, limit: int = 50, search: str | None = None
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 50,
+    search: str | None = None,
+    cursor: str | None = None,
+    total_mode: TotalMode = "exact",
+    data_version: int | None = None,
 ) -> dict:
-    """銘柄一覧をページネーション付きで取得"""
-    base_stmt = select(Issuer)
+    """
+    銘柄一覧をページネーション付きで取得
 
-    if search:
-        search_filter = (
-            Issuer.name.ilike(f"%{search}%")
-            | Issuer.sec_code.ilike(f"%{search}%")
-            | Issuer.edinet_code.ilike(f"%{search}%")
-        )
-        base_stmt = base_stmt.where(search_filter)
+    ID順に並べる。cursorを指定した場合はskipを無視し、主キーのシークで取得する。
+    itemsはIssuerResponseの項目名を持つRow。
+    data_version（globalの世代番号）を指定すると総数をメモ化する。
+
+    Raises:
+        InvalidCursorError: cursorの形式が不正な場合
+    """
+    seek = decode_cursor(cursor, 1) if cursor else None
+    search = normalize_search(search)
+
+    stmt = select(Issuer.id, Issuer.edinet_code, _issuer_name().label("name"), Issuer.sec_code)
+    rows_stmt = select(Issuer.id)
 
-    # 総数を取得
-    count_stmt = select(func.count()).select_from(Issuer)
     if search:
-        count_stmt = count_stmt.where(search_filter)
-    count_result = await db.execute(count_stmt)
-    total = count_result.scalar_one()
+        search_filter = search_condition(Issuer, search, _dialect(db))
+        stmt = stmt.where(search_filter)
+        rows_stmt = rows_stmt.where(search_filter)
+    key = ("issuers", data_version, search_key(search)) if data_version is not None else None
 
-    # ページネーション適用
-    stmt = base_stmt.offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    items = result.scalars().all()
+    # ページネーション適用（総数は可能なら別の接続で並行に取得）
+    stmt = stmt.order_by(Issuer.id).limit(limit)
+    stmt = stmt.where(Issuer.id > seek[0]) if seek else stmt.offset(skip)
+    result, total, estimated = await execute_with_total(db, stmt, rows_stmt, key, total_mode)
+    rows = list(result.all())
 
-    return {"items": list(items), "total": total, "skip": skip, "limit": limit}
+    next_cursor = encode_cursor([rows[-1].id]) if len(rows) == limit else None
+
+    return {
+        "items": rows,
+        "total": total,
+        "total_estimated": estimated,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
 
 
 async def get_issuer_by_id(db: AsyncSession, issuer_id: int) -> Issuer | None:
@@ -231,114 +378,290 @@ async def get_issuer_by_id(db: AsyncSession, issuer_id: int) -> Issuer | None:
     return result.scalar_one_or_none()
 
 
-async def get_filings_by_issuer_and_filer(
-    db: AsyncSession, issuer_id: int, filer_id: int
-) -> list[Filing]:
-    """特定の発行体・提出者の報告書履歴を取得 (関連データをEager Loading)"""
-    stmt = (
-        select(Filing)
-        .where(Filing.issuer_id == issuer_id)
+async def get_issuer_history(db: AsyncSession, filer_id: int, issuer_id: int) -> list[Row]:
+    """
+    提出者・発行体の情報と報告書履歴（新しい順）を1つのSQLで取得
+
+    前回比率は同じ組の報告書を提出日順に並べ、保有比率が判明している直前の
+    報告書の値をウィンドウ関数で求める（比率不明の報告書は飛ばす）。
+
+    Returns:
+        list[Row]: 提出者が存在しなければ空。発行体が存在しなければissuer_idがNoneの1行。
+            報告書がなければ履歴の列がNoneの1行。
+    """
+    # 1つの報告書に保有詳細が複数ある場合は最後に登録されたものを使う
+    latest_holding_id = (
+        select(func.max(HoldingDetail.id))
+        .where(HoldingDetail.filing_id == Filing.id)
+        .correlate(Filing)
+        .scalar_subquery()
+    )
+    chain = (
+        select(
+            Filing.id,
+            Filing.doc_id,
+            Filing.submit_date,
+            Filing.doc_description,
+            HoldingDetail.shares_held,
+            HoldingDetail.holding_ratio,
+        )
+        .outerjoin(HoldingDetail, HoldingDetail.id == latest_holding_id)
         .where(Filing.filer_id == filer_id)
-        .options(
-            joinedload(Filing.filer),
-            joinedload(Filing.issuer),
-            selectinload(Filing.holding_details),
+        .where(Filing.issuer_id == issuer_id)
+        .subquery()
+    )
+
+    def chain_order(columns):
+        return (columns.submit_date.asc().nulls_first(), columns.id.asc())
+
+    # 比率が判明している報告書ごとにグループ番号を振り、各グループの比率を
+    # 直後の報告書へLAGで渡す
+    grouped = select(
+        chain,
+        func.count(chain.c.holding_ratio)
+        .over(order_by=chain_order(chain.c), rows=(None, 0))
+        .label("ratio_group"),
+    ).subquery()
+    anchored = select(
+        grouped,
+        func.max(grouped.c.holding_ratio)
+        .over(partition_by=grouped.c.ratio_group)
+        .label("group_ratio"),
+    ).subquery()
+    history = select(
+        anchored,
+        func.lag(anchored.c.group_ratio)
+        .over(order_by=chain_order(anchored.c))
+        .label("previous_ratio"),
+    ).subquery()
+
+    stmt = (
+        select(
+            Filer.id.label("filer_id"),
+            Filer.name.label("filer_name"),
+            _primary_edinet_code().label("filer_edinet_code"),
+            Issuer.id.label("issuer_id"),
+            Issuer.edinet_code.label("issuer_edinet_code"),
+            Issuer.name.label("issuer_name"),
+            Issuer.sec_code.label("issuer_sec_code"),
+            history.c.doc_id,
+            history.c.submit_date,
+            history.c.doc_description,
+            history.c.shares_held,
+            history.c.holding_ratio,
+            history.c.previous_ratio,
         )
-        .order_by(desc(Filing.submit_date))
+        .select_from(Filer)
+        .outerjoin(Issuer, Issuer.id == issuer_id)
+        .outerjoin(history, Issuer.id.isnot(None))
+        .where(Filer.id == filer_id)
+        .order_by(history.c.submit_date.desc().nulls_last(), history.c.id.desc())
     )
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    return list(result.all())
 
 
-async def get_filings_by_filer(db: AsyncSession, filer_id: int, limit: int = 100) -> list[Filing]:
-    """提出者のすべての報告書を取得 (issuerとholding_detailsをEager Loading)"""
-    stmt = (
-        select(Filing)
+async def get_filings_by_filer(
+    db: AsyncSession, filer_id: int, limit: int = 100
+) -> list[Row] | None:
+    """
+    提出者の報告書一覧（発行体名付き、新しい順）を提出者の存在確認と合わせて1クエリで取得
+
+    Returns:
+        list[Row] | None: 提出者が存在しなければNone
+    """
+    filings = (
+        select(
+            Filing.id,
+            Filing.doc_id,
+            Filing.filer_id,
+            Filing.issuer_id,
+            Filing.doc_description,
+            Filing.submit_date,
+            Filing.parent_doc_id,
+            Filing.csv_flag,
+            Filing.xbrl_flag,
+            Filing.pdf_flag,
+            Issuer.name.label("issuer_name"),
+            Issuer.edinet_code.label("issuer_edinet_code"),
+        )
+        .outerjoin(Issuer, Issuer.id == Filing.issuer_id)
         .where(Filing.filer_id == filer_id)
-        .options(joinedload(Filing.issuer), selectinload(Filing.holding_details))
         .order_by(desc(Filing.submit_date))
         .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(Filer.id.label("owner_id"), *filings.c)
+        .select_from(Filer)
+        .outerjoin(filings, true())
+        .where(Filer.id == filer_id)
+        .order_by(desc(filings.c.submit_date))
     )
     result = await db.execute(stmt)
-    return list(result.scalars().all())
+    rows = result.all()
+    if not rows:
+        return None
+    return [row for row in rows if row.id is not None]
 
 
-async def get_filer_stats(db: AsyncSession, filer_id: int) -> dict:
-    """提出者の統計情報を取得"""
-    filing_count_stmt = select(func.count(Filing.id)).where(Filing.filer_id == filer_id)
-    filing_count_result = await db.execute(filing_count_stmt)
-    filing_count = filing_count_result.scalar_one()
+# 提出日のない報告書は全文検索の結果の末尾に並べる
+_NO_SUBMIT_DATE = datetime(1970, 1, 1, tzinfo=UTC)
 
-    issuer_count_stmt = (
-        select(func.count(func.distinct(Filing.issuer_id)))
-        .where(Filing.filer_id == filer_id)
-        .where(Filing.issuer_id.isnot(None))
-    )
-    issuer_count_result = await db.execute(issuer_count_stmt)
-    issuer_count = issuer_count_result.scalar_one()
 
-    latest_filing_stmt = (
-        select(Filing)
-        .where(Filing.filer_id == filer_id)
-        .order_by(desc(Filing.submit_date))
+def _start_of_day(day: date) -> Any:
+    """日付の0時（UTC）のtimestamptzリテラル"""
+    return literal(datetime.combine(day, time.min, tzinfo=UTC), DateTime(timezone=True))
+
+
+async def search_filings(
+    db: AsyncSession,
+    query: str,
+    filer_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> dict:
+    """
+    書類名・保有目的の全文検索（提出日の新しい順、キーセットページネーション）
+
+    空白区切りの語はすべてを含む報告書に一致する（語ごとに書類名・保有目的の
+    どちらに含まれてもよい）。一致する報告書IDは検索インデックスから求め、
+    提出者・提出日の条件はその報告書に対して適用する。
+
+    Args:
+        query: 検索語（空白区切りで複数指定可）
+        filer_id: 提出者で絞り込む
+        date_from: 提出日の下限（この日を含む）
+        date_to: 提出日の上限（この日を含む）
+        cursor: 前ページのnext_cursor
+
+    Returns:
+        dict: items（FilingSearchItemの項目名を持つRow）、limit、next_cursor
+
+    Raises:
+        InvalidCursorError: cursorの形式が不正な場合
+    """
+    seek = decode_cursor(cursor, 2) if cursor else None
+    dialect = _dialect(db)
+
+    sort_date = func.coalesce(Filing.submit_date, literal(_NO_SUBMIT_DATE, DateTime(timezone=True)))
+    purpose = (
+        select(HoldingDetail.purpose)
+        .where(HoldingDetail.filing_id == Filing.id)
+        .order_by(HoldingDetail.id.desc())
         .limit(1)
+        .correlate(Filing)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            Filing.id,
+            Filing.doc_id,
+            Filing.submit_date,
+            Filing.doc_description,
+            purpose.label("purpose"),
+            Filing.filer_id,
+            Filer.name.label("filer_name"),
+            Filing.issuer_id,
+            _issuer_name().label("issuer_name"),
+            Issuer.sec_code.label("issuer_sec_code"),
+        )
+        .join(Filer, Filer.id == Filing.filer_id)
+        .outerjoin(Issuer, Issuer.id == Filing.issuer_id)
+        .order_by(sort_date.desc(), Filing.id.desc())
+        .limit(limit)
     )
-    latest_filing_result = await db.execute(latest_filing_stmt)
-    latest_filing = latest_filing_result.scalar_one_or_none()
+    for term in split_terms(query):
+        stmt = stmt.where(Filing.id.in_(matching_filing_ids(term, dialect)))
+    if filer_id is not None:
+        stmt = stmt.where(Filing.filer_id == filer_id)
+    # 日付・カーソルの境界は列と同じtimestamptzで比較する（セッションのTimeZone設定に
+    # 依存させない）。タイムゾーンなしで保存された提出日と同じくUTCとして扱う
+    if date_from is not None:
+        stmt = stmt.where(Filing.submit_date >= _start_of_day(date_from))
+    if date_to is not None:
+        stmt = stmt.where(Filing.submit_date < _start_of_day(date_to + timedelta(days=1)))
+    if seek:
+        seek_date = literal(key_to_datetime(seek[0]), DateTime(timezone=True))
+        stmt = stmt.where(tuple_(sort_date, Filing.id) < tuple_(seek_date, literal(seek[1])))
+
+    rows = list((await db.execute(stmt)).all())
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        last_date = last.submit_date or _NO_SUBMIT_DATE
+        next_cursor = encode_cursor([datetime_to_key(last_date), last.id])
+
+    return {"items": rows, "limit": limit, "next_cursor": next_cursor}
 
+
+async def get_filer_stats(db: AsyncSession, filer_id: int) -> dict:
+    """提出者の統計情報を取得（filer_statsの主キー参照）"""
+    stmt = select(
+        FilerStats.filing_count, FilerStats.issuer_count, FilerStats.latest_filing_date
+    ).where(FilerStats.filer_id == filer_id)
+    row = (await db.execute(stmt)).one_or_none()
+
+    if row is None:
+        # 集計テーブル導入前のデータなど、未集計の場合はfilingsから集計
+        stmt = select(
+            func.count(Filing.id),
+            func.count(func.distinct(Filing.issuer_id)),
+            func.max(Filing.submit_date),
+        ).where(Filing.filer_id == filer_id)
+        row = (await db.execute(stmt)).one()
+
+    filing_count, issuer_count, latest_filing_date = row
     return {
         "filing_count": filing_count,
         "issuer_count": issuer_count,
-        "latest_filing_date": latest_filing.submit_date if latest_filing else None,
+        "latest_filing_date": latest_filing_date,
     }
 
 
-async def get_issuer_ownerships(db: AsyncSession, issuer_id: int) -> list[dict]:
+async def get_issuer_ownerships(db: AsyncSession, issuer_id: int) -> dict | None:
     """
-    指定された銘柄を保有している投資家の最新状況を取得
+    指定された銘柄の基本情報と、保有している投資家の最新状況を1クエリで取得
+
+    current_positionsから、最新の報告書に保有詳細がある投資家を保有比率順に返す。
+
+    Returns:
+        dict | None: 銘柄が存在しなければNone。{"issuer": Row, "ownerships": list[Row]}
+            （各RowはIssuerResponse・OwnershipItemの項目名を持つ）
     """
-    # 各投資家ごとに、対象銘柄に対する最新のFiling IDを取得するサブクエリ
-    latest_filing_subq = (
+    positions = (
         select(
-            Filing.filer_id,
-            func.max(Filing.submit_date).label("latest_submit_date"),
-            func.max(Filing.id).label("latest_filing_id"),
+            Filer.id.label("filer_id"),
+            Filer.name.label("filer_name"),
+            CurrentPosition.latest_submit_date,
+            CurrentPosition.shares_held,
+            CurrentPosition.holding_ratio,
+            CurrentPosition.purpose,
         )
-        .where(Filing.issuer_id == issuer_id)
-        .group_by(Filing.filer_id)
+        .join(CurrentPosition, CurrentPosition.filer_id == Filer.id)
+        .where(CurrentPosition.issuer_id == issuer_id)
+        .where(CurrentPosition.latest_holding_id.isnot(None))
         .subquery()
     )
-
-    # 最新Filingの情報とHoldingDetail、Filer情報を結合して取得
     stmt = (
         select(
-            Filer.id.label("filer_id"),
-            Filer.name.label("filer_name"),
-            latest_filing_subq.c.latest_submit_date,
-            HoldingDetail.shares_held,
-            HoldingDetail.holding_ratio,
-            HoldingDetail.purpose,
+            Issuer.id,
+            Issuer.edinet_code,
+            _issuer_name().label("name"),
+            Issuer.sec_code,
+            *positions.c,
         )
-        .join(latest_filing_subq, Filer.id == latest_filing_subq.c.filer_id)
-        .join(HoldingDetail, HoldingDetail.filing_id == latest_filing_subq.c.latest_filing_id)
-        .order_by(desc(HoldingDetail.holding_ratio))
+        .outerjoin(positions, true())
+        .where(Issuer.id == issuer_id)
+        .order_by(desc(positions.c.holding_ratio))
     )
 
     result = await db.execute(stmt)
     rows = result.all()
+    if not rows:
+        return None
 
-    ownerships = []
-    for row in rows:
-        # Pydanticモデルではなく辞書で返す（呼び出し元で整形）
-        ownerships.append(
-            {
-                "filer_id": row.filer_id,
-                "filer_name": row.filer_name,
-                "latest_submit_date": row.latest_submit_date,
-                "shares_held": row.shares_held,
-                "holding_ratio": row.holding_ratio,
-                "purpose": row.purpose,
-            }
-        )
-
-    return ownerships
+    return {"issuer": rows[0], "ownerships": [row for row in rows if row.filer_id is not None]}
@@ -1,21 +1,40 @@
+import asyncio
+import contextlib
 import logging
+import os
+import secrets
+from collections.abc import Callable
 from contextlib import asynccontextmanager
+from datetime import date
+from typing import Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi_cache.decorator import cache
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
-from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from backend import crud, schemas
+from starlette.routing import Match
+from starlette.types import Scope
+
+from backend import (
+    crud,
+    metrics,
+    profiling,
+    schemas,
+    serialization,
+    slow_queries,
+    snapshots,
+    suggest,
+    versioning,
+)
 from backend.cache import init_cache
-from backend.database import get_db
+from backend.database import AsyncSessionLocal, async_engine, get_db
+from backend.pagination import InvalidCursorError
 
 # ロギング設定
 logging.basicConfig(level=logging.INFO)
@@ -23,11 +42,22 @@ logger = logging.getLogger(__name__)
 
 limiter = Limiter(key_func=get_remote_address)
 
+# 管理用エンドポイントのトークン（未設定の場合は管理用エンドポイントを無効にする）
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_cache()
+    # 入力候補の索引を構築し、データバージョンの変更を定期的に確認する
+    refresher = asyncio.create_task(suggest.refresh_periodically(AsyncSessionLocal))
+    # スナップショットの配信可否を決める現在のデータバージョンを定期的に確認する
+    snapshot_checker = asyncio.create_task(snapshots.refresh_periodically(AsyncSessionLocal))
     yield
+    for task in (refresher, snapshot_checker):
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
 
 
 app = FastAPI(
@@ -49,6 +79,32 @@ app.add_middleware(
 )
 
 
+def _route_endpoint(scope: Scope) -> Callable | None:
+    """リクエストに一致するルートのエンドポイント（ルーティング前に参照する）"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "endpoint", None)
+    return None
+
+
+@app.middleware("http")
+async def serve_snapshots(request: Request, call_next):
+    """事前生成スナップショットに一致するGETはDBを使わずに返す"""
+    if request.method == "GET" and "no-cache" not in request.headers.get("cache-control", ""):
+        snapshot = snapshots.store.lookup(request.url.path, request.url.query)
+        if snapshot:
+            # エンドポイントを経由しないため、ルートのレート制限をここで適用する
+            try:
+                limiter._check_request_limit(
+                    request, _route_endpoint(request.scope), in_middleware=False
+                )
+            except RateLimitExceeded as e:
+                return _rate_limit_exceeded_handler(request, e)
+            return snapshots.snapshot_response(snapshot, request.headers)
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
     response = await call_next(request)
@@ -59,6 +115,82 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 
+# === 条件付きGET（ETag） ===
+
+
+def conditional_get(*path_params: str):
+    """
+    データバージョンからETagを生成し、If-None-Matchが一致すれば304を返す依存性
+
+    path_paramsを省略するとglobalスコープ、"filer_id"/"issuer_id"を指定すると
+    その提出者・発行体のスコープの世代番号を使う。ハンドラ本体より先に実行されるため、
+    304の場合は世代番号の取得1クエリのみで応答する。
+    """
+
+    async def dependency(request: Request, db: AsyncSession = Depends(get_db)) -> None:
+        scopes = [versioning.GLOBAL_SCOPE]
+        if path_params:
+            try:
+                ids = {name: int(request.path_params[name]) for name in path_params}
+            except (KeyError, ValueError):
+                return  # パスパラメータの検証エラーはFastAPIに任せる
+            scopes = [
+                versioning.filer_scope(ids[name])
+                if name == "filer_id"
+                else versioning.issuer_scope(ids[name])
+                for name in path_params
+            ]
+
+        versions = await versioning.get_data_versions(db, scopes)
+        etag = versioning.build_etag(versions)
+        request.state.etag = etag
+        request.state.data_versions = versions
+
+        if versioning.etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=304, headers={"ETag": etag, "Cache-Control": versioning.CACHE_CONTROL}
+            )
+
+    return Depends(dependency)
+
+
+def data_version(request: Request, scope: str) -> int | None:
+    """conditional_getで取得済みの世代番号（総数のメモ化キーに使う）"""
+    versions: dict[str, int] = getattr(request.state, "data_versions", {})
+    return versions.get(scope)
+
+
+def page_response(data: dict, items: list, total_mode: str) -> dict:
+    """一覧レスポンスの本体（total=estimateの場合のみtotal_estimatedを含める）"""
+    content = {"items": items, "total": data["total"]}
+    if total_mode == "estimate":
+        content["total_estimated"] = data["total_estimated"]
+    content.update(skip=data["skip"], limit=data["limit"])
+    if "next_cursor" in data:
+        content["next_cursor"] = data["next_cursor"]
+    return content
+
+
+@app.middleware("http")
+async def add_validators(request: Request, call_next):
+    response = await call_next(request)
+    etag = getattr(request.state, "etag", None)
+    if etag and response.status_code == 200:
+        # fastapi-cacheが付与する弱いETagを上書きする
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = versioning.CACHE_CONTROL
+    return response
+
+
+# プロファイラは計測のミドルウェアの内側で、アプリと他のミドルウェアのスタックを取得する
+app.add_middleware(profiling.ProfilingMiddleware)
+
+# 計測は他のミドルウェアの時間も含めるため最後に登録する（最も外側で実行される）
+metrics.instrument_engine(async_engine.sync_engine)
+slow_queries.install(async_engine)
+app.add_middleware(metrics.MetricsMiddleware)
+
+
 # === グローバルエラーハンドラ ===
 
 
@@ -130,10 +262,43 @@ async def root():
     return {"message": "EDINET 大量保有報告書 API", "version": "1.0.0"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """リクエスト・SQL・キャッシュのメトリクス（Prometheusのテキスト形式）"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# === 管理用 ===
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """X-Admin-TokenがADMIN_TOKENと一致しなければ拒否する"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="管理用トークンが正しくありません")
+
+
+@app.get(
+    "/api/admin/slow-queries",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+@metrics.query_budget(0)
+async def get_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """遅いSQLの記録（新しい順、実行計画を含む）"""
+    return {
+        "threshold_ms": slow_queries.THRESHOLD_MS,
+        "explain_enabled": slow_queries.EXPLAIN_ENABLED,
+        "items": slow_queries.as_dicts()[:limit],
+    }
+
+
 # === Filers (提出者) ===
 
 
-@app.get("/api/filers")
+@app.get("/api/filers", dependencies=[conditional_get()])
+@metrics.query_budget(3)
 @limiter.limit("100/minute")
 @cache(expire=300)
 async def get_filers(
@@ -141,50 +306,45 @@ async def get_filers(
     skip: int = Query(0, ge=0, le=10000, description="スキップ数"),
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     search: str | None = Query(None, max_length=100, description="検索キーワード"),
+    cursor: str | None = Query(None, max_length=200, description="次ページのカーソル"),
+    total: Literal["exact", "estimate"] = Query(
+        "exact", description="総数の取得方法（estimate: DBの統計による推定値）"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
-    """提出者一覧を取得（ページネーション対応）"""
-    data = await crud.get_filers(db, skip=skip, limit=limit, search=search)
-
-    result = []
-    for item in data["items"]:
-        filer = item["filer"]
-        result.append(
-            schemas.FilerResponse(
-                id=filer.id,
-                edinet_code=filer.primary_edinet_code or filer.edinet_code,
-                name=filer.name,
-                sec_code=filer.sec_code,
-                created_at=filer.created_at,
-                filing_count=item["filing_count"],
-                issuer_count=item["issuer_count"],
-                latest_filing_date=item["latest_filing_date"],
-            )
+    """提出者一覧を取得（ページネーション対応、cursor指定時はキーセット）"""
+    try:
+        data = await crud.get_filers(
+            db,
+            skip=skip,
+            limit=limit,
+            search=search,
+            cursor=cursor,
+            total_mode=total,
+            data_version=data_version(request, versioning.GLOBAL_SCOPE),
         )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
 
-    return {"items": result, "total": data["total"], "skip": data["skip"], "limit": data["limit"]}
+    items = serialization.rows(schemas.FilerResponse, data["items"])
+    return serialization.render(page_response(data, items, total))
 
 
-@app.get("/api/filers/{filer_id}", response_model=schemas.FilerResponse)
+@app.get(
+    "/api/filers/{filer_id}",
+    response_model=schemas.FilerResponse,
+    dependencies=[conditional_get("filer_id")],
+)
+@metrics.query_budget(2)
 @limiter.limit("100/minute")
 @cache(expire=600)
 async def get_filer(request: Request, filer_id: int, db: AsyncSession = Depends(get_db)):
     """提出者詳細を取得"""
-    filer = await crud.get_filer_by_id(db, filer_id)
-    if not filer:
+    detail = await crud.get_filer_detail(db, filer_id)
+    if not detail:
         raise HTTPException(status_code=404, detail="Filer not found")
 
-    stats = await crud.get_filer_stats(db, filer.id)
-    return schemas.FilerResponse(
-        id=filer.id,
-        edinet_code=filer.primary_edinet_code or filer.edinet_code,
-        name=filer.name,
-        sec_code=filer.sec_code,
-        created_at=filer.created_at,
-        filing_count=stats["filing_count"],
-        issuer_count=stats["issuer_count"],
-        latest_filing_date=stats["latest_filing_date"],
-    )
+    return schemas.FilerResponse(**detail)
 
 
 @app.post("/api/filers", response_model=schemas.FilerResponse)
@@ -213,7 +373,8 @@ async def create_filer(
 # === Issuers (発行体/銘柄) ===
 
 
-@app.get("/api/filers/{filer_id}/issuers")
+@app.get("/api/filers/{filer_id}/issuers", dependencies=[conditional_get("filer_id")])
+@metrics.query_budget(2)
 @limiter.limit("30/minute")
 @cache(expire=300)
 async def get_issuers_by_filer(
@@ -222,35 +383,34 @@ async def get_issuers_by_filer(
     skip: int = Query(0, ge=0, le=10000, description="スキップ数"),
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     search: str | None = Query(None, max_length=100, description="検索キーワード"),
+    sort: Literal["latest", "ratio_change"] = Query(
+        "latest", description="並び順（latest: 最新提出日順, ratio_change: 増減の大きい順）"
+    ),
+    total: Literal["exact", "estimate"] = Query(
+        "exact", description="総数の取得方法（estimate: DBの統計による推定値）"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """提出者が保有している銘柄一覧を取得（ページネーション対応）"""
-    filer = await crud.get_filer_by_id(db, filer_id)
-    if not filer:
+    data = await crud.get_issuers_by_filer(
+        db,
+        filer_id,
+        skip=skip,
+        limit=limit,
+        search=search,
+        sort=sort,
+        total_mode=total,
+        data_version=data_version(request, versioning.filer_scope(filer_id)),
+    )
+    if data is None:
         raise HTTPException(status_code=404, detail="Filer not found")
 
-    data = await crud.get_issuers_by_filer(db, filer_id, skip=skip, limit=limit, search=search)
-
-    result = []
-    for item in data["items"]:
-        issuer = item["issuer"]
-        result.append(
-            schemas.IssuerResponse(
-                id=issuer.id,
-                edinet_code=issuer.edinet_code,
-                name=issuer.name or issuer.edinet_code,
-                sec_code=issuer.sec_code,
-                latest_filing_date=item["latest_filing_date"],
-                latest_ratio=item.get("latest_ratio"),
-                ratio_change=item.get("ratio_change"),
-                filing_count=item["filing_count"],
-            )
-        )
-
-    return {"items": result, "total": data["total"], "skip": data["skip"], "limit": data["limit"]}
+    items = serialization.rows(schemas.IssuerResponse, data["items"])
+    return serialization.render(page_response(data, items, total))
 
 
-@app.get("/api/issuers")
+@app.get("/api/issuers", dependencies=[conditional_get()])
+@metrics.query_budget(3)
 @limiter.limit("100/minute")
 @cache(expire=300)
 async def get_issuers(
@@ -258,27 +418,37 @@ async def get_issuers(
     skip: int = Query(0, ge=0, le=10000, description="スキップ数"),
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     search: str | None = Query(None, max_length=100, description="検索キーワード"),
+    cursor: str | None = Query(None, max_length=200, description="次ページのカーソル"),
+    total: Literal["exact", "estimate"] = Query(
+        "exact", description="総数の取得方法（estimate: DBの統計による推定値）"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
-    """銘柄一覧を取得（ページネーション・検索対応）"""
-    data = await crud.get_issuers(db, skip=skip, limit=limit, search=search)
-
-    result = []
-    for issuer in data["items"]:
-        result.append(
-            schemas.IssuerResponse(
-                id=issuer.id,
-                edinet_code=issuer.edinet_code,
-                name=issuer.name or issuer.edinet_code,
-                sec_code=issuer.sec_code,
-                # latest_filing_date等は一覧取得時は重くなるため含めない、もしくはNone
-            )
+    """銘柄一覧を取得（ページネーション・検索対応、cursor指定時はキーセット）"""
+    try:
+        data = await crud.get_issuers(
+            db,
+            skip=skip,
+            limit=limit,
+            search=search,
+            cursor=cursor,
+            total_mode=total,
+            data_version=data_version(request, versioning.GLOBAL_SCOPE),
         )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
 
-    return {"items": result, "total": data["total"], "skip": data["skip"], "limit": data["limit"]}
+    # latest_filing_date等は一覧取得時は重くなるため含めない（None）
+    items = serialization.rows(schemas.IssuerResponse, data["items"])
+    return serialization.render(page_response(data, items, total))
 
 
-@app.get("/api/issuers/{issuer_id}", response_model=schemas.IssuerResponse)
+@app.get(
+    "/api/issuers/{issuer_id}",
+    response_model=schemas.IssuerResponse,
+    dependencies=[conditional_get("issuer_id")],
+)
+@metrics.query_budget(2)
 @limiter.limit("100/minute")
 @cache(expire=600)
 async def get_issuer(request: Request, issuer_id: int, db: AsyncSession = Depends(get_db)):
@@ -295,137 +465,165 @@ async def get_issuer(request: Request, issuer_id: int, db: AsyncSession = Depend
     )
 
 
-@app.get("/api/issuers/{issuer_id}/ownerships", response_model=schemas.IssuerOwnershipResponse)
+@app.get(
+    "/api/issuers/{issuer_id}/ownerships",
+    response_model=schemas.IssuerOwnershipResponse,
+    dependencies=[conditional_get("issuer_id")],
+)
+@metrics.query_budget(2)
 @limiter.limit("50/minute")
 @cache(expire=900)
 async def get_issuer_ownerships(
     request: Request, issuer_id: int, db: AsyncSession = Depends(get_db)
 ):
     """銘柄を保有している投資家一覧を取得"""
-    issuer = await crud.get_issuer_by_id(db, issuer_id)
-    if not issuer:
+    data = await crud.get_issuer_ownerships(db, issuer_id)
+    if data is None:
         raise HTTPException(status_code=404, detail="Issuer not found")
 
-    ownerships = await crud.get_issuer_ownerships(db, issuer_id)
-
-    return {
-        "issuer": schemas.IssuerResponse(
-            id=issuer.id,
-            edinet_code=issuer.edinet_code,
-            name=issuer.name or issuer.edinet_code,
-            sec_code=issuer.sec_code,
-        ),
-        "ownerships": ownerships,
-    }
+    return serialization.render(
+        {
+            "issuer": serialization.rows(schemas.IssuerResponse, [data["issuer"]])[0],
+            "ownerships": serialization.rows(schemas.OwnershipItem, data["ownerships"]),
+        }
+    )
 
 
 # === Filings (報告書) ===
 
 
-@app.get("/api/filers/{filer_id}/filings", response_model=list[schemas.FilingResponse])
+@app.get(
+    "/api/filers/{filer_id}/filings",
+    response_model=list[schemas.FilingResponse],
+    dependencies=[conditional_get("filer_id")],
+)
+@metrics.query_budget(2)
 @limiter.limit("50/minute")
 @cache(expire=900)
 async def get_filings_by_filer(
     request: Request, filer_id: int, limit: int = 100, db: AsyncSession = Depends(get_db)
 ):
     """提出者の報告書一覧を取得"""
-    filer = await crud.get_filer_by_id(db, filer_id)
-    if not filer:
+    filings = await crud.get_filings_by_filer(db, filer_id, limit)
+    if filings is None:
         raise HTTPException(status_code=404, detail="Filer not found")
 
-    filings = await crud.get_filings_by_filer(db, filer_id, limit)
-    result = []
-    for filing in filings:
-        result.append(
-            schemas.FilingResponse(
-                id=filing.id,
-                doc_id=filing.doc_id,
-                filer_id=filing.filer_id,
-                issuer_id=filing.issuer_id,
-                doc_description=filing.doc_description,
-                submit_date=filing.submit_date,
-                parent_doc_id=filing.parent_doc_id,
-                csv_flag=filing.csv_flag,
-                xbrl_flag=filing.xbrl_flag,
-                pdf_flag=filing.pdf_flag,
-                issuer_name=filing.issuer.name if filing.issuer else None,
-                issuer_edinet_code=filing.issuer.edinet_code if filing.issuer else None,
-            )
-        )
-    return result
+    return serialization.render(serialization.rows(schemas.FilingResponse, filings))
 
 
-@app.get("/api/filers/{filer_id}/issuers/{issuer_id}/history")
+@app.get(
+    "/api/filers/{filer_id}/issuers/{issuer_id}/history",
+    dependencies=[conditional_get("filer_id", "issuer_id")],
+)
+@metrics.query_budget(2)
 @limiter.limit("50/minute")
 @cache(expire=900)
 async def get_issuer_history(
     request: Request, filer_id: int, issuer_id: int, db: AsyncSession = Depends(get_db)
 ):
-    """銘柄の報告書履歴を取得"""
-    from backend.models import HoldingDetail
-
-    filer = await crud.get_filer_by_id(db, filer_id)
-    issuer = await crud.get_issuer_by_id(db, issuer_id)
+    """銘柄の報告書履歴を取得（提出者・発行体・履歴を1クエリで取得）"""
+    rows = await crud.get_issuer_history(db, filer_id, issuer_id)
 
-    if not filer:
+    if not rows:
         raise HTTPException(status_code=404, detail="Filer not found")
-    if not issuer:
+    head = rows[0]
+    if head.issuer_id is None:
         raise HTTPException(status_code=404, detail="Issuer not found")
 
-    filings = await crud.get_filings_by_issuer_and_filer(db, issuer_id, filer_id)
-
-    # N+1問題解消: 全HoldingDetailを一括取得
-    filing_ids = [f.id for f in filings]
-    stmt = select(HoldingDetail).where(HoldingDetail.filing_id.in_(filing_ids))
-    result = await db.execute(stmt)
-    holdings = result.scalars().all()
-    holding_map = {h.filing_id: h for h in holdings}
-
-    history = []
-    prev_ratio = None
-
-    # 古い順に処理して差分を計算
-    for filing in reversed(filings):
-        # マップからHoldingDetailを取得（クエリ発行なし）
-        holding = holding_map.get(filing.id)
-
-        shares_held = holding.shares_held if holding else None
-        holding_ratio = holding.holding_ratio if holding else None
-
-        # 前回との差分を計算
-        ratio_change = None
-        if holding_ratio is not None and prev_ratio is not None:
-            ratio_change = round(holding_ratio - prev_ratio, 2)
-
-        history.append(
-            {
-                "doc_id": filing.doc_id,
-                "submit_date": filing.submit_date,
-                "doc_description": filing.doc_description,
-                "shares_held": shares_held,
-                "holding_ratio": holding_ratio,
-                "ratio_change": ratio_change,
-            }
-        )
-
-        if holding_ratio is not None:
-            prev_ratio = holding_ratio
-
-    # 新しい順に戻す
-    history.reverse()
+    history = [
+        {
+            "doc_id": row.doc_id,
+            "submit_date": row.submit_date,
+            "doc_description": row.doc_description,
+            "shares_held": row.shares_held,
+            "holding_ratio": row.holding_ratio,
+            "ratio_change": (
+                round(row.holding_ratio - row.previous_ratio, 2)
+                if row.holding_ratio is not None and row.previous_ratio is not None
+                else None
+            ),
+        }
+        for row in rows
+        if row.doc_id is not None
+    ]
 
     return {
         "issuer": {
-            "id": issuer.id,
-            "edinet_code": issuer.edinet_code,
-            "name": issuer.name or issuer.edinet_code,
-            "sec_code": issuer.sec_code,
+            "id": head.issuer_id,
+            "edinet_code": head.issuer_edinet_code,
+            "name": head.issuer_name or head.issuer_edinet_code,
+            "sec_code": head.issuer_sec_code,
+        },
+        "filer": {
+            "id": head.filer_id,
+            "edinet_code": head.filer_edinet_code,
+            "name": head.filer_name,
         },
-        "filer": {"id": filer.id, "edinet_code": filer.primary_edinet_code, "name": filer.name},
         "history": history,
     }
 
 
+# === Search (検索) ===
+
+
+@app.get(
+    "/api/search/filings",
+    response_model=schemas.FilingSearchResponse,
+    dependencies=[conditional_get()],
+)
+@metrics.query_budget(2)
+@limiter.limit("30/minute")
+@cache(expire=300)
+async def search_filings(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="検索語（空白区切りで複数）"),
+    filer_id: int | None = Query(None, description="提出者ID"),
+    date_from: date | None = Query(None, description="提出日の下限（この日を含む）"),
+    date_to: date | None = Query(None, description="提出日の上限（この日を含む）"),
+    cursor: str | None = Query(None, max_length=200, description="次ページのカーソル"),
+    limit: int = Query(50, ge=1, le=100, description="取得件数"),
+    db: AsyncSession = Depends(get_db),
+):
+    """書類名・保有目的を全文検索（提出日の新しい順）"""
+    try:
+        data = await crud.search_filings(
+            db,
+            q,
+            filer_id=filer_id,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+    items = serialization.rows(schemas.FilingSearchItem, data["items"])
+    return serialization.render(
+        {"items": items, "limit": data["limit"], "next_cursor": data["next_cursor"]}
+    )
+
+
+@app.get("/api/search/suggest", response_model=schemas.SuggestResponse)
+# 索引の構築時のみ問い合わせる（構築後は0）
+@metrics.query_budget(4)
+@limiter.limit("300/minute")
+async def suggest_names(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="検索語"),
+    limit: int = Query(10, ge=1, le=20),
+    kind: Literal["filer", "issuer"] | None = Query(None, description="候補の種類"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    提出者名・銘柄名・EDINETコード・証券コードの入力候補を取得
+
+    プロセス内の索引から返すため、索引の構築後はDBに問い合わせない。
+    """
+    index = await suggest.holder.get(db)
+    return {"items": index.search(q, limit, kind), "version": index.version}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,473 @@
+"""
+APIのリクエスト・SQLの計測とPrometheus形式での公開
+
+ASGIミドルウェアでリクエストごとの所要時間・ステータス・キャッシュの結果を、
+SQLAlchemyのbefore/after_cursor_executeイベントでクエリ数・DB時間を記録し、
+/metricsでPrometheusのテキスト形式として返す。
+
+- ルートはパスのテンプレート（/api/filers/{filer_id}）単位で集計する
+  （スナップショットで応答したリクエストも同じテンプレートに振り分ける）
+- クエリ数・DB時間はcontextvarのRequestStatsに加算し、リクエスト終了時に
+  ルート単位のヒストグラムへ記録する（リクエスト外のクエリは全体の集計のみ）
+- コネクションプールの取得待ち時間は、プールの接続取得処理を計測する
+- キャッシュの結果はfastapi-cacheのバックエンドを包んで記録する
+  （hit/miss/error、スナップショット応答はsnapshot、条件付きGETの304はnot_modified）
+- @query_budgetでルートごとに宣言したクエリ数の上限を超えたリクエストは、
+  警告ログとedinet_query_budget_exceeded_totalで検知する（N+1の再発防止）
+
+集計はイベントループのスレッドでのみ更新される前提でロックを取らない。
+外部ライブラリ（prometheus_client）は使わず、値の加算とバケットの探索のみで記録する。
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from fastapi_cache.backends import Backend
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRIC_PREFIX = "edinet"
+
+# 秒単位のヒストグラムのバケット
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# 1リクエストあたりのクエリ数のバケット
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 25, 50)
+
+# どのルートにも一致しないリクエスト（404など）のラベル
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """ラベルごとの累積値"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = f"{METRIC_PREFIX}_{name}"
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Histogram:
+    """ラベルごとのバケット別の件数・合計・件数"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = f"{METRIC_PREFIX}_{name}"
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # ラベル → [バケットごとの件数（累積前、最後は+Inf）, 合計]
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def total(self, labels: Labels = ()) -> float:
+        series = self._series.get(labels)
+        return series[1][0] if series else 0.0
+
+    def samples(self) -> Iterable[str]:
+        names = (*self.labelnames, "le")
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                label_text = _format_labels(names, (*labels, _format_value(float(bound))))
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total[0])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+class Gauge:
+    """出力時にコールバックで値を取得する現在値"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[tuple[Labels, float]]],
+    ):
+        self.name = f"{METRIC_PREFIX}_{name}"
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.collect():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+    def clear(self) -> None:
+        pass
+
+
+Metric = Counter | Histogram | Gauge
+_M = TypeVar("_M", Counter, Histogram, Gauge)
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+class Registry:
+    """/metricsで出力するメトリクスの一覧"""
+
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: _M) -> _M:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """記録済みの値を消す（テスト用）"""
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+REQUESTS = registry.register(
+    Counter("http_requests_total", "HTTP requests.", ("method", "route", "status"))
+)
+REQUEST_DURATION = registry.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+)
+REQUEST_QUERIES = registry.register(
+    Histogram("http_request_queries", "SQL statements per HTTP request.", ("route",), QUERY_BUCKETS)
+)
+REQUEST_DB_TIME = registry.register(
+    Histogram("http_request_db_seconds", "Time spent in SQL per HTTP request.", ("route",))
+)
+CACHE_REQUESTS = registry.register(
+    Counter(
+        "cache_requests_total",
+        "Cacheable HTTP requests by outcome (hit, miss, error, snapshot, not_modified).",
+        ("route", "outcome"),
+    )
+)
+QUERIES = registry.register(Counter("db_queries_total", "SQL statements executed."))
+QUERY_DURATION = registry.register(
+    Histogram("db_query_duration_seconds", "SQL statement execution time.")
+)
+QUERY_BUDGET_EXCEEDED = registry.register(
+    Counter(
+        "query_budget_exceeded_total",
+        "HTTP requests that ran more SQL statements than the route's query budget.",
+        ("route",),
+    )
+)
+POOL_WAIT = registry.register(
+    Histogram("db_pool_checkout_wait_seconds", "Time waiting for a pooled connection.")
+)
+
+_pools: list[Engine] = []
+
+
+def _pool_state() -> Iterable[tuple[Labels, float]]:
+    for engine in _pools:
+        pool: Any = engine.pool
+        for state in ("size", "checkedout", "overflow"):
+            method = getattr(pool, state, None)
+            if callable(method):
+                yield (engine.url.database or engine.url.get_backend_name(), state), method()
+
+
+registry.register(
+    Gauge(
+        "db_pool_connections",
+        "Connection pool size, checked out connections and overflow.",
+        ("database", "state"),
+        _pool_state,
+    )
+)
+
+
+# === リクエスト単位の集計 ===
+
+
+@dataclass
+class RequestStats:
+    """1リクエストのクエリ数・DB時間・キャッシュの結果"""
+
+    queries: int = 0
+    db_seconds: float = 0.0
+    cache: str | None = None
+    # ルートの特定用（ルーティング後にrouteが設定される）
+    scope: Scope | None = field(default=None, repr=False)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("edinet_request_stats", default=None)
+
+
+def current_request() -> RequestStats | None:
+    """実行中のリクエストの集計（リクエスト外ではNone）"""
+    return _current.get()
+
+
+# === SQLAlchemy ===
+
+_STARTED_KEY = "_edinet_metrics_started"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        setattr(context, _STARTED_KEY, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, _STARTED_KEY, None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    QUERIES.inc()
+    QUERY_DURATION.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _instrument_pool(pool: Pool) -> None:
+    """接続の取得（空きがなければ返却を待つ）にかかった時間を記録する"""
+    get = pool._do_get
+
+    def timed_get() -> Any:
+        started = time.perf_counter()
+        try:
+            return get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_get  # type: ignore[method-assign]
+
+
+def instrument_engine(engine: Engine) -> None:
+    """エンジンのクエリ・プールを計測対象にする（非同期エンジンはsync_engineを渡す）"""
+    if engine in _pools:
+        return
+    _pools.append(engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _instrument_pool(engine.pool)
+    # dispose()でプールが作り直された場合も計測を続ける
+    event.listen(engine, "engine_disposed", lambda disposed: _instrument_pool(disposed.pool))
+
+
+# === キャッシュ ===
+
+
+class InstrumentedBackend(Backend):
+    """fastapi-cacheのバックエンドを包み、取得の結果を実行中のリクエストに記録する"""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+
+    async def get_with_ttl(self, key: str) -> tuple[int, str | None]:
+        stats = _current.get()
+        try:
+            ttl, value = await self.backend.get_with_ttl(key)
+        except Exception:
+            if stats is not None:
+                stats.cache = "error"
+            raise
+        if stats is not None:
+            stats.cache = "miss" if value is None else "hit"
+        return ttl, value
+
+    async def get(self, key: str) -> str | None:
+        return await self.backend.get(key)
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> None:
+        await self.backend.set(key, value, expire)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        return await self.backend.clear(namespace, key)
+
+
+# === クエリ数の上限 ===
+
+_BUDGET_ATTRIBUTE = "query_budget"
+
+
+def query_budget(limit: int) -> Callable[[_F], _F]:
+    """
+    ルートの1リクエストあたりのSQL実行数の上限を宣言するデコレータ
+
+    @app.getの直下に付ける。上限はキャッシュを経由しない場合の実行数
+    （conditional_getの世代番号の取得を含む）で、テスト（test_query_budgets.py）が
+    シードしたデータで上限内に収まることを確認する。
+    """
+
+    def decorator(func: _F) -> _F:
+        setattr(func, _BUDGET_ATTRIBUTE, limit)
+        return func
+
+    return decorator
+
+
+def route_query_budget(route: Any) -> int | None:
+    """ルートに宣言されたクエリ数の上限（未宣言ならNone）"""
+    return getattr(getattr(route, "endpoint", None), _BUDGET_ATTRIBUTE, None)
+
+
+# === ASGIミドルウェア ===
+
+
+def route_template(scope: Scope) -> str:
+    """リクエストに一致したルートのパスのテンプレート"""
+    route = scope.get("route")
+    if route is not None:
+        return str(route.path)
+    # ルーティング前に応答した場合（スナップショット）はルートを照合する
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return str(candidate.path)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """リクエストの所要時間・クエリ数・DB時間・キャッシュの結果を記録する
+
+    他のミドルウェア（スナップショット応答など）の時間も含めるため、最も外側に登録する。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = _current.set(stats)
+        status = 500
+        snapshot = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, snapshot
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                snapshot = any(name == b"x-snapshot-version" for name, _ in message["headers"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            self.record(scope, stats, status, snapshot, elapsed)
+
+    @staticmethod
+    def record(
+        scope: Scope, stats: RequestStats, status: int, snapshot: bool, elapsed: float
+    ) -> None:
+        route = route_template(scope)
+        method = scope["method"]
+        REQUESTS.inc((method, route, str(status)))
+        REQUEST_DURATION.observe(elapsed, (method, route))
+        REQUEST_QUERIES.observe(stats.queries, (route,))
+        REQUEST_DB_TIME.observe(stats.db_seconds, (route,))
+
+        if snapshot:
+            outcome: str | None = "snapshot"
+        elif status == 304:
+            outcome = "not_modified"
+        else:
+            outcome = stats.cache
+        if outcome is not None:
+            CACHE_REQUESTS.inc((route, outcome))
+
+        budget = route_query_budget(scope.get("route"))
+        if budget is not None and stats.queries > budget:
+            QUERY_BUDGET_EXCEEDED.inc((route,))
+            logger.warning(
+                "Query budget exceeded: %s %s ran %d queries (budget %d)",
+                method,
+                route,
+                stats.queries,
+                budget,
+            )
+
+
+def render() -> str:
+    """Prometheusのテキスト形式"""
+    return registry.render()
@@ -8,7 +8,7 @@ from __future__ import annotations
 from datetime import UTC, datetime
 from typing import cast
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -22,6 +22,15 @@ class Filer(Base):
     """大量保有報告書の提出者（光通信など）- 集約ルート"""
 
     __tablename__ = "filers"
+    __table_args__ = (
+        # 提出者名の部分一致検索（pg_trgm、SQLiteはFTS5テーブル: backend/search.py）
+        Index(
+            "ix_filers_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     edinet_code: Mapped[str] = mapped_column(
@@ -30,6 +39,9 @@ class Filer(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)  # 株式会社光通信
     sec_code: Mapped[str | None] = mapped_column(String(10), nullable=True)  # 94350
     jcn: Mapped[str | None] = mapped_column(String(13), nullable=True)  # 法人番号
+    search_text: Mapped[str | None] = mapped_column(
+        String(255), nullable=True
+    )  # 正規化した提出者名（検索用、backend/search.pyで設定）
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC)
     )
@@ -62,6 +74,10 @@ class FilerCode(Base):
     """Filerが持つEDINETコード（1つのFilerが複数のコードを持てる）"""
 
     __tablename__ = "filer_codes"
+    __table_args__ = (
+        # 提出者の代表EDINETコード（提出者ごとに最初に登録されたコード）
+        Index("ix_filer_codes_filer_id_id", "filer_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     filer_id: Mapped[int] = mapped_column(ForeignKey("filers.id"), nullable=False)
@@ -82,6 +98,15 @@ class Issuer(Base):
     """報告書の対象となる発行体（保有されている企業）"""
 
     __tablename__ = "issuers"
+    __table_args__ = (
+        # 銘柄名・コードの部分一致検索（pg_trgm、SQLiteはFTS5テーブル: backend/search.py）
+        Index(
+            "ix_issuers_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     edinet_code: Mapped[str] = mapped_column(
@@ -89,6 +114,9 @@ class Issuer(Base):
     )  # 発行体のEDINETコード
     name: Mapped[str | None] = mapped_column(String(255), nullable=True)  # 発行体名（銘柄名）
     sec_code: Mapped[str | None] = mapped_column(String(10), nullable=True)  # 証券コード
+    search_text: Mapped[str | None] = mapped_column(
+        String(300), nullable=True
+    )  # 正規化した銘柄名・コード（検索用、backend/search.pyで設定）
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC)
     )
@@ -105,6 +133,21 @@ class Filing(Base):
     """個々の大量保有報告書"""
 
     __tablename__ = "filings"
+    __table_args__ = (
+        # 提出者×発行体の履歴（提出日順）、提出者単位の絞り込み・集計
+        Index("ix_filings_filer_id_issuer_id_submit_date", "filer_id", "issuer_id", "submit_date"),
+        # 発行体単位の絞り込み（名称変更時の影響範囲など）
+        Index("ix_filings_issuer_id_filer_id", "issuer_id", "filer_id"),
+        # 提出日の範囲指定
+        Index("ix_filings_submit_date", "submit_date"),
+        # 書類名の部分一致検索（pg_trgm、SQLiteはFTS5テーブル: backend/search.py）
+        Index(
+            "ix_filings_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     doc_id: Mapped[str] = mapped_column(
@@ -116,6 +159,9 @@ class Filing(Base):
         String(50), nullable=True
     )  # 大量保有報告書/変更報告書
     doc_description: Mapped[str | None] = mapped_column(String(255), nullable=True)  # 詳細な説明
+    search_text: Mapped[str | None] = mapped_column(
+        String(255), nullable=True
+    )  # 正規化した書類名（検索用、backend/search.pyで設定）
     submit_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     parent_doc_id: Mapped[str | None] = mapped_column(String(20), nullable=True)  # 変更元の報告書ID
     csv_flag: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -134,14 +180,110 @@ class HoldingDetail(Base):
     """報告書から抽出した保有詳細データ"""
 
     __tablename__ = "holding_details"
+    __table_args__ = (
+        # 報告書の保有詳細（報告書とのJOIN）
+        Index("ix_holding_details_filing_id", "filing_id"),
+        # 保有目的の部分一致検索（pg_trgm、SQLiteはFTS5テーブル: backend/search.py）
+        Index(
+            "ix_holding_details_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     filing_id: Mapped[int] = mapped_column(ForeignKey("filings.id"), nullable=False)
     shares_held: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 保有株数
     holding_ratio: Mapped[float | None] = mapped_column(Float, nullable=True)  # 保有比率（%）
     purpose: Mapped[str | None] = mapped_column(String(255), nullable=True)  # 保有目的
+    search_text: Mapped[str | None] = mapped_column(
+        String(255), nullable=True
+    )  # 正規化した保有目的（検索用、backend/search.pyで設定）
+    # 同じ提出者×発行体の前回報告書の保有比率と増減（コミット時にsummariesで計算）
+    previous_ratio: Mapped[float | None] = mapped_column(Float, nullable=True)
+    ratio_change: Mapped[float | None] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC)
     )
 
     filing: Mapped[Filing] = relationship(back_populates="holding_details")
+
+
+class DataVersion(Base):
+    """データ更新の世代番号（ETag・キャッシュ無効化用）
+
+    scopeは "global"（全体）、"filer:{id}"、"issuer:{id}" のいずれか。
+    """
+
+    __tablename__ = "data_versions"
+
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+
+
+class FilerStats(Base):
+    """提出者ごとの集計値（コミット時に変更された提出者分を再集計）"""
+
+    __tablename__ = "filer_stats"
+    __table_args__ = (
+        # 提出者一覧の並び順（銘柄数の降順・IDの降順）をインデックスで返す
+        Index("ix_filer_stats_issuer_count_filer_id", "issuer_count", "filer_id"),
+    )
+
+    filer_id: Mapped[int] = mapped_column(ForeignKey("filers.id"), primary_key=True)
+    filing_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    issuer_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    latest_filing_date: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+
+
+class CurrentPosition(Base):
+    """提出者×発行体ごとの最新の保有状況（コミット時に変更された組を再計算）"""
+
+    __tablename__ = "current_positions"
+    __table_args__ = (
+        # 提出者の保有銘柄一覧（最新提出日の降順）
+        Index("ix_current_positions_filer_id_latest_submit_date", "filer_id", "latest_submit_date"),
+        # 銘柄の保有者一覧（保有比率順）
+        Index("ix_current_positions_issuer_id_holding_ratio", "issuer_id", "holding_ratio"),
+        # 提出者の保有銘柄一覧（増減順）
+        Index("ix_current_positions_filer_id_ratio_change", "filer_id", "ratio_change"),
+    )
+
+    filer_id: Mapped[int] = mapped_column(ForeignKey("filers.id"), primary_key=True)
+    issuer_id: Mapped[int] = mapped_column(ForeignKey("issuers.id"), primary_key=True)
+    # 報告書・保有詳細の削除はブロックせず、コミット時の再計算で付け替える
+    latest_filing_id: Mapped[int | None] = mapped_column(
+        ForeignKey("filings.id", ondelete="SET NULL"), nullable=True
+    )
+    latest_submit_date: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    latest_holding_id: Mapped[int | None] = mapped_column(
+        ForeignKey("holding_details.id", ondelete="SET NULL"), nullable=True
+    )  # 最新報告書の保有詳細（未取得ならNone）
+    shares_held: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    holding_ratio: Mapped[float | None] = mapped_column(Float, nullable=True)
+    purpose: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    previous_ratio: Mapped[float | None] = mapped_column(
+        Float, nullable=True
+    )  # 最新より前の報告書で最後に判明している保有比率
+    ratio_change: Mapped[float | None] = mapped_column(Float, nullable=True)  # 前回からの増減
+    filing_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
@@ -0,0 +1,66 @@
+"""
+キーセットページネーション用のカーソル
+
+カーソルは直前ページ最終行のソートキー（末尾はIDのタイブレーカー）を
+URLセーフなBase64でエンコードした不透明な文字列。OFFSETと異なり、
+どれだけ深いページでもインデックスのシークだけで次ページを取得できる。
+"""
+
+import base64
+import json
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidCursorError(ValueError):
+    """カーソルの形式が不正"""
+
+
+def encode_cursor(values: Sequence[int]) -> str:
+    """ソートキーの値をカーソル文字列に変換"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[int]:
+    """
+    カーソル文字列をソートキーの値に戻す
+
+    Args:
+        cursor: encode_cursorで生成した文字列
+        size: 期待するキーの数
+
+    Raises:
+        InvalidCursorError: 形式が不正な場合
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(v, int) and not isinstance(v, bool) for v in values)
+    ):
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def datetime_to_key(value: datetime) -> int:
+    """日時をカーソルに入れる整数（UNIXエポックからのマイクロ秒、タイムゾーンなしはUTC扱い）"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def key_to_datetime(key: int) -> datetime:
+    """datetime_to_keyの逆変換"""
+    try:
+        return _EPOCH + key * _MICROSECOND
+    except OverflowError as e:
+        raise InvalidCursorError("Invalid cursor") from e
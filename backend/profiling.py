@@ -0,0 +1,258 @@
+"""
+リクエストのサンプリングプロファイラ
+
+再現しにくいレイテンシの悪化を調べるため、PROFILE_SAMPLE_RATEの割合のリクエスト、
+またはX-ProfileヘッダにADMIN_TOKENを指定したリクエストを統計的プロファイラで計測し、
+フレームグラフ用のファイル（collapsed stacks、またはspeedscopeのJSON）をPROFILE_DIRに保存する。
+
+- 計測中は別スレッドがPROFILE_INTERVAL_MSごとにイベントループのスレッドのスタックを取得する
+  （トレース型のプロファイラと異なり、計測対象のコードの実行速度を落とさない）
+- 同時に計測するリクエストは1件まで、保存するファイルはPROFILE_MAX_FILES件まで（古い順に削除）
+- サンプリングによる計測はPROFILE_MIN_MSより時間がかかったリクエストのみ保存する
+そのため、低いPROFILE_SAMPLE_RATEであれば本番環境でも有効にしておける。
+
+イベントループのスレッドを計測するため、同時に処理している他のリクエストのスタックも含まれる。
+SQLAlchemyの非同期APIはgreenlet上で同期処理を実行するため、ORMの行の変換などのスタックは
+greenletの開始位置から始まる（呼び出し元のエンドポイントにはつながらない）。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+MIN_MS = float(os.getenv("PROFILE_MIN_MS", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "data/profiles"))
+MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")
+# X-Profileヘッダによる計測の指定に必要なトークン（未設定の場合はヘッダを無視する）
+TOKEN = os.getenv("ADMIN_TOKEN")
+
+HEADER = b"x-profile"
+FILE_HEADER = b"x-profile-file"
+EXTENSIONS = {"collapsed": ".collapsed.txt", "speedscope": ".speedscope.json"}
+MAX_DEPTH = 200
+
+# 保存数の上限はこの拡張子のファイルに対して適用するため、未知の形式は起動時に拒否する
+if FORMAT not in EXTENSIONS:
+    raise ValueError(f"PROFILE_FORMAT must be one of {sorted(EXTENSIONS)}, got {FORMAT!r}")
+
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+_active = threading.Lock()
+_frame_names: dict[CodeType, str] = {}
+
+
+def _short_path(filename: str) -> str:
+    """site-packages・標準ライブラリ・リポジトリのルートからの相対パス"""
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    if filename.startswith(_STDLIB):
+        return filename[len(_STDLIB) :]
+    try:
+        return os.path.relpath(filename)
+    except ValueError:
+        return filename
+
+
+def _frame_name(code: CodeType) -> str:
+    name = _frame_names.get(code)
+    if name is None:
+        name = f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        _frame_names[code] = name
+    return name
+
+
+def _stack(frame: FrameType | None) -> tuple[str, ...]:
+    """呼び出し元から順に並べたスタック"""
+    names: list[str] = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+class Sampler:
+    """指定したスレッドのスタックを一定間隔で取得する"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="edinet-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        """取得を止める（スレッドの終了はjoinで待つ）"""
+        self._stop.set()
+        self.elapsed = time.perf_counter() - self.started
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+            del frame
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """flamegraph.pl・speedscope等で読めるcollapsed stacks形式"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> dict[str, Any]:
+        """speedscopeのファイル形式（sampled）"""
+        frames: list[dict[str, Any]] = []
+        index: dict[str, int] = {}
+        samples = []
+        weights = []
+        interval_ms = self.interval * 1000
+        for stack, count in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame})
+                indices.append(index[frame])
+            samples.append(indices)
+            weights.append(round(count * interval_ms, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "edinet-profiler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(self.elapsed * 1000, 3),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def write_profile(sampler: Sampler, path: Path, name: str) -> None:
+    """取得の終了を待ってプロファイルを書き出し、PROFILE_MAX_FILESを超えた古いファイルを削除する"""
+    sampler.join()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if FORMAT == "collapsed":
+        content = sampler.collapsed()
+    else:
+        content = json.dumps(sampler.speedscope(name), ensure_ascii=False)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+    prune(path.parent)
+
+
+def prune(directory: Path) -> None:
+    """保存済みのプロファイルを新しい順にPROFILE_MAX_FILES件だけ残す"""
+    profiles = [
+        entry
+        for entry in directory.iterdir()
+        if entry.is_file() and entry.name.endswith(tuple(EXTENSIONS.values()))
+    ]
+    profiles.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in profiles[MAX_FILES:]:
+        entry.unlink(missing_ok=True)
+
+
+def _requested(scope: Scope) -> bool:
+    if not TOKEN:
+        return False
+    for name, value in scope["headers"]:
+        if name == HEADER:
+            return secrets.compare_digest(value.decode("latin-1"), TOKEN)
+    return False
+
+
+class ProfilingMiddleware:
+    """サンプリングしたリクエストのスタックを記録する
+
+    PROFILE_SAMPLE_RATEが0でTOKENも未設定の場合は何もしない。
+    X-Profileヘッダによる計測では、保存するファイル名をX-Profile-Fileヘッダで返す。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = _requested(scope)
+        sampled = requested or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE)
+        # 同時に計測するのは1件まで
+        if not sampled or not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        slug = _SLUG.sub("_", scope["path"]).strip("_")[:80] or "root"
+        timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f")
+        path = PROFILE_DIR / f"{timestamp}-{method}-{slug}{EXTENSIONS[FORMAT]}"
+
+        async def send_wrapper(message: Message) -> None:
+            if requested and message["type"] == "http.response.start":
+                headers = [*message.get("headers", []), (FILE_HEADER, path.name.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = Sampler(threading.get_ident(), INTERVAL_MS / 1000)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # スレッドの終了はイベントループをブロックしないよう別スレッドで待つ
+            sampler.stop()
+            try:
+                if requested or sampler.elapsed * 1000 >= MIN_MS:
+                    name = f"{method} {scope['path']} ({sampler.elapsed * 1000:.1f} ms)"
+                    try:
+                        await asyncio.to_thread(write_profile, sampler, path, name)
+                    except OSError as e:
+                        logger.warning("Failed to write profile %s: %s", path, e)
+                    else:
+                        logger.info("Profiled %s: %d samples -> %s", name, sampler.samples, path)
+                else:
+                    await asyncio.to_thread(sampler.join)
+            finally:
+                _active.release()
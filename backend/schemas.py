@@ -119,3 +119,41 @@ class OwnershipItem(BaseModel):
 class IssuerOwnershipResponse(BaseModel):
     issuer: IssuerResponse
     ownerships: list[OwnershipItem]
+
+
+# === Suggest (入力候補) ===
+class SuggestItem(BaseModel):
+    kind: str  # "filer" または "issuer"
+    id: int
+    name: str
+    edinet_code: str
+    sec_code: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SuggestResponse(BaseModel):
+    items: list[SuggestItem]
+    version: int  # 索引を構築したデータバージョン
+
+
+# === Filing search (報告書の全文検索) ===
+class FilingSearchItem(BaseModel):
+    id: int
+    doc_id: str
+    submit_date: datetime | None = None
+    doc_description: str | None = None
+    purpose: str | None = None  # 保有目的
+    filer_id: int
+    filer_name: str
+    issuer_id: int | None = None
+    issuer_name: str | None = None
+    issuer_sec_code: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FilingSearchResponse(BaseModel):
+    items: list[FilingSearchItem]
+    limit: int
+    next_cursor: str | None = None
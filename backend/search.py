@@ -0,0 +1,202 @@
+"""
+提出者名・銘柄名・報告書の記載内容の部分一致検索
+
+名称・記載内容を正規化した検索用テキスト（search_text）を保存し、部分一致を
+インデックスで引く。対象は提出者名、銘柄名・コード、報告書の書類名（doc_description）、
+保有目的（purpose）。
+
+- 正規化: NFKC（全角英数・半角カナの統一）、大文字小文字の統一、
+  ひらがなをカタカナに統一、空白の除去
+- PostgreSQL: pg_trgmのGINインデックス（LIKE '%語%' をインデックスで検索）
+- SQLite: FTS5のtrigramトークナイザによる外部コンテンツテーブル（トリガーで同期）
+
+search_textはORMのinsert/update時に自動で設定される。Coreのbulk insertや
+既存データへの適用後は全件再構築を実行する。
+
+Usage:
+    python -m backend.search
+"""
+
+import asyncio
+import unicodedata
+from typing import Any
+
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    Select,
+    bindparam,
+    event,
+    select,
+    text,
+    union,
+    update,
+)
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from backend.models import Base, Filer, Filing, HoldingDetail, Issuer
+
+SearchableModel = type[Filer] | type[Issuer] | type[Filing] | type[HoldingDetail]
+
+# ひらがな（ぁ〜ゖ）をカタカナ（ァ〜ヶ）に寄せる
+_KANA_FOLD = {code: code + 0x60 for code in range(0x3041, 0x3097)}
+
+# 銘柄の検索対象（名称・証券コード・EDINETコード）の区切り。
+# 検索語の正規化で除去される文字なので、項目をまたいで一致しない
+_FIELD_SEPARATOR = "\x1f"
+
+# FTS5のtrigramトークナイザは3文字未満の語をインデックスで引けない
+_MIN_TRIGRAM_LENGTH = 3
+
+_REBUILD_BATCH_SIZE = 5000
+
+_FTS_TABLES = {
+    "filers": "filers_search",
+    "issuers": "issuers_search",
+    "filings": "filings_search",
+    "holding_details": "holding_details_search",
+}
+
+# search_textの元になる列（複数ある場合は区切り文字で連結する）
+_SOURCE_COLUMNS: dict[SearchableModel, tuple[InstrumentedAttribute, ...]] = {
+    Filer: (Filer.name,),
+    Issuer: (Issuer.name, Issuer.sec_code, Issuer.edinet_code),
+    Filing: (Filing.doc_description,),
+    HoldingDetail: (HoldingDetail.purpose,),
+}
+
+
+def normalize_text(value: str | None) -> str:
+    """検索用に文字列を正規化（表記ゆれを吸収し、空白を除去）"""
+    if not value:
+        return ""
+    folded = unicodedata.normalize("NFKC", value).casefold().translate(_KANA_FOLD)
+    return "".join(folded.split())
+
+
+def split_terms(query: str | None) -> list[str]:
+    """空白区切りの検索語を正規化して分割（空の語は除く）"""
+    if not query:
+        return []
+    return [term for term in map(normalize_text, query.split()) if term]
+
+
+def build_search_text(*values: str | None) -> str:
+    """検索用テキスト（各値を正規化し、検索語の正規化で除去される文字で連結）"""
+    return _FIELD_SEPARATOR.join(normalize_text(value) for value in values)
+
+
+def _set_search_text(mapper: Any, connection: Any, target: Any) -> None:
+    columns = _SOURCE_COLUMNS[type(target)]
+    target.search_text = build_search_text(*(getattr(target, c.key) for c in columns))
+
+
+for _model in _SOURCE_COLUMNS:
+    event.listen(_model, "before_insert", _set_search_text)
+    event.listen(_model, "before_update", _set_search_text)
+
+
+# PostgreSQL: GINインデックス（models.py）の前にpg_trgmを有効化
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def _fts_ddl(table: str) -> list[str]:
+    """SQLite: search_textを索引するFTS5テーブルと同期用トリガー"""
+    fts = _FTS_TABLES[table]
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"search_text, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_text) "
+        f"VALUES ('delete', old.id, old.search_text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF search_text ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, search_text) "
+        f"VALUES ('delete', old.id, old.search_text); "
+        f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    ]
+
+
+for _model in _SOURCE_COLUMNS:
+    _fts = _FTS_TABLES[_model.__tablename__]
+    for _statement in _fts_ddl(_model.__tablename__):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    event.listen(
+        _model.__table__,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_fts}").execute_if(dialect="sqlite"),
+    )
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_condition(model: SearchableModel, term: str, dialect: str) -> ColumnElement[bool]:
+    """
+    検索語に部分一致する行の条件
+
+    Args:
+        model: search_textを持つモデル（Filer, Issuer, Filing, HoldingDetail）
+        term: 検索語（正規化前）
+        dialect: 接続先の方言名（"postgresql", "sqlite"など）
+    """
+    normalized = normalize_text(term)
+    if dialect == "sqlite" and len(normalized) >= _MIN_TRIGRAM_LENGTH:
+        fts = _FTS_TABLES[model.__tablename__]
+        phrase = '"' + normalized.replace('"', '""') + '"'
+        # 複数の語の条件を組み合わせても値が衝突しないよう、語ごとに別名のパラメータにする
+        condition = text(f"{fts} MATCH :phrase").bindparams(
+            bindparam("phrase", phrase, unique=True)
+        )
+        return model.id.in_(select(text("rowid")).select_from(text(fts)).where(condition))
+    # PostgreSQLはpg_trgmのGINインデックス、その他の方言・短い語は走査
+    return model.search_text.like(_like_pattern(normalized), escape="\\")
+
+
+def matching_filing_ids(term: str, dialect: str) -> Select:
+    """書類名または保有目的のいずれかに検索語を含む報告書のID"""
+    by_description = select(Filing.id).where(search_condition(Filing, term, dialect))
+    by_purpose = select(HoldingDetail.filing_id).where(
+        search_condition(HoldingDetail, term, dialect)
+    )
+    return select(union(by_description, by_purpose).subquery().c[0])
+
+
+def rebuild_search_text(session: Session) -> None:
+    """
+    全テーブルのsearch_textとSQLiteの検索インデックスを再構築
+
+    値が変わった行だけを主キー指定のbulk UPDATEで書き換える。
+    """
+    for model, columns in _SOURCE_COLUMNS.items():
+        stmt = select(model.id, model.search_text, *columns).execution_options(yield_per=10000)
+        updates = []
+        for row in session.execute(stmt):
+            value = build_search_text(*row[2:])
+            if row.search_text != value:
+                updates.append({"id": row.id, "search_text": value})
+        for i in range(0, len(updates), _REBUILD_BATCH_SIZE):
+            session.execute(update(model), updates[i : i + _REBUILD_BATCH_SIZE])
+
+    if session.get_bind().dialect.name == "sqlite":
+        for fts in _FTS_TABLES.values():
+            session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+async def _rebuild() -> None:
+    from backend.database import get_db_session
+
+    async with get_db_session() as db:
+        await db.run_sync(rebuild_search_text)
+
+
+if __name__ == "__main__":
+    asyncio.run(_rebuild())
+    print("Rebuilt search index")
@@ -0,0 +1,84 @@
+"""
+一覧レスポンスの高速JSONシリアライズ（オプトイン）
+
+通常の経路では行ごとにPydanticモデルを生成し、FastAPIのjsonable_encoderと
+json.dumpsで出力する。FAST_JSON=1を設定しorjsonがインストールされている場合は、
+Pydanticモデルと同じフィールド順のdataclass（構造体）に行を詰め、orjsonでC実装の
+まま出力する。出力はPydantic経由と同じバイト列になる（指数表記になる極端な
+浮動小数点数を除く）。
+
+Usage:
+    return serialization.render({"items": serialization.rows(schemas.FilerResponse, rows)})
+"""
+
+import dataclasses
+import os
+from collections.abc import Sequence
+from functools import cache
+from operator import itemgetter
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjsonは任意依存
+    orjson = None  # type: ignore[assignment]
+
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1" and orjson is not None
+
+
+class FastJSONResponse(JSONResponse):
+    """orjsonで本文を生成するレスポンス（dataclass・datetimeをCで直接シリアライズ）"""
+
+    def render(self, content: Any) -> bytes:
+        assert orjson is not None, "orjson must be installed to use FastJSONResponse"
+        # PydanticはUTCのdatetimeを"Z"で出力するため合わせる
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+@cache
+def struct_for(model: type[BaseModel]) -> type:
+    """Pydanticモデルと同じフィールド・順序のslots付きdataclassを生成"""
+    fields = [(name, Any, dataclasses.field(default=None)) for name in model.model_fields]
+    return dataclasses.make_dataclass(f"{model.__name__}Struct", fields, slots=True, frozen=True)
+
+
+def rows(model: type[BaseModel], items: Sequence[Any]) -> list[Any]:
+    """
+    クエリ結果の行をレスポンスの要素に変換
+
+    FAST_JSONが有効なら構造体、無効ならPydanticモデル（model_validate）を返す。
+    行にない項目はNoneになる。
+
+    Args:
+        model: 要素のPydanticモデル（from_attributes=True）
+        items: モデルのフィールド名をラベルに持つRow
+    """
+    if not FAST_JSON:
+        return [model.model_validate(item) for item in items]
+    if not items:
+        return []
+
+    struct = struct_for(model)
+    available = items[0]._fields
+    # 行にないフィールドは末尾に追加したNoneを参照させる
+    missing = len(available)
+    getter = itemgetter(
+        *(available.index(name) if name in available else missing for name in model.model_fields)
+    )
+    return [struct(*getter((*item, None))) for item in items]
+
+
+def render(content: Any, status_code: int = 200) -> Any:
+    """
+    ハンドラの戻り値を生成
+
+    FAST_JSONが有効ならFastJSONResponseで直接返し、jsonable_encoderを経由しない。
+    無効ならそのまま返してFastAPIの通常のシリアライズに任せる。
+    """
+    if not FAST_JSON:
+        return content
+    response: Response = FastJSONResponse(content, status_code=status_code)
+    return response
@@ -0,0 +1,257 @@
+"""
+遅いSQLの記録と実行計画の取得
+
+実行時間がSLOW_QUERY_MSを超えたSQLを、正規化したSQL（リテラル・プレースホルダを?に、
+IN句の展開を(?, ...)にまとめる）、パラメータの型、実行時間、発行元のルートとともに
+ログ出力し、直近SLOW_QUERY_BUFFER件をリングバッファに保持する。
+
+SELECT文はあわせて実行計画を取得する（PostgreSQLはEXPLAIN (ANALYZE, BUFFERS)、
+SQLiteはEXPLAIN QUERY PLAN）。計画の取得はクエリを再実行するため、
+- 同じ正規化SQLにつきSLOW_QUERY_EXPLAIN_INTERVAL秒に1回、同時に1件までに制限する
+- リクエストの処理とは別のタスク・別の接続で、読み取り専用トランザクション内で実行する
+- 取得のためのクエリ自体は記録せず、リクエストのクエリ数にも含めない
+リングバッファは /api/admin/slow-queries（ADMIN_TOKENの設定時のみ有効）で参照できる。
+
+DEBUG=1（echo=True）のように全SQLを出力せずに、遅くなったエンドポイントの原因を調べるために使う。
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+EXPLAIN_ENABLED = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+
+MAX_STATEMENT_LENGTH = 4000
+MAX_PARAMETERS = 50
+
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|__\[POSTCOMPILE_\w+\]")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """リテラル・プレースホルダを?に置き換え、空白とIN句の展開をまとめたSQL"""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?, ...)", normalized)
+    return normalized[:MAX_STATEMENT_LENGTH]
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """パラメータの値を含めず、型（と件数）だけを表す"""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "first": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        items = list(parameters.items())
+        shape: Any = {key: _value_type(value) for key, value in items[:MAX_PARAMETERS]}
+    elif isinstance(parameters, list | tuple):
+        items = list(parameters)
+        shape = [_value_type(value) for value in items[:MAX_PARAMETERS]]
+    else:
+        return _value_type(parameters) if parameters is not None else None
+    if len(items) > MAX_PARAMETERS:
+        key = "..." if isinstance(shape, dict) else None
+        more = f"+{len(items) - MAX_PARAMETERS} more"
+        if key:
+            shape[key] = more
+        else:
+            shape.append(more)
+    return shape
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, list | tuple):
+        inner = sorted({type(item).__name__ for item in value})
+        return f"{type(value).__name__}[{'|'.join(inner)}]x{len(value)}"
+    return type(value).__name__
+
+
+@dataclass
+class SlowQuery:
+    """記録した遅いSQL"""
+
+    recorded_at: str
+    duration_ms: float
+    statement: str
+    fingerprint: str
+    parameters: Any
+    route: str | None
+    method: str | None
+    plan: str | None = None
+    plan_error: str | None = None
+
+
+@dataclass
+class _Recorder:
+    entries: deque[SlowQuery] = field(default_factory=lambda: deque(maxlen=BUFFER_SIZE))
+    last_explained: dict[str, float] = field(default_factory=dict)
+    explaining: bool = False
+    tasks: set[asyncio.Task[None]] = field(default_factory=set)
+
+
+_recorder = _Recorder()
+
+# 計画の取得中に実行したクエリを記録の対象から外す
+_in_explain: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "edinet_slow_query_explain", default=False
+)
+
+_STARTED_KEY = "_edinet_slow_query_started"
+
+_engines: list[AsyncEngine] = []
+
+
+def entries() -> list[SlowQuery]:
+    """記録済みの遅いSQL（新しい順）"""
+    return list(reversed(_recorder.entries))
+
+
+def clear() -> None:
+    """記録と計画の取得履歴を消す（テスト用）"""
+    _recorder.entries.clear()
+    _recorder.last_explained.clear()
+
+
+async def wait_for_explains() -> None:
+    """実行中の計画の取得の完了を待つ（テスト用）"""
+    while _recorder.tasks:
+        await asyncio.gather(*_recorder.tasks, return_exceptions=True)
+
+
+def _should_explain(statement: str, fingerprint: str, executemany: bool, dialect: str) -> bool:
+    if not EXPLAIN_ENABLED or executemany or dialect not in EXPLAIN_PREFIXES:
+        return False
+    if _recorder.explaining or statement.lstrip()[:6].upper() != "SELECT":
+        return False
+    now = time.monotonic()
+    last = _recorder.last_explained.get(fingerprint)
+    if last is not None and now - last < EXPLAIN_INTERVAL:
+        return False
+    if len(_recorder.last_explained) > 10_000:
+        _recorder.last_explained.clear()
+    _recorder.last_explained[fingerprint] = now
+    return True
+
+
+async def _explain(engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+    dialect = engine.dialect.name
+    _in_explain.set(True)
+    try:
+        async with engine.connect() as conn:
+            if dialect == "postgresql":
+                # ANALYZEはクエリを実際に実行するため、書き込みができない状態で実行する
+                await conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            result = await conn.exec_driver_sql(EXPLAIN_PREFIXES[dialect] + statement, parameters)
+            entry.plan = "\n".join(str(row[-1]) for row in result)
+            await conn.rollback()
+    except Exception as e:
+        entry.plan_error = f"{type(e).__name__}: {e}"
+    finally:
+        _recorder.explaining = False
+
+
+def install(engine: AsyncEngine) -> None:
+    """非同期エンジンのSQLを記録の対象にする"""
+    if engine in _engines:
+        return
+    _engines.append(engine)
+    sync_engine = engine.sync_engine
+    dialect = sync_engine.dialect.name
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            setattr(context, _STARTED_KEY, time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, _STARTED_KEY, None)
+        if started is None or _in_explain.get():
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < THRESHOLD_MS:
+            return
+        record(engine, dialect, statement, parameters, executemany, duration_ms)
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def record(
+    engine: AsyncEngine,
+    dialect: str,
+    statement: str,
+    parameters: Any,
+    executemany: bool,
+    duration_ms: float,
+) -> SlowQuery:
+    """遅いSQLを記録し、必要なら計画の取得を開始する"""
+    normalized = normalize_sql(statement)
+    fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    stats = metrics.current_request()
+    scope = stats.scope if stats else None
+    entry = SlowQuery(
+        recorded_at=datetime.now(UTC).isoformat(),
+        duration_ms=round(duration_ms, 3),
+        statement=normalized,
+        fingerprint=fingerprint,
+        parameters=parameter_shape(parameters, executemany),
+        route=metrics.route_template(scope) if scope else None,
+        method=scope["method"] if scope else None,
+    )
+    _recorder.entries.append(entry)
+    logger.warning(
+        "Slow query %.1f ms [%s %s] %s params=%s",
+        duration_ms,
+        entry.method or "-",
+        entry.route or "-",
+        normalized,
+        entry.parameters,
+    )
+
+    if _should_explain(statement, fingerprint, executemany, dialect):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return entry
+        _recorder.explaining = True
+        # リクエストのcontextvar（メトリクスの集計）を引き継がない
+        task = loop.create_task(
+            _explain(engine, entry, statement, parameters), context=contextvars.Context()
+        )
+        _recorder.tasks.add(task)
+        task.add_done_callback(_recorder.tasks.discard)
+    return entry
+
+
+def as_dicts() -> list[dict[str, Any]]:
+    """管理用エンドポイントのレスポンス用"""
+    return [asdict(entry) for entry in entries()]
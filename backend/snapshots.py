@@ -0,0 +1,344 @@
+"""
+よく参照されるページの事前生成スナップショット
+
+同期後に提出者一覧の先頭ページ、主要な提出者の詳細・保有銘柄一覧、
+それらの銘柄の保有者一覧をAPI経由でレンダリングし、データバージョンごとの
+gzip圧縮JSONとして保存する。APIはリクエストのパスとクエリが一致すれば
+DBに問い合わせずにスナップショットをそのまま返す。
+
+スナップショットはmanifestのバージョンが現在のglobalデータバージョンと一致する間だけ
+配信する。現在のバージョンはSNAPSHOT_CHECK_SECONDSごとにバックグラウンドで確認し
+（確認できない状態が続いた場合は配信を止める）、同じプロセス内のコミットでは即座に無効にする。
+
+Usage:
+    python -m backend.snapshots --pages 2 --filers 20
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from backend.versioning import (
+    CACHE_CONTROL,
+    GLOBAL_SCOPE,
+    ChangeSet,
+    etag_matches,
+    get_data_versions,
+    register_commit_hook,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path(
+    os.getenv(
+        "SNAPSHOT_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "snapshots"),
+    )
+)
+MANIFEST_NAME = "manifest.json"
+
+# 現在のデータバージョンの確認間隔（秒）。この3倍の間確認できなければ配信を止める
+CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "5"))
+
+# スナップショット生成時のリクエストはAPIキャッシュ・スナップショットを経由させない
+BYPASS_HEADERS = {"Cache-Control": "no-cache"}
+
+
+def snapshot_key(path: str, query: str) -> str:
+    """パスとクエリ文字列を正規化したキー（クエリはパラメータ名順）"""
+    items = sorted(parse_qsl(query, keep_blank_values=True))
+    return f"{path}?{urlencode(items)}" if items else path
+
+
+@dataclass
+class Snapshot:
+    """保存済みレスポンス（gzip圧縮済みのJSON本文とETag）"""
+
+    body: bytes
+    etag: str
+    version: int
+
+
+class SnapshotStore:
+    """データバージョンごとのスナップショットを管理する
+
+    manifest.jsonが生成時のデータバージョンとキー→ファイルの対応を持つ。
+    manifestは書き込み後にos.replaceで差し替えるため、読み込み側が
+    書きかけの状態を参照することはない。
+    """
+
+    def __init__(self, root: Path, max_age: float = CHECK_SECONDS * 3):
+        self.root = root
+        self.max_age = max_age
+        self._manifest_stamp: tuple[int, int] | None = None
+        self._version = 0
+        self._entries: dict[str, dict[str, str]] = {}
+        self._bodies: dict[str, Snapshot] = {}
+        self._current_version: int | None = None
+        self._checked_at = 0.0
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    def _reload(self) -> None:
+        """manifestが更新されていれば読み直す"""
+        try:
+            stat = self.manifest_path.stat()
+            stamp: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_ino)
+        except FileNotFoundError:
+            stamp = None
+
+        if stamp == self._manifest_stamp:
+            return
+
+        self._manifest_stamp = stamp
+        self._bodies = {}
+        if stamp is None:
+            self._version = 0
+            self._entries = {}
+            return
+
+        manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        self._version = manifest["version"]
+        self._entries = manifest["entries"]
+
+    def set_current_version(self, version: int) -> None:
+        """確認した現在のglobalデータバージョンを記録する"""
+        self._current_version = version
+        self._checked_at = time.monotonic()
+
+    def mark_stale(self) -> None:
+        """次に現在のバージョンを確認するまで配信を止める"""
+        self._current_version = None
+
+    def is_current(self) -> bool:
+        """manifestのバージョンが直近に確認した現在のバージョンと一致するか"""
+        if self._current_version is None or self._current_version != self._version:
+            return False
+        return time.monotonic() - self._checked_at <= self.max_age
+
+    def lookup(self, path: str, query: str) -> Snapshot | None:
+        """リクエストに一致するスナップショットを返す（なければ・古ければNone）"""
+        self._reload()
+        if not self.is_current():
+            return None
+        key = snapshot_key(path, query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        snapshot = self._bodies.get(key)
+        if snapshot is None:
+            try:
+                body = (self.root / f"v{self._version}" / entry["file"]).read_bytes()
+            except FileNotFoundError:
+                return None
+            snapshot = Snapshot(body=body, etag=entry["etag"], version=self._version)
+            self._bodies[key] = snapshot
+        return snapshot
+
+    def write(self, version: int, responses: Mapping[str, tuple[bytes, str]]) -> int:
+        """レンダリング結果を保存してmanifestを差し替え、古いバージョンを削除する
+
+        Args:
+            version: スナップショットのデータバージョン（global）
+            responses: キー → (JSON本文, ETag)
+
+        Returns:
+            int: 保存したスナップショット数
+        """
+        version_dir = self.root / f"v{version}"
+        version_dir.mkdir(parents=True, exist_ok=True)
+
+        entries = {}
+        for key, (body, etag) in responses.items():
+            filename = hashlib.sha1(key.encode()).hexdigest() + ".json.gz"
+            (version_dir / filename).write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+            entries[key] = {"file": filename, "etag": etag}
+
+        manifest = {
+            "version": version,
+            "created_at": datetime.now(UTC).isoformat(),
+            "entries": entries,
+        }
+        tmp_path = self.root / f"{MANIFEST_NAME}.tmp"
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+        for old_dir in self.root.glob("v*"):
+            if old_dir.is_dir() and old_dir != version_dir:
+                shutil.rmtree(old_dir, ignore_errors=True)
+
+        return len(entries)
+
+    def clear(self) -> None:
+        """manifestを削除して配信を止める（データ更新直後の古い配信を防ぐ）"""
+        self.manifest_path.unlink(missing_ok=True)
+
+
+store = SnapshotStore(SNAPSHOT_DIR)
+
+
+@register_commit_hook
+def _invalidate_on_commit(session: Session, changes: ChangeSet) -> None:
+    """同じプロセス内の書き込み（POST /api/filersなど）では即座に配信を止める"""
+    store.mark_stale()
+
+
+async def refresh_current_version(db: AsyncSession) -> int:
+    """現在のglobalデータバージョンを取得してストアに記録する"""
+    versions = await get_data_versions(db, [GLOBAL_SCOPE])
+    store.set_current_version(versions[GLOBAL_SCOPE])
+    return versions[GLOBAL_SCOPE]
+
+
+async def refresh_periodically(
+    session_factory: Callable[[], AsyncSession], interval: float = CHECK_SECONDS
+) -> None:
+    """interval秒ごとに現在のデータバージョンを確認する（他プロセスの書き込みの検知）"""
+    while True:
+        try:
+            async with session_factory() as db:
+                await refresh_current_version(db)
+        except Exception:
+            logger.exception("Failed to check data version for snapshots")
+        await asyncio.sleep(interval)
+
+
+def snapshot_response(snapshot: Snapshot, headers: Mapping[str, str]) -> Response:
+    """スナップショットからレスポンスを生成（gzip対応クライアントには圧縮のまま返す）"""
+    response_headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        "X-Snapshot-Version": str(snapshot.version),
+    }
+    if etag_matches(headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=response_headers)
+
+    if "gzip" in headers.get("accept-encoding", ""):
+        response_headers["Content-Encoding"] = "gzip"
+        body = snapshot.body
+    else:
+        body = gzip.decompress(snapshot.body)
+    return Response(content=body, media_type="application/json", headers=response_headers)
+
+
+async def render_snapshots(
+    client: httpx.AsyncClient,
+    pages: int = 2,
+    limit: int = 50,
+    watched_filers: int = 20,
+    extra_filer_ids: Iterable[int] = (),
+) -> dict[str, tuple[bytes, str]]:
+    """
+    APIをASGI経由で呼び出してスナップショット対象のレスポンスを取得
+
+    提出者一覧の先頭pagesページ、1ページ目の上位watched_filers件とextra_filer_idsの
+    提出者詳細・保有銘柄一覧（先頭ページ）、その銘柄の保有者一覧を対象とする。
+    """
+    responses: dict[str, tuple[bytes, str]] = {}
+
+    async def render(path: str, params: dict[str, int] | None = None) -> dict | None:
+        response = await client.get(path, params=params, headers=BYPASS_HEADERS)
+        if response.status_code != 200:
+            return None
+        query = urlencode(params) if params else ""
+        responses[snapshot_key(path, query)] = (response.content, response.headers["ETag"])
+        result: dict = response.json()
+        return result
+
+    filer_ids: list[int] = []
+    for page in range(pages):
+        data = await render("/api/filers", {"skip": page * limit, "limit": limit})
+        if data and page == 0:
+            filer_ids = [item["id"] for item in data["items"][:watched_filers]]
+
+    issuer_ids: set[int] = set()
+    for filer_id in dict.fromkeys([*filer_ids, *extra_filer_ids]):
+        await render(f"/api/filers/{filer_id}")
+        data = await render(f"/api/filers/{filer_id}/issuers", {"skip": 0, "limit": limit})
+        if data:
+            issuer_ids.update(item["id"] for item in data["items"])
+
+    for issuer_id in sorted(issuer_ids):
+        await render(f"/api/issuers/{issuer_id}/ownerships")
+
+    return responses
+
+
+async def rebuild_snapshots(
+    pages: int = 2,
+    watched_filers: int = 20,
+    extra_filer_codes: Iterable[str] = (),
+) -> int:
+    """現在のデータバージョンでスナップショットを再生成（同期後・デプロイ時に実行）"""
+    from backend import crud
+    from backend.database import get_db_session
+    from backend.main import app
+
+    async with get_db_session() as db:
+        versions = await get_data_versions(db, [GLOBAL_SCOPE])
+        extra_filer_ids = []
+        for code in extra_filer_codes:
+            filer = await crud.get_filer_by_edinet_code(db, code)
+            if filer:
+                extra_filer_ids.append(filer.id)
+
+    # スナップショット生成はレート制限の対象外
+    limiter_enabled = app.state.limiter.enabled
+    app.state.limiter.enabled = False
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://snapshot") as client:
+            responses = await render_snapshots(
+                client,
+                pages=pages,
+                watched_filers=watched_filers,
+                extra_filer_ids=extra_filer_ids,
+            )
+    finally:
+        app.state.limiter.enabled = limiter_enabled
+
+    return store.write(versions[GLOBAL_SCOPE], responses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APIレスポンスのスナップショット生成")
+    parser.add_argument("--pages", type=int, default=2, help="提出者一覧の生成ページ数")
+    parser.add_argument("--filers", type=int, default=20, help="詳細を生成する上位提出者数")
+    parser.add_argument(
+        "--filer-code",
+        action="append",
+        default=[],
+        help="追加で生成する提出者のEDINETコード（複数指定可）",
+    )
+    args = parser.parse_args()
+
+    count = asyncio.run(
+        rebuild_snapshots(
+            pages=args.pages, watched_filers=args.filers, extra_filer_codes=args.filer_code
+        )
+    )
+    print(f"Wrote {count} snapshots to {store.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+検索ボックスの入力候補（typeahead）
+
+提出者名・銘柄名・EDINETコード・証券コード（4桁/5桁）をプロセス内のn-gram索引に
+載せ、キー入力ごとの候補取得をDBに問い合わせずに返す。
+
+- 索引はbackend/search.pyと同じ正規化（NFKC・かな統一・空白除去）を行ったキーの
+  1文字・2文字のn-gramから、エントリ番号の配列への対応
+- 候補は前方一致を優先し、活動量（提出者は報告書数、銘柄は報告書の件数）の多い順
+- 起動時に読み込み、globalのデータバージョンが変わったら再構築する（定期確認）
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import CurrentPosition, Filer, FilerCode, FilerStats, Issuer
+from backend.search import normalize_text
+from backend.versioning import GLOBAL_SCOPE, get_data_versions
+
+logger = logging.getLogger(__name__)
+
+SuggestKind = Literal["filer", "issuer"]
+
+# データバージョンを確認する間隔（秒）
+REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH_SECONDS", "60"))
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    """入力候補の1件"""
+
+    kind: SuggestKind
+    id: int
+    name: str
+    edinet_code: str
+    sec_code: str | None
+    activity: int
+
+
+def _grams(key: str) -> set[str]:
+    """キーに含まれる1文字・2文字のn-gram"""
+    return set(key) | {key[i : i + 2] for i in range(len(key) - 1)}
+
+
+def _query_grams(query: str) -> list[str]:
+    """検索語の候補を絞り込むn-gram（1文字なら1-gram、それ以上は2-gram）"""
+    if len(query) == 1:
+        return [query]
+    return list(dict.fromkeys(query[i : i + 2] for i in range(len(query) - 1)))
+
+
+def _sec_code_keys(sec_code: str | None) -> list[str]:
+    """証券コードのキー（末尾0の5桁コードは4桁でも引けるようにする）"""
+    if not sec_code:
+        return []
+    keys = [sec_code]
+    if len(sec_code) == 5 and sec_code.endswith("0"):
+        keys.append(sec_code[:4])
+    return keys
+
+
+class SuggestIndex:
+    """入力候補のn-gram索引（構築後は読み取り専用）"""
+
+    def __init__(self, entries: Sequence[Suggestion], keys: Sequence[Sequence[str]], version: int):
+        """
+        Args:
+            entries: 候補
+            keys: 候補ごとの検索キー（正規化済み、entriesと同じ順序）
+            version: 構築時のglobalデータバージョン
+        """
+        self.entries = list(entries)
+        self.keys = [tuple(k for k in entry_keys if k) for entry_keys in keys]
+        self.version = version
+
+        postings: dict[str, set[int]] = {}
+        for position, entry_keys in enumerate(self.keys):
+            for key in entry_keys:
+                for gram in _grams(key):
+                    postings.setdefault(gram, set()).add(position)
+        self._postings = {gram: array("I", sorted(ids)) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(
+        self, query: str, limit: int = 10, kind: SuggestKind | None = None
+    ) -> list[Suggestion]:
+        """
+        検索語を含む候補を返す
+
+        前方一致するキーを持つ候補を先に、同順位は活動量の多い順・名前順に並べる。
+        """
+        normalized = normalize_text(query)
+        if not normalized:
+            return []
+
+        postings = []
+        for gram in _query_grams(normalized):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates: Iterable[int] = postings[0]
+        for posting in postings[1:]:
+            candidates = set(candidates).intersection(posting)
+
+        ranked = []
+        for position in candidates:
+            entry = self.entries[position]
+            if kind is not None and entry.kind != kind:
+                continue
+            entry_keys = self.keys[position]
+            if any(key.startswith(normalized) for key in entry_keys):
+                rank = 0
+            elif any(normalized in key for key in entry_keys):
+                rank = 1
+            else:
+                continue  # n-gramはすべて含むが連続していない
+            ranked.append((rank, -entry.activity, entry.name, position))
+
+        return [self.entries[item[-1]] for item in heapq.nsmallest(limit, ranked)]
+
+
+async def load_index(db: AsyncSession) -> SuggestIndex:
+    """DBから提出者・銘柄を読み込んで索引を構築"""
+    versions = await get_data_versions(db, [GLOBAL_SCOPE])
+
+    codes: dict[int, list[str]] = {}
+    code_rows = await db.execute(
+        select(FilerCode.filer_id, FilerCode.edinet_code).order_by(FilerCode.id)
+    )
+    for filer_id, edinet_code in code_rows:
+        codes.setdefault(filer_id, []).append(edinet_code)
+
+    entries: list[Suggestion] = []
+    keys: list[list[str]] = []
+
+    filer_rows = await db.execute(
+        select(
+            Filer.id,
+            Filer.name,
+            Filer.edinet_code,
+            Filer.sec_code,
+            func.coalesce(FilerStats.filing_count, 0),
+        ).outerjoin(FilerStats, FilerStats.filer_id == Filer.id)
+    )
+    for filer_id, name, edinet_code, sec_code, activity in filer_rows:
+        filer_codes = codes.get(filer_id) or [edinet_code]
+        entries.append(Suggestion("filer", filer_id, name, filer_codes[0], sec_code, activity))
+        keys.append(
+            [
+                normalize_text(name),
+                *(code.lower() for code in filer_codes),
+                *_sec_code_keys(sec_code),
+            ]
+        )
+
+    activity_by_issuer = (
+        select(
+            CurrentPosition.issuer_id,
+            func.sum(CurrentPosition.filing_count).label("activity"),
+        )
+        .group_by(CurrentPosition.issuer_id)
+        .subquery()
+    )
+    issuer_rows = await db.execute(
+        select(
+            Issuer.id,
+            func.coalesce(func.nullif(Issuer.name, ""), Issuer.edinet_code),
+            Issuer.edinet_code,
+            Issuer.sec_code,
+            func.coalesce(activity_by_issuer.c.activity, 0),
+        ).outerjoin(activity_by_issuer, activity_by_issuer.c.issuer_id == Issuer.id)
+    )
+    for issuer_id, name, edinet_code, sec_code, activity in issuer_rows:
+        entries.append(Suggestion("issuer", issuer_id, name, edinet_code, sec_code, activity))
+        keys.append([normalize_text(name), edinet_code.lower(), *_sec_code_keys(sec_code)])
+
+    return SuggestIndex(entries, keys, versions[GLOBAL_SCOPE])
+
+
+class SuggestHolder:
+    """現在の索引を保持し、データバージョンが変わったら差し替える"""
+
+    def __init__(self) -> None:
+        self.index: SuggestIndex | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession) -> SuggestIndex:
+        """現在の索引（未構築なら構築する）"""
+        if self.index is None:
+            async with self._lock:
+                if self.index is None:
+                    self.index = await load_index(db)
+        return self.index
+
+    async def refresh(self, db: AsyncSession) -> bool:
+        """
+        データバージョンが変わっていれば索引を再構築
+
+        Returns:
+            bool: 再構築した場合True
+        """
+        versions = await get_data_versions(db, [GLOBAL_SCOPE])
+        if self.index is not None and self.index.version == versions[GLOBAL_SCOPE]:
+            return False
+        async with self._lock:
+            self.index = await load_index(db)
+        return True
+
+    def clear(self) -> None:
+        self.index = None
+
+
+holder = SuggestHolder()
+
+
+async def refresh_periodically(
+    session_factory: Callable[[], AsyncSession], interval: float = REFRESH_SECONDS
+) -> None:
+    """起動時に索引を構築し、以降はinterval秒ごとにデータバージョンを確認する"""
+    while True:
+        try:
+            async with session_factory() as db:
+                if await holder.refresh(db):
+                    assert holder.index is not None
+                    logger.info(
+                        "Suggest index built: %d entries (version %d)",
+                        len(holder.index),
+                        holder.index.version,
+                    )
+        except Exception:
+            logger.exception("Failed to refresh suggest index")
+        await asyncio.sleep(interval)
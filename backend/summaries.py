@@ -0,0 +1,203 @@
+"""
+集計テーブルの保守
+
+filingsから導出される集計値をコミット時に変更分だけ再計算し、
+一覧・詳細APIが集計クエリを実行せずにインデックスで読めるようにする。
+
+- filer_stats: 提出者ごとの報告書数・銘柄数・最新提出日
+- current_positions: 提出者×発行体ごとの最新報告書・保有比率・前回比率
+- holding_details.previous_ratio / ratio_change: 同じ組の前回報告書からの増減
+
+再計算はversioningのコミットフックから呼ばれるため、sync_edinet.pyや
+scripts配下のORMによる書き込みで自動的に反映される。既存データへの適用や
+bulk DMLの後は全件再構築を実行する。
+
+Usage:
+    python -m backend.summaries
+"""
+
+import asyncio
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from itertools import groupby
+
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from backend.models import CurrentPosition, Filer, FilerStats, Filing, HoldingDetail
+from backend.versioning import ChangeSet, chunked, register_commit_hook
+
+
+def _filer_stats_select():
+    """提出者ごとの集計（報告書がない提出者も0件として含む）"""
+    return (
+        select(
+            Filer.id,
+            func.count(Filing.id),
+            func.count(func.distinct(Filing.issuer_id)),
+            func.max(Filing.submit_date),
+            func.now(),
+        )
+        .select_from(Filer)
+        .outerjoin(Filing, Filing.filer_id == Filer.id)
+        .group_by(Filer.id)
+    )
+
+
+_FILER_STATS_COLUMNS = [
+    "filer_id",
+    "filing_count",
+    "issuer_count",
+    "latest_filing_date",
+    "updated_at",
+]
+
+
+def refresh_filer_stats(session: Session, filer_ids: Iterable[int]) -> None:
+    """指定した提出者のfiler_statsを再集計"""
+    for chunk in chunked(filer_ids):
+        session.execute(delete(FilerStats).where(FilerStats.filer_id.in_(chunk)))
+        session.execute(
+            insert(FilerStats).from_select(
+                _FILER_STATS_COLUMNS, _filer_stats_select().where(Filer.id.in_(chunk))
+            )
+        )
+
+
+def rebuild_filer_stats(session: Session) -> None:
+    """filer_statsを全件再構築"""
+    session.execute(delete(FilerStats))
+    session.execute(insert(FilerStats).from_select(_FILER_STATS_COLUMNS, _filer_stats_select()))
+
+
+def _chain_order(row) -> tuple[bool, float, int]:
+    """同一の組の報告書を提出日順（提出日なしは先頭）、同日はID順に並べるキー"""
+    submit_date = row.submit_date
+    return (submit_date is not None, submit_date.timestamp() if submit_date else 0.0, row.id)
+
+
+def _ratio_change(ratio: float | None, previous_ratio: float | None) -> float | None:
+    """前回の保有比率からの増減（ポイント、小数2桁）"""
+    if ratio is None or previous_ratio is None:
+        return None
+    return round(ratio - previous_ratio, 2)
+
+
+def refresh_current_positions(session: Session, positions: Iterable[tuple[int, int]]) -> None:
+    """
+    指定した（提出者ID, 発行体ID）のcurrent_positionsを再計算
+
+    同じ組の報告書を提出日順にたどり、各保有詳細の前回比率・増減も更新する
+    （値が変わった行のみ）。
+    """
+    now = datetime.now(UTC)
+
+    for chunk in chunked(positions):
+        session.execute(
+            delete(CurrentPosition).where(
+                tuple_(CurrentPosition.filer_id, CurrentPosition.issuer_id).in_(chunk)
+            )
+        )
+
+        stmt = (
+            select(
+                Filing.filer_id,
+                Filing.issuer_id,
+                Filing.id,
+                Filing.submit_date,
+                HoldingDetail.id.label("holding_id"),
+                HoldingDetail.shares_held,
+                HoldingDetail.holding_ratio,
+                HoldingDetail.purpose,
+                HoldingDetail.previous_ratio,
+                HoldingDetail.ratio_change,
+            )
+            .outerjoin(HoldingDetail, HoldingDetail.filing_id == Filing.id)
+            .where(tuple_(Filing.filer_id, Filing.issuer_id).in_(chunk))
+            .order_by(Filing.filer_id, Filing.issuer_id, Filing.id, HoldingDetail.id)
+        )
+        rows = session.execute(stmt).all()
+
+        values = []
+        holding_updates = []
+        for (filer_id, issuer_id), group in groupby(rows, key=lambda r: (r.filer_id, r.issuer_id)):
+            by_filing: dict[int, list] = {}
+            for row in group:
+                by_filing.setdefault(row.id, []).append(row)
+            chain = sorted(by_filing.values(), key=lambda filing_rows: _chain_order(filing_rows[0]))
+
+            # 1つの報告書に保有詳細が複数ある場合は最後に登録されたものを代表とする
+            previous_ratio = None
+            latest_previous_ratio = None
+            for filing_rows in chain:
+                for row in filing_rows:
+                    if row.holding_id is None:
+                        continue
+                    change = _ratio_change(row.holding_ratio, previous_ratio)
+                    if (row.previous_ratio, row.ratio_change) != (previous_ratio, change):
+                        holding_updates.append(
+                            {
+                                "id": row.holding_id,
+                                "previous_ratio": previous_ratio,
+                                "ratio_change": change,
+                            }
+                        )
+                latest_previous_ratio = previous_ratio
+                if filing_rows[-1].holding_ratio is not None:
+                    previous_ratio = filing_rows[-1].holding_ratio
+
+            latest = chain[-1][-1]
+            values.append(
+                {
+                    "filer_id": filer_id,
+                    "issuer_id": issuer_id,
+                    "latest_filing_id": latest.id,
+                    "latest_submit_date": latest.submit_date,
+                    "latest_holding_id": latest.holding_id,
+                    "shares_held": latest.shares_held,
+                    "holding_ratio": latest.holding_ratio,
+                    "purpose": latest.purpose,
+                    "previous_ratio": latest_previous_ratio,
+                    "ratio_change": _ratio_change(latest.holding_ratio, latest_previous_ratio),
+                    "filing_count": len(chain),
+                    "updated_at": now,
+                }
+            )
+
+        if values:
+            session.execute(insert(CurrentPosition), values)
+        if holding_updates:
+            session.execute(update(HoldingDetail), holding_updates)
+
+
+def rebuild_current_positions(session: Session) -> None:
+    """current_positionsを全件再構築"""
+    session.execute(delete(CurrentPosition))
+    stmt = select(Filing.filer_id, Filing.issuer_id).where(Filing.issuer_id.isnot(None)).distinct()
+    positions = [(filer_id, issuer_id) for filer_id, issuer_id in session.execute(stmt)]
+    refresh_current_positions(session, positions)
+
+
+@register_commit_hook
+def refresh_summaries(session: Session, changes: ChangeSet) -> None:
+    """コミットされた変更に関係する集計値を更新"""
+    refresh_filer_stats(session, changes.filer_ids)
+    refresh_current_positions(session, changes.positions)
+
+
+def rebuild_summaries(session: Session) -> None:
+    """すべての集計テーブルを全件再構築"""
+    rebuild_filer_stats(session)
+    rebuild_current_positions(session)
+
+
+async def _rebuild() -> None:
+    from backend.database import get_db_session
+
+    async with get_db_session() as db:
+        await db.run_sync(rebuild_summaries)
+
+
+if __name__ == "__main__":
+    asyncio.run(_rebuild())
+    print("Rebuilt summary tables")
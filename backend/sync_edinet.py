@@ -8,12 +8,14 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import argparse
+import asyncio
 import contextlib
 import io
 import json
 import time
 import zipfile
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import TypedDict, cast
 
 import pandas as pd
@@ -22,19 +24,32 @@ from dotenv import load_dotenv
 from sqlalchemy import extract
 from tqdm import tqdm
 
+from backend.cache import invalidate_changes
 from backend.database import get_sync_db_session, sync_engine
 from backend.models import Base, Filer, FilerCode, Filing, HoldingDetail, Issuer
+from backend.snapshots import rebuild_snapshots, store
+from backend.sync_report import StageStats, SyncReport
+from backend.versioning import ChangeSet, pop_changes
 
 # .envの読み込み
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 
-# EDINET API設定
-EDINET_API_BASE = "https://disclosure.edinet-fsa.go.jp/api/v2"
+# EDINET API設定（ローカルのスタブサーバーで計測する場合は環境変数で差し替える）
+EDINET_API_BASE = os.getenv("EDINET_API_BASE", "https://disclosure.edinet-fsa.go.jp/api/v2")
 
+# API制限対策のリクエスト間隔（秒）
+LIST_REQUEST_INTERVAL = float(os.getenv("EDINET_LIST_INTERVAL", "1"))
+DOWNLOAD_INTERVAL = float(os.getenv("EDINET_DOWNLOAD_INTERVAL", "0.5"))
 
-def get_documents_by_date(target_date: datetime) -> dict | None:
-    """指定した日の書類一覧を取得"""
+# 書類一覧のキャッシュディレクトリ
+CACHE_DIR = os.getenv(
+    "EDINET_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache")
+)
+
+
+def get_documents_by_date(target_date: datetime, stats: StageStats | None = None) -> dict | None:
+    """指定した日の書類一覧を取得（statsがあれば呼び出し回数・受信バイト数・失敗を加算）"""
     url = f"{EDINET_API_BASE}/documents.json"
     params: dict[str, str | int | None] = {
         "date": target_date.strftime("%Y-%m-%d"),
@@ -43,15 +58,25 @@ def get_documents_by_date(target_date: datetime) -> dict | None:
     }
     try:
         response = requests.get(url, params=params, timeout=30)
+        if stats:
+            stats.count += 1
+            stats.bytes += len(response.content)
         if response.status_code == 200:
             result: dict = response.json()
             return result
     except Exception as e:
         print(f"Error fetching {target_date}: {e}")
+    if stats:
+        stats.errors += 1
     return None
 
 
-def sync_documents(filer_edinet_code: str | None = None, days: int = 365, use_cache: bool = True):
+def sync_documents(
+    filer_edinet_code: str | None = None,
+    days: int = 365,
+    use_cache: bool = True,
+    report: SyncReport | None = None,
+) -> ChangeSet:
     """
     EDINET APIから書類一覧を取得してDBに保存
 
@@ -59,11 +84,17 @@ def sync_documents(filer_edinet_code: str | None = None, days: int = 365, use_ca
         filer_edinet_code: 特定の提出者に絞る場合のEDINETコード（例: "E04948"）
         days: 過去何日分を同期するか
         use_cache: キャッシュを使用するか（キャッシュがあればAPIを叩かない）
+        report: 段階別の計測結果を加算する実行レポート
+
+    Returns:
+        ChangeSet: 追加・更新された提出者・発行体のID
     """
     if not API_KEY:
         print("Error: API_KEY not found in .env file.")
         print("Please set API_KEY in .env file.")
-        return
+        return ChangeSet()
+
+    report = report or SyncReport("documents")
 
     # データベース初期化
     Base.metadata.create_all(bind=sync_engine)
@@ -84,9 +115,7 @@ def sync_documents(filer_edinet_code: str | None = None, days: int = 365, use_ca
         date_list.append(current_date)
         current_date += timedelta(days=1)
 
-    # キャッシュディレクトリ
-    cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache")
-    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
 
     new_filings = 0
     new_filers = 0
@@ -96,120 +125,142 @@ def sync_documents(filer_edinet_code: str | None = None, days: int = 365, use_ca
     with get_sync_db_session() as db:
         for d in tqdm(date_list, desc="Fetching documents"):
             # キャッシュファイルチェック
-            cache_file = os.path.join(cache_dir, f"list_{d.strftime('%Y-%m-%d')}.json")
+            cache_file = os.path.join(CACHE_DIR, f"list_{d.strftime('%Y-%m-%d')}.json")
 
             if use_cache and os.path.exists(cache_file):
-                with open(cache_file, encoding="utf-8") as f:
+                with report.stage("cache_read") as stage, open(cache_file, encoding="utf-8") as f:
                     data = json.load(f)
+                    stage.count += 1
+                    stage.bytes += f.tell()
             else:
-                data = get_documents_by_date(d)
-                if data and use_cache:
-                    with open(cache_file, "w", encoding="utf-8") as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                time.sleep(1)  # API制限対策（1秒間隔）
+                with report.stage("fetch") as stage:
+                    data = get_documents_by_date(d, stage)
+                    if data and use_cache:
+                        with open(cache_file, "w", encoding="utf-8") as f:
+                            json.dump(data, f, ensure_ascii=False, indent=2)
+                with report.stage("throttle"):
+                    time.sleep(LIST_REQUEST_INTERVAL)
 
             if not data or "results" not in data:
                 continue
 
             for doc in data["results"]:
-                # 大量保有報告書系のみ対象（ordinanceCode: 060）
-                if doc.get("ordinanceCode") != "060":
-                    continue
-
-                # 提出者フィルタ
-                edinet_code = doc.get("edinetCode")
-                if filer_edinet_code and edinet_code != filer_edinet_code:
-                    continue
-
-                doc_id = doc.get("docID")
-                if not doc_id:
-                    continue
-
-                # 既存チェック（DB + セッション内重複）
-                if doc_id in processed_doc_ids:
-                    continue
-                existing = db.query(Filing).filter(Filing.doc_id == doc_id).first()
-                if existing:
+                with report.stage("filter") as stage:
+                    stage.count += 1
+                    # 大量保有報告書系のみ対象（ordinanceCode: 060）
+                    if doc.get("ordinanceCode") != "060":
+                        continue
+
+                    # 提出者フィルタ
+                    edinet_code = doc.get("edinetCode")
+                    if filer_edinet_code and edinet_code != filer_edinet_code:
+                        continue
+
+                    doc_id = doc.get("docID")
+                    if not doc_id:
+                        continue
+
+                    # 既存チェック（DB + セッション内重複）
+                    if doc_id in processed_doc_ids:
+                        continue
+                    existing = db.query(Filing).filter(Filing.doc_id == doc_id).first()
+                    if existing:
+                        processed_doc_ids.add(doc_id)
+                        continue
+
+                    # 処理開始時にセットに追加
                     processed_doc_ids.add(doc_id)
-                    continue
-
-                # 処理開始時にセットに追加
-                processed_doc_ids.add(doc_id)
-
-                # 1. 提出者（Filer）の登録/取得
-                # EDINETコードからFilerCodeを検索
-                filer_code = (
-                    db.query(FilerCode).filter(FilerCode.edinet_code == edinet_code).first()
-                )
 
-                if filer_code:
-                    filer = filer_code.filer
-                else:
-                    # 新規Filerを作成
-                    filer = Filer(
-                        edinet_code=edinet_code,  # DBスキーマ必須フィールド
-                        name=doc.get("filerName", ""),
-                        sec_code=str(doc.get("secCode", "")) if doc.get("secCode") else None,
-                        jcn=str(doc.get("JCN", "")) if doc.get("JCN") else None,
+                with report.stage("resolve") as stage:
+                    stage.count += 1
+                    # 1. 提出者（Filer）の登録/取得
+                    # EDINETコードからFilerCodeを検索
+                    filer_code = (
+                        db.query(FilerCode).filter(FilerCode.edinet_code == edinet_code).first()
                     )
-                    db.add(filer)
-                    db.flush()
 
-                    # FilerCodeを作成
-                    filer_code = FilerCode(
-                        filer_id=filer.id, edinet_code=edinet_code, name=doc.get("filerName", "")
-                    )
-                    db.add(filer_code)
-                    db.flush()
-                    new_filers += 1
-
-                # 2. 発行体（Issuer）の登録/取得
-                issuer = None
-                issuer_code = doc.get("issuerEdinetCode")
-                if issuer_code:
-                    issuer = db.query(Issuer).filter(Issuer.edinet_code == issuer_code).first()
-                    if not issuer:
-                        issuer = Issuer(
-                            edinet_code=issuer_code,
-                            name=None,  # 後でsync_issuer_namesで更新
-                            sec_code=None,
+                    if filer_code:
+                        filer = filer_code.filer
+                    else:
+                        # 新規Filerを作成
+                        filer = Filer(
+                            edinet_code=edinet_code,  # DBスキーマ必須フィールド
+                            name=doc.get("filerName", ""),
+                            sec_code=str(doc.get("secCode", "")) if doc.get("secCode") else None,
+                            jcn=str(doc.get("JCN", "")) if doc.get("JCN") else None,
                         )
-                        db.add(issuer)
+                        db.add(filer)
                         db.flush()
-                        new_issuers += 1
-
-                # 3. 報告書（Filing）の登録
-                submit_date = None
-                if doc.get("submitDateTime"):
-                    with contextlib.suppress(Exception):
-                        submit_date = datetime.strptime(doc["submitDateTime"], "%Y-%m-%d %H:%M")
-
-                filing = Filing(
-                    doc_id=doc_id,
-                    filer_id=filer.id,
-                    issuer_id=issuer.id if issuer else None,
-                    doc_type=doc.get("formCode"),
-                    doc_description=doc.get("docDescription"),
-                    submit_date=submit_date,
-                    parent_doc_id=doc.get("parentDocID") if doc.get("parentDocID") else None,
-                    csv_flag=doc.get("csvFlag") == "1",
-                    xbrl_flag=doc.get("xbrlFlag") == "1",
-                    pdf_flag=doc.get("pdfFlag") == "1",
-                )
-                db.add(filing)
-                new_filings += 1
 
-        db.commit()
+                        # FilerCodeを作成
+                        filer_code = FilerCode(
+                            filer_id=filer.id,
+                            edinet_code=edinet_code,
+                            name=doc.get("filerName", ""),
+                        )
+                        db.add(filer_code)
+                        db.flush()
+                        new_filers += 1
+
+                    # 2. 発行体（Issuer）の登録/取得
+                    issuer = None
+                    issuer_code = doc.get("issuerEdinetCode")
+                    if issuer_code:
+                        issuer = db.query(Issuer).filter(Issuer.edinet_code == issuer_code).first()
+                        if not issuer:
+                            issuer = Issuer(
+                                edinet_code=issuer_code,
+                                name=None,  # 後でsync_issuer_namesで更新
+                                sec_code=None,
+                            )
+                            db.add(issuer)
+                            db.flush()
+                            new_issuers += 1
+
+                with report.stage("insert") as stage:
+                    stage.count += 1
+                    # 3. 報告書（Filing）の登録
+                    submit_date = None
+                    if doc.get("submitDateTime"):
+                        with contextlib.suppress(Exception):
+                            submit_date = datetime.strptime(doc["submitDateTime"], "%Y-%m-%d %H:%M")
+
+                    filing = Filing(
+                        doc_id=doc_id,
+                        filer_id=filer.id,
+                        issuer_id=issuer.id if issuer else None,
+                        doc_type=doc.get("formCode"),
+                        doc_description=doc.get("docDescription"),
+                        submit_date=submit_date,
+                        parent_doc_id=doc.get("parentDocID") if doc.get("parentDocID") else None,
+                        csv_flag=doc.get("csvFlag") == "1",
+                        xbrl_flag=doc.get("xbrlFlag") == "1",
+                        pdf_flag=doc.get("pdfFlag") == "1",
+                    )
+                    db.add(filing)
+                    new_filings += 1
+
+        # 報告書のINSERTはコミット時にまとめて行われるため、flushまでを登録の時間に含める
+        with report.stage("insert"):
+            db.flush()
+        with report.stage("commit"):
+            db.commit()
+        changes = pop_changes(db)
 
+    report.counters.update(new_filers=new_filers, new_issuers=new_issuers, new_filings=new_filings)
     print("\n=== Sync Complete ===")
     print(f"New Filers: {new_filers}")
     print(f"New Issuers: {new_issuers}")
     print(f"New Filings: {new_filings}")
+    return changes
 
 
-def sync_issuer_names(csv_path: str | None = None):
+def sync_issuer_names(csv_path: str | None = None, report: SyncReport | None = None) -> ChangeSet:
     """
     EDINETコードリストから銘柄名を更新
+
+    Returns:
+        ChangeSet: 名称が更新された発行体と、それを保有する提出者のID
     """
     if csv_path is None:
         csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "EdinetcodeDlInfo.csv")
@@ -217,10 +268,15 @@ def sync_issuer_names(csv_path: str | None = None):
     if not os.path.exists(csv_path):
         print(f"Error: EDINETコードリストが見つかりません: {csv_path}")
         print("EDINETからダウンロードしてプロジェクトルートに配置してください。")
-        return
+        return ChangeSet()
+
+    report = report or SyncReport("names")
 
     # CSV読み込み（Shift-JIS / cp932）
-    df = pd.read_csv(csv_path, encoding="cp932", skiprows=1)
+    with report.stage("parse") as stage:
+        df = pd.read_csv(csv_path, encoding="cp932", skiprows=1)
+        stage.count += 1
+        stage.bytes += os.path.getsize(csv_path)
 
     # カラム名を正規化
     df.columns = df.columns.str.replace("　", "").str.replace("Ａ-Ｚ", "")
@@ -263,13 +319,18 @@ def sync_issuer_names(csv_path: str | None = None):
                         issuer.sec_code = info["sec_code"]
                     updated += 1
 
-        db.commit()
+        with report.stage("commit"):
+            db.commit()
+        report.counters["updated_issuers"] += updated
         print(f"Updated {updated} issuers with names")
+        return pop_changes(db)
 
 
-def download_document_csv(doc_id: str) -> bytes | None:
+def download_document_csv(doc_id: str, stats: StageStats | None = None) -> bytes | None:
     """
     EDINET APIから報告書のCSVデータをダウンロード
+
+    statsがあれば呼び出し回数・受信バイト数・失敗を加算する
     """
     url = f"{EDINET_API_BASE}/documents/{doc_id}"
     params: dict[str, str | int | None] = {
@@ -278,10 +339,15 @@ def download_document_csv(doc_id: str) -> bytes | None:
     }
     try:
         response = requests.get(url, params=params, timeout=60)
+        if stats:
+            stats.count += 1
+            stats.bytes += len(response.content)
         if response.status_code == 200:
             return cast(bytes, response.content)
     except Exception as e:
         print(f"Error downloading CSV for {doc_id}: {e}")
+    if stats:
+        stats.errors += 1
     return None
 
 
@@ -397,8 +463,11 @@ def extract_holding_data_from_csv(csv_content: bytes) -> HoldingDataResult:
 
 
 def sync_holding_details(
-    filer_edinet_code: str | None = None, limit: int | None = None, year: int | None = None
-):
+    filer_edinet_code: str | None = None,
+    limit: int | None = None,
+    year: int | None = None,
+    report: SyncReport | None = None,
+) -> ChangeSet:
     """
     報告書からCSVをダウンロードして保有詳細を取得・保存
 
@@ -406,36 +475,44 @@ def sync_holding_details(
         filer_edinet_code: 特定の提出者に絞る場合のEDINETコード
         limit: 処理する報告書の最大数（テスト用）
         year: 特定の年に絞る場合の年（例: 2025）
+        report: 段階別の計測結果を加算する実行レポート
+
+    Returns:
+        ChangeSet: 保有詳細が追加された提出者・発行体のID
     """
     if not API_KEY:
         print("Error: API_KEY not found in .env file.")
-        return
+        return ChangeSet()
 
-    with get_sync_db_session() as db:
-        # CSVフラグがあり、まだHoldingDetailがないFilingを取得
-        query = (
-            db.query(Filing)
-            .filter(Filing.csv_flag == True)
-            .outerjoin(HoldingDetail)
-            .filter(HoldingDetail.id == None)
-        )
+    report = report or SyncReport("holdings")
 
-        if filer_edinet_code:
-            filer_code = (
-                db.query(FilerCode).filter(FilerCode.edinet_code == filer_edinet_code).first()
+    with get_sync_db_session() as db:
+        with report.stage("filter") as stage:
+            # CSVフラグがあり、まだHoldingDetailがないFilingを取得
+            query = (
+                db.query(Filing)
+                .filter(Filing.csv_flag == True)
+                .outerjoin(HoldingDetail)
+                .filter(HoldingDetail.id == None)
             )
-            if filer_code:
-                query = query.filter(Filing.filer_id == filer_code.filer_id)
 
-        # 年フィルタ
-        if year:
-            query = query.filter(extract("year", Filing.submit_date) == year)
-            print(f"Filtering by year: {year}")
+            if filer_edinet_code:
+                filer_code = (
+                    db.query(FilerCode).filter(FilerCode.edinet_code == filer_edinet_code).first()
+                )
+                if filer_code:
+                    query = query.filter(Filing.filer_id == filer_code.filer_id)
+
+            # 年フィルタ
+            if year:
+                query = query.filter(extract("year", Filing.submit_date) == year)
+                print(f"Filtering by year: {year}")
 
-        filings = query.order_by(Filing.submit_date.desc()).all()
+            filings = query.order_by(Filing.submit_date.desc()).all()
 
-        if limit:
-            filings = filings[:limit]
+            if limit:
+                filings = filings[:limit]
+            stage.count += len(filings)
 
         print(f"Processing {len(filings)} filings for holding details...")
 
@@ -443,35 +520,80 @@ def sync_holding_details(
         error_count = 0
 
         for filing in tqdm(filings, desc="Downloading CSVs"):
-            csv_content = download_document_csv(filing.doc_id)
+            with report.stage("download") as stage:
+                csv_content = download_document_csv(filing.doc_id, stage)
 
             if not csv_content:
                 error_count += 1
                 continue
 
-            data = extract_holding_data_from_csv(csv_content)
-
-            # HoldingDetailを作成（データが取れなくても記録を残す）
-            holding = HoldingDetail(
-                filing_id=filing.id,
-                shares_held=data["shares_held"],
-                holding_ratio=data["holding_ratio"],
-                purpose=data["purpose"],
-            )
-            db.add(holding)
+            with report.stage("parse") as stage:
+                data = extract_holding_data_from_csv(csv_content)
+                stage.count += 1
+                stage.bytes += len(csv_content)
+                if not (data["holding_ratio"] or data["shares_held"]):
+                    stage.errors += 1
+
+            with report.stage("insert") as stage:
+                # HoldingDetailを作成（データが取れなくても記録を残す）
+                holding = HoldingDetail(
+                    filing_id=filing.id,
+                    shares_held=data["shares_held"],
+                    holding_ratio=data["holding_ratio"],
+                    purpose=data["purpose"],
+                )
+                db.add(holding)
+                stage.count += 1
 
             if data["holding_ratio"] or data["shares_held"]:
                 success_count += 1
             else:
                 error_count += 1
 
-            time.sleep(0.5)  # API制限対策（0.5秒間隔）
+            with report.stage("throttle"):
+                time.sleep(DOWNLOAD_INTERVAL)
 
-        db.commit()
+        # 保有詳細のINSERTはコミット時にまとめて行われるため、flushまでを登録の時間に含める
+        with report.stage("insert"):
+            db.flush()
+        with report.stage("commit"):
+            db.commit()
+        report.counters.update(holdings_extracted=success_count, holdings_failed=error_count)
 
         print("\n=== Holding Details Sync Complete ===")
         print(f"Successfully extracted: {success_count}")
         print(f"Failed/Empty: {error_count}")
+        return pop_changes(db)
+
+
+def after_sync(changes: ChangeSet) -> None:
+    """
+    同期後の処理
+
+    1. 古くなったスナップショットの配信を停止
+    2. 変更された提出者・発行体に関係するAPIキャッシュのみ無効化
+       （変更のない提出者・発行体のキャッシュは保持される）
+    3. 現在のデータバージョンでスナップショットを再生成
+    """
+    if not changes:
+        return
+
+    store.clear()
+
+    try:
+        deleted = asyncio.run(invalidate_changes(changes.filer_ids, changes.issuer_ids))
+        print(
+            f"Invalidated {deleted} cache entries "
+            f"({len(changes.filer_ids)} filers, {len(changes.issuer_ids)} issuers changed)"
+        )
+    except Exception as e:
+        print(f"Warning: failed to invalidate API cache: {e}")
+
+    try:
+        count = asyncio.run(rebuild_snapshots())
+        print(f"Wrote {count} snapshots")
+    except Exception as e:
+        print(f"Warning: failed to build snapshots: {e}")
 
 
 def main():
@@ -489,17 +611,49 @@ def main():
         "--limit", type=int, default=None, help="処理する報告書の最大数（テスト用）"
     )
     parser.add_argument("--year", type=int, default=None, help="特定の年に絞る（例: 2025）")
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="実行レポート（JSON）の出力先（デフォルト: SYNC_REPORT_DIR配下に実行ごとに作成）",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        type=Path,
+        default=os.getenv("SYNC_PROMETHEUS_TEXTFILE"),
+        help="node_exporterのtextfile collector用のメトリクスの出力先",
+    )
 
     args = parser.parse_args()
 
     if args.update_names:
-        sync_issuer_names()
+        report = SyncReport("names")
+        changes = sync_issuer_names(report=report)
     elif args.sync_holdings:
-        sync_holding_details(filer_edinet_code=args.filer, limit=args.limit, year=args.year)
+        report = SyncReport("holdings")
+        changes = sync_holding_details(
+            filer_edinet_code=args.filer, limit=args.limit, year=args.year, report=report
+        )
     else:
-        sync_documents(filer_edinet_code=args.filer, days=args.days, use_cache=not args.no_cache)
+        report = SyncReport("documents")
+        changes = sync_documents(
+            filer_edinet_code=args.filer,
+            days=args.days,
+            use_cache=not args.no_cache,
+            report=report,
+        )
         # 銘柄名も更新
-        sync_issuer_names()
+        changes.update(sync_issuer_names(report=report))
+
+    with report.stage("after_sync"):
+        after_sync(changes)
+
+    report.finish()
+    print("\n=== Stage Timings ===")
+    print(report.summary())
+    print(f"Report: {report.write_json(args.report)}")
+    if args.prometheus_textfile:
+        report.write_prometheus(args.prometheus_textfile)
 
 
 if __name__ == "__main__":
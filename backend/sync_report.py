@@ -0,0 +1,192 @@
+"""
+同期処理の段階別計測と実行レポート
+
+sync_edinet.pyの各段階の所要時間・処理件数・バイト数・エラー件数を集計し、
+実行ごとにJSONレポート（と任意でPrometheusのtextfile collector形式）を書き出す。
+夜間の同期が遅くなった原因がAPIの応答・一覧の読み込み・DBの検索・コミットの
+どれにあるかを切り分け、取り込みのスループットを継続的に追跡するために使う。
+
+段階:
+- fetch: 書類一覧APIの呼び出し（一覧キャッシュへの書き込みを含む）
+- cache_read: 一覧キャッシュ（JSON）の読み込み
+- filter: 対象書類の絞り込み（既存の報告書の重複チェックを含む）
+- resolve: 提出者・発行体の検索と新規登録
+- insert: 報告書・保有詳細の登録（INSERTのflushまで）
+- download: 報告書CSV（ZIP）のダウンロード
+- parse: CSV（ZIP）・EDINETコードリストの解析
+- commit: コミット（データバージョン・集計テーブルの更新を含む）
+- throttle: API制限対策の待ち時間
+- after_sync: APIキャッシュの無効化とスナップショットの再生成
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+STAGES = (
+    "fetch",
+    "cache_read",
+    "filter",
+    "resolve",
+    "insert",
+    "download",
+    "parse",
+    "commit",
+    "throttle",
+    "after_sync",
+)
+
+REPORT_DIR = Path(
+    os.getenv(
+        "SYNC_REPORT_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sync_reports"),
+    )
+)
+
+METRIC_PREFIX = "edinet_sync"
+
+
+@dataclass
+class StageStats:
+    """1段階の集計"""
+
+    seconds: float = 0.0
+    count: int = 0
+    bytes: int = 0
+    errors: int = 0
+
+
+@dataclass
+class SyncReport:
+    """1回の同期の実行レポート"""
+
+    command: str
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    finished_at: datetime | None = None
+    stages: dict[str, StageStats] = field(
+        default_factory=lambda: {name: StageStats() for name in STAGES}
+    )
+    # 新規登録件数などの結果（new_filings、holdings_extractedなど）
+    counters: Counter[str] = field(default_factory=Counter)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _elapsed: float | None = field(default=None, repr=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """ブロックの所要時間を段階に加算する（件数・バイト数は呼び出し側で加算）"""
+        stats = self.stages[name]
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - started
+
+    def finish(self) -> None:
+        if self._elapsed is None:
+            self._elapsed = time.perf_counter() - self._started
+            self.finished_at = datetime.now(UTC)
+
+    @property
+    def duration(self) -> float:
+        if self._elapsed is not None:
+            return self._elapsed
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> dict[str, Any]:
+        staged = sum(stats.seconds for stats in self.stages.values())
+        return {
+            "command": self.command,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": round(self.duration, 6),
+            # どの段階にも含まれない時間（進捗表示・ループの処理など）
+            "unstaged_seconds": round(max(self.duration - staged, 0.0), 6),
+            "stages": {
+                name: {**asdict(stats), "seconds": round(stats.seconds, 6)}
+                for name, stats in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def default_path(self) -> Path:
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%SZ")
+        return REPORT_DIR / f"sync_{self.command}_{stamp}.json"
+
+    def write_json(self, path: Path | None = None) -> Path:
+        """JSONレポートを書き出す（省略時はSYNC_REPORT_DIR配下）"""
+        path = path or self.default_path()
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False) + "\n")
+        return path
+
+    def prometheus_text(self) -> str:
+        """Prometheusのテキスト形式（node_exporterのtextfile collector用）"""
+        label = f'command="{self.command}"'
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            lines.extend(f"{METRIC_PREFIX}_{name}{{{labels}}} {value}" for labels, value in samples)
+
+        def per_stage(attribute: str) -> list[tuple[str, float]]:
+            return [
+                (f'{label},stage="{name}"', getattr(stats, attribute))
+                for name, stats in self.stages.items()
+            ]
+
+        metric(
+            "stage_seconds",
+            "gauge",
+            "Seconds spent in each stage of the last run.",
+            per_stage("seconds"),
+        )
+        metric("stage_items", "gauge", "Items processed by each stage.", per_stage("count"))
+        metric(
+            "stage_bytes", "gauge", "Bytes read or downloaded by each stage.", per_stage("bytes")
+        )
+        metric("stage_errors", "gauge", "Failed items in each stage.", per_stage("errors"))
+        metric(
+            "records",
+            "gauge",
+            "Records created or updated by the last run.",
+            [(f'{label},kind="{kind}"', value) for kind, value in sorted(self.counters.items())],
+        )
+        metric("duration_seconds", "gauge", "Duration of the last run.", [(label, self.duration)])
+        metric(
+            "last_run_timestamp_seconds",
+            "gauge",
+            "Unix time the last run finished.",
+            [(label, (self.finished_at or datetime.now(UTC)).timestamp())],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> Path:
+        """textfile collectorが書きかけを読まないよう、別名で書いてから差し替える"""
+        _write_atomic(path, self.prometheus_text())
+        return path
+
+    def summary(self) -> str:
+        """標準出力用の段階別の集計表"""
+        lines = [f"{'stage':12s} {'seconds':>9s} {'items':>8s} {'KiB':>10s} {'errors':>7s}"]
+        for name, stats in self.stages.items():
+            if stats.seconds or stats.count:
+                lines.append(
+                    f"{name:12s} {stats.seconds:9.3f} {stats.count:8d} "
+                    f"{stats.bytes / 1024:10.1f} {stats.errors:7d}"
+                )
+        lines.append(f"{'total':12s} {self.duration:9.3f}")
+        return "\n".join(lines)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.tmp")
+    temp.write_text(text, encoding="utf-8")
+    os.replace(temp, path)
@@ -18,6 +18,7 @@ from sqlalchemy.pool import NullPool
 # プロジェクトルートをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from backend import suggest, totals
 from backend.cache import init_cache
 from backend.database import get_db
 from backend.main import app
@@ -62,6 +63,10 @@ async def db() -> AsyncGenerator[AsyncSession, None]:
     async with test_async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    # データバージョンはテストごとに1から振り直されるため、総数のメモ・入力候補の索引も破棄
+    totals.memo.clear()
+    suggest.holder.clear()
+
     # セッション作成
     async with TestingSessionLocal() as session:
         try:
@@ -1,6 +1,10 @@
+from datetime import datetime
 from typing import Any
 
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Filing, HoldingDetail
 
 
 async def test_read_root(client: AsyncClient) -> None:
@@ -42,7 +46,65 @@ async def test_get_issuer_history(client: AsyncClient, sample_data: dict[str, An
     assert history_entry["holding_ratio"] == 5.50
 
 
+async def test_issuer_history_ratio_change(
+    client: AsyncClient, db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """増減が提出日順の直前の判明比率から計算され、比率不明の報告書は飛ばされるか"""
+    filer_id = sample_data["filer"].id
+    issuer_id = sample_data["issuer"].id
+
+    # IDの順と提出日の順をずらして登録する
+    for doc_id, month, ratio in [("S_B", 3, 7.0), ("S_A", 1, 6.0), ("S_C", 2, None)]:
+        filing = Filing(
+            doc_id=doc_id,
+            filer_id=filer_id,
+            issuer_id=issuer_id,
+            submit_date=datetime(2020, month, 1),
+        )
+        db.add(filing)
+        await db.flush()
+        db.add(HoldingDetail(filing_id=filing.id, holding_ratio=ratio))
+    await db.commit()
+
+    response = await client.get(f"/api/filers/{filer_id}/issuers/{issuer_id}/history")
+    assert response.status_code == 200
+    history = [(h["doc_id"], h["ratio_change"]) for h in response.json()["history"]]
+    # sample_dataの報告書（5.50%、現在日時）が最新
+    assert history == [("S_TEST_01", -1.5), ("S_B", 1.0), ("S_C", None), ("S_A", None)]
+
+
+async def test_issuer_history_not_found(client: AsyncClient, sample_data: dict[str, Any]) -> None:
+    """提出者・発行体が存在しない場合にそれぞれ404を返すか"""
+    filer_id = sample_data["filer"].id
+    issuer_id = sample_data["issuer"].id
+
+    response = await client.get(f"/api/filers/9999/issuers/{issuer_id}/history")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Filer not found"
+
+    response = await client.get(f"/api/filers/{filer_id}/issuers/9999/history")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Issuer not found"
+
+
 async def test_get_non_existent_filer(client: AsyncClient) -> None:
     """存在しない提出者の場合に404を返すか"""
     response = await client.get("/api/filers/9999")
     assert response.status_code == 404
+
+
+async def test_issuers_by_filer_total_beyond_last_page(
+    client: AsyncClient, sample_data: dict[str, Any]
+) -> None:
+    """最終ページより後ろを指定しても総数が返り、存在しない提出者は404になるか"""
+    filer_id = sample_data["filer"].id
+
+    response = await client.get(f"/api/filers/{filer_id}/issuers", params={"skip": 10})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    assert response.json()["total"] == 1
+
+    response = await client.get("/api/filers/9999/issuers")
+    assert response.status_code == 404
+    response = await client.get("/api/filers/9999/filings")
+    assert response.status_code == 404
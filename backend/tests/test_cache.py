@@ -0,0 +1,32 @@
+"""
+キャッシュキーの構成と対象を絞った無効化判定のテスト
+"""
+
+from backend.cache import cache_scope, is_key_affected
+
+
+def test_cache_scope_from_path_params() -> None:
+    """パスパラメータからキーのスコープ部分が決まるか"""
+    assert cache_scope({}) == "list"
+    assert cache_scope({"filer_id": "3"}) == "filer:3"
+    assert cache_scope({"issuer_id": "7"}) == "issuer:7"
+    assert cache_scope({"filer_id": "3", "issuer_id": "7"}) == "filer:3:issuer:7"
+
+
+def test_is_key_affected() -> None:
+    """変更された提出者・発行体のキーと一覧キーだけが対象になるか"""
+    filer_ids = {"3"}
+    issuer_ids = {"7"}
+
+    assert is_key_affected("edinet:list:abc", filer_ids, issuer_ids)
+    assert is_key_affected("edinet:filer:3:abc", filer_ids, issuer_ids)
+    assert is_key_affected("edinet:issuer:7:abc", filer_ids, issuer_ids)
+    assert is_key_affected("edinet:filer:4:issuer:7:abc", filer_ids, issuer_ids)
+
+    # 変更のない提出者・発行体のキャッシュは残す
+    assert not is_key_affected("edinet:filer:4:abc", filer_ids, issuer_ids)
+    assert not is_key_affected("edinet:issuer:8:abc", filer_ids, issuer_ids)
+    assert not is_key_affected("edinet:filer:4:issuer:8:abc", filer_ids, issuer_ids)
+
+    # 旧形式のキーは削除対象
+    assert is_key_affected("edinet::abc", filer_ids, issuer_ids)
@@ -0,0 +1,124 @@
+"""
+報告書の全文検索（書類名・保有目的）のテスト
+"""
+
+from datetime import datetime
+
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Filer, Filing, HoldingDetail, Issuer
+from backend.search import matching_filing_ids
+
+
+async def create_filings(db: AsyncSession) -> dict[str, int]:
+    """提出者2社・5件の報告書（保有目的つき）を作成"""
+    activist = Filer(edinet_code="E00010", name="アクティビスト・ファンド")
+    investor = Filer(edinet_code="E00020", name="純投資アセット")
+    issuer = Issuer(edinet_code="E30000", name="対象工業", sec_code="12340")
+    db.add_all([activist, investor, issuer])
+    await db.flush()
+
+    specs = [
+        ("S1", activist, datetime(2024, 1, 10, 9, 0), "大量保有報告書", "純投資"),
+        ("S2", activist, datetime(2024, 3, 5, 15, 0), "変更報告書", "重要提案行為等を行うこと"),
+        ("S3", investor, datetime(2024, 3, 5, 15, 0), "変更報告書", "純投資"),
+        ("S4", investor, datetime(2024, 6, 1, 9, 30), "変更報告書（特例対象株券等）", None),
+        ("S5", investor, None, "訂正報告書", "政策投資及び純投資"),
+    ]
+    ids = {}
+    for doc_id, filer, submit_date, description, purpose in specs:
+        filing = Filing(
+            doc_id=doc_id,
+            filer_id=filer.id,
+            issuer_id=issuer.id,
+            submit_date=submit_date,
+            doc_description=description,
+        )
+        db.add(filing)
+        await db.flush()
+        if purpose:
+            db.add(HoldingDetail(filing_id=filing.id, purpose=purpose))
+        ids[doc_id] = filing.id
+    await db.commit()
+    return {"activist": activist.id, "investor": investor.id, **ids}
+
+
+async def search(client: AsyncClient, **params) -> list[str]:
+    response = await client.get("/api/search/filings", params=params)
+    assert response.status_code == 200
+    return [item["doc_id"] for item in response.json()["items"]]
+
+
+async def test_search_description_and_purpose(client: AsyncClient, db: AsyncSession) -> None:
+    """書類名・保有目的のどちらでも一致し、提出日の新しい順（提出日なしは末尾）に並ぶか"""
+    await create_filings(db)
+
+    assert await search(client, q="重要提案行為") == ["S2"]
+    assert await search(client, q="純投資") == ["S3", "S1", "S5"]
+    assert await search(client, q="特例対象") == ["S4"]
+    assert await search(client, q="訂正 政策投資") == ["S5"]
+    assert await search(client, q="訂正 重要提案") == []
+    assert await search(client, q="変更報告書") == ["S4", "S3", "S2"]
+
+    response = await client.get("/api/search/filings", params={"q": "重要提案行為"})
+    item = response.json()["items"][0]
+    assert item["purpose"] == "重要提案行為等を行うこと"
+    assert item["filer_name"] == "アクティビスト・ファンド"
+    assert item["issuer_name"] == "対象工業"
+
+
+async def test_search_multiple_long_terms(client: AsyncClient, db: AsyncSession) -> None:
+    """3文字以上の語を複数指定すると、すべての語を含む報告書だけに一致するか"""
+    await create_filings(db)
+
+    assert await search(client, q="純投資 報告書") == ["S3", "S1", "S5"]
+    assert await search(client, q="純投資 変更報告書") == ["S3"]
+    assert await search(client, q="重要提案 特例対象") == []
+
+
+async def test_search_filters(client: AsyncClient, db: AsyncSession) -> None:
+    """提出者・提出日の範囲で絞り込めるか（上限日を含む）"""
+    ids = await create_filings(db)
+
+    assert await search(client, q="純投資", filer_id=ids["investor"]) == ["S3", "S5"]
+    assert await search(client, q="報告書", date_from="2024-03-05", date_to="2024-03-05") == [
+        "S3",
+        "S2",
+    ]
+    assert await search(client, q="報告書", date_from="2024-03-06") == ["S4"]
+    assert await search(client, q="報告書", date_to="2024-01-10") == ["S1"]
+
+
+async def test_search_keyset_pagination(client: AsyncClient, db: AsyncSession) -> None:
+    """next_cursorで全件を重複なく順にたどれるか（同じ提出日・提出日なしを含む）"""
+    await create_filings(db)
+
+    doc_ids = []
+    params: dict[str, str | int] = {"q": "報告書", "limit": 2}
+    while True:
+        response = await client.get("/api/search/filings", params=params)
+        data = response.json()
+        doc_ids += [item["doc_id"] for item in data["items"]]
+        if not data["next_cursor"]:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert doc_ids == ["S4", "S3", "S2", "S1", "S5"]
+
+    response = await client.get("/api/search/filings", params={"q": "報告書", "cursor": "x"})
+    assert response.status_code == 400
+
+
+async def test_search_uses_fts_index(db: AsyncSession) -> None:
+    """SQLiteでは書類名・保有目的の両方をFTS5のインデックスで引くか"""
+    if db.get_bind().dialect.name != "sqlite":
+        return
+
+    stmt = select(Filing.id).where(Filing.id.in_(matching_filing_ids("重要提案行為", "sqlite")))
+    compiled = stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+    details = [row[-1] for row in plan]
+    assert sum("VIRTUAL TABLE INDEX" in detail for detail in details) == 2
+    assert not any(detail.split()[:2] == ["SCAN", "filings"] for detail in details)
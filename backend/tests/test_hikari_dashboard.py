@@ -35,11 +35,11 @@ async def test_get_issuers_by_filer_includes_purpose(db: AsyncSession) -> None:
 
     # Call the function under test
     result = await crud.get_issuers_by_filer(db, filer.id)
+    assert result is not None
 
     # Verify result
     assert result["total"] == 1
     item = result["items"][0]
 
     # This assertion is expected to fail initially as 'latest_purpose' is not yet implemented
-    assert "latest_purpose" in item
-    assert item["latest_purpose"] == expected_purpose
+    assert item.latest_purpose == expected_purpose
@@ -0,0 +1,120 @@
+"""
+リクエスト・SQLのメトリクス（/metrics）のテスト
+"""
+
+import gzip
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import metrics, snapshots
+
+
+@pytest.fixture
+def recorded(db: AsyncSession) -> Generator[None, None, None]:
+    """テスト用エンジンを計測対象にし、記録済みの値を消す"""
+    assert db.bind is not None
+    metrics.instrument_engine(db.bind.sync_engine)
+    metrics.registry.clear()
+    yield
+    metrics.registry.clear()
+
+
+def test_histogram_render() -> None:
+    """バケットは累積件数、_sum・_countを出力するか"""
+    histogram = metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("/a",))
+
+    lines = list(histogram.samples())
+
+    assert lines == [
+        'edinet_test_seconds_bucket{route="/a",le="0.1"} 2',
+        'edinet_test_seconds_bucket{route="/a",le="1.0"} 3',
+        'edinet_test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'edinet_test_seconds_sum{route="/a"} 3.65',
+        'edinet_test_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counter_escapes_labels() -> None:
+    counter = metrics.Counter("test_total", "Test.", ("path",))
+    counter.inc(('a"b\\c',), 2)
+
+    assert list(counter.samples()) == ['edinet_test_total{path="a\\"b\\\\c"} 2']
+
+
+async def test_request_metrics(
+    client: AsyncClient, sample_data: dict[str, Any], recorded: None
+) -> None:
+    """ルートのテンプレート単位でリクエスト数・クエリ数・DB時間を記録するか"""
+    filer_id = sample_data["filer"].id
+    for _ in range(2):
+        response = await client.get(f"/api/filers/{filer_id}")
+        assert response.status_code == 200
+
+    route = ("/api/filers/{filer_id}",)
+    assert metrics.REQUESTS.value(("GET", *route, "200")) == 2
+    assert metrics.REQUEST_DURATION.count(("GET", *route)) == 2
+    assert metrics.REQUEST_QUERIES.count(route) == 2
+    assert metrics.REQUEST_QUERIES.total(route) >= 2
+    assert metrics.REQUEST_DB_TIME.total(route) > 0
+    assert metrics.QUERIES.value() >= metrics.REQUEST_QUERIES.total(route)
+    assert metrics.POOL_WAIT.count() > 0
+
+
+async def test_request_metrics_outcomes(
+    client: AsyncClient,
+    sample_data: dict[str, Any],
+    recorded: None,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """404はunmatched、304はnot_modified、スナップショット応答はsnapshotとして記録するか"""
+    response = await client.get("/api/filers")
+    etag = response.headers["ETag"]
+    response = await client.get("/api/filers", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    await client.get("/no/such/path")
+
+    snapshot = snapshots.Snapshot(body=gzip.compress(b"{}"), etag='"s"', version=1)
+    monkeypatch.setattr(snapshots.store, "lookup", lambda path, query: snapshot)
+    response = await client.get(f"/api/issuers/{sample_data['issuer'].id}/ownerships")
+    assert response.headers["X-Snapshot-Version"] == "1"
+
+    assert metrics.CACHE_REQUESTS.value(("/api/filers", "not_modified")) == 1
+    assert metrics.REQUESTS.value(("GET", metrics.UNMATCHED_ROUTE, "404")) == 1
+    ownerships = "/api/issuers/{issuer_id}/ownerships"
+    assert metrics.CACHE_REQUESTS.value((ownerships, "snapshot")) == 1
+    assert metrics.REQUEST_QUERIES.total((ownerships,)) == 0
+
+
+async def test_cache_outcomes() -> None:
+    """キャッシュの取得結果を実行中のリクエストに記録するか"""
+    backend = metrics.InstrumentedBackend(InMemoryBackend())
+    stats = metrics.RequestStats()
+    token = metrics._current.set(stats)
+    try:
+        await backend.get_with_ttl("key")
+        assert stats.cache == "miss"
+        await backend.set("key", "value", expire=60)
+        _, value = await backend.get_with_ttl("key")
+        assert value == "value"
+        assert stats.cache == "hit"
+    finally:
+        metrics._current.reset(token)
+
+
+async def test_metrics_endpoint(client: AsyncClient, recorded: None) -> None:
+    """Prometheusのテキスト形式で出力するか"""
+    await client.get("/")
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE edinet_http_request_duration_seconds histogram" in response.text
+    assert 'edinet_http_requests_total{method="GET",route="/",status="200"} 1' in response.text
+    assert 'edinet_db_pool_connections{database="' in response.text
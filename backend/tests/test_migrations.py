@@ -0,0 +1,146 @@
+"""
+Alembicマイグレーションのテスト（既存データを持つDBのアップグレード）
+"""
+
+import os
+import shutil
+import subprocess
+from collections.abc import Callable, Generator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine, select, text
+
+from backend.models import Filer, Issuer
+from backend.search import matching_filing_ids, search_condition
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+INITIAL_REVISION = "c65cb44c9477"
+
+Upgrade = Callable[[str], None]
+
+
+@pytest.fixture
+def migrated(tmp_path: Path) -> Generator[tuple[Upgrade, Engine], None, None]:
+    """初期スキーマまで適用したSQLiteのDBと、指定リビジョンまで適用する関数"""
+    # プロジェクトのalembic/パッケージがライブラリを隠すため、CLIを別プロセスで実行する
+    alembic = shutil.which("alembic")
+    if alembic is None:
+        pytest.skip("alembic CLI is not installed")
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+
+    def upgrade(revision: str) -> None:
+        subprocess.run(
+            [alembic, "upgrade", revision],
+            cwd=PROJECT_ROOT,
+            env={**os.environ, "DATABASE_URL": url},
+            check=True,
+            capture_output=True,
+        )
+
+    upgrade(INITIAL_REVISION)
+    engine = create_engine(url)
+    yield upgrade, engine
+    engine.dispose()
+
+
+def seed_existing_data(engine: Engine) -> None:
+    """集計テーブル導入前の既存データ（報告書のない提出者を含む）"""
+    now = "2024-01-01 00:00:00"
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO filers (id, edinet_code, name, created_at, updated_at) VALUES "
+                "(1, 'E00001', '提出者A', :now, :now), (2, 'E00002', '提出者B', :now, :now)"
+            ),
+            {"now": now},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO issuers (id, edinet_code, name, created_at, updated_at) VALUES "
+                "(1, 'E10001', '銘柄X', :now, :now), (2, 'E10002', '銘柄Y', :now, :now)"
+            ),
+            {"now": now},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO filings (id, doc_id, filer_id, issuer_id, doc_description, "
+                "submit_date, csv_flag, xbrl_flag, pdf_flag, created_at) VALUES "
+                "(1, 'S1', 1, 1, '大量保有報告書', '2024-01-10 09:00:00', 1, 0, 0, :now), "
+                "(2, 'S2', 1, 1, '変更報告書', '2024-03-05 09:00:00', 1, 0, 0, :now), "
+                "(3, 'S3', 1, 2, '大量保有報告書', '2024-02-01 09:00:00', 1, 0, 0, :now)"
+            ),
+            {"now": now},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO holding_details (id, filing_id, holding_ratio, purpose, created_at) "
+                "VALUES (1, 1, 5.5, '純投資', :now), (2, 2, 7.25, NULL, :now), "
+                "(3, 3, 6.0, NULL, :now)"
+            ),
+            {"now": now},
+        )
+
+
+def test_upgrade_backfills_filer_stats(migrated: tuple[Upgrade, Engine]) -> None:
+    """既存の提出者（報告書のない提出者を含む）のfiler_statsを埋めるか"""
+    upgrade, engine = migrated
+    seed_existing_data(engine)
+
+    upgrade("head")
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT filer_id, filing_count, issuer_count, latest_filing_date "
+                "FROM filer_stats ORDER BY filer_id"
+            )
+        ).all()
+    assert [tuple(row[:3]) for row in rows] == [(1, 3, 2), (2, 0, 0)]
+    assert rows[0].latest_filing_date.startswith("2024-03-05")
+    assert rows[1].latest_filing_date is None
+
+
+def test_upgrade_backfills_current_positions(migrated: tuple[Upgrade, Engine]) -> None:
+    """既存の報告書からcurrent_positionsと保有詳細の前回比率・増減を埋めるか"""
+    upgrade, engine = migrated
+    seed_existing_data(engine)
+
+    upgrade("head")
+
+    with engine.connect() as conn:
+        positions = conn.execute(
+            text(
+                "SELECT filer_id, issuer_id, latest_filing_id, holding_ratio, previous_ratio, "
+                "ratio_change, filing_count FROM current_positions ORDER BY filer_id, issuer_id"
+            )
+        ).all()
+        holdings = conn.execute(
+            text("SELECT id, previous_ratio, ratio_change FROM holding_details ORDER BY id")
+        ).all()
+    assert [tuple(row) for row in positions] == [
+        (1, 1, 2, 7.25, 5.5, 1.75, 2),
+        (1, 2, 3, 6.0, None, None, 1),
+    ]
+    assert [tuple(row) for row in holdings] == [(1, None, None), (2, 5.5, 1.75), (3, None, None)]
+
+
+def test_upgrade_backfills_search_text(migrated: tuple[Upgrade, Engine]) -> None:
+    """既存の提出者・発行体・報告書のsearch_textを埋め、名称・書類を検索できるか"""
+    upgrade, engine = migrated
+    seed_existing_data(engine)
+
+    upgrade("head")
+
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+
+        def ids(stmt) -> list[int]:
+            return sorted(conn.execute(stmt).scalars())
+
+        # 3文字以上はSQLiteのFTS5、2文字以下はLIKEで検索する
+        assert ids(select(Filer.id).where(search_condition(Filer, "提出者Ａ", dialect))) == [1]
+        assert ids(select(Filer.id).where(search_condition(Filer, "提出", dialect))) == [1, 2]
+        assert ids(select(Issuer.id).where(search_condition(Issuer, "E10002", dialect))) == [2]
+        assert ids(matching_filing_ids("変更報告書", dialect)) == [2]
+        assert ids(matching_filing_ids("純投資", dialect)) == [1]
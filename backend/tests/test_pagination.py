@@ -0,0 +1,84 @@
+"""
+キーセットページネーション（cursor）のテスト
+"""
+
+from datetime import UTC, datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Filer, Filing, Issuer
+from backend.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip() -> None:
+    """カーソルのエンコード・デコードが往復し、不正な値を拒否するか"""
+    assert decode_cursor(encode_cursor([12, 345]), 2) == [12, 345]
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", 2)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor([1]), 2)
+
+
+async def test_issuers_cursor_walk(client: AsyncClient, db: AsyncSession) -> None:
+    """cursorで全ページを辿った結果がskip/limitと一致するか"""
+    db.add_all(
+        [Issuer(edinet_code=f"E3{i:04d}", name=f"銘柄{i}", sec_code=f"{i}") for i in range(5)]
+    )
+    await db.commit()
+
+    offset_ids = [
+        item["id"] for item in (await client.get("/api/issuers?limit=10")).json()["items"]
+    ]
+
+    cursor_ids: list[int] = []
+    cursor = None
+    while True:
+        params: dict[str, str | int] = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        data = (await client.get("/api/issuers", params=params)).json()
+        cursor_ids.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert cursor_ids == offset_ids
+    assert len(cursor_ids) == 5
+
+
+async def test_filers_cursor_follows_issuer_count(client: AsyncClient, db: AsyncSession) -> None:
+    """提出者は銘柄数の降順・IDの降順でcursorが次ページを返すか"""
+    filers = [Filer(edinet_code=f"E0{i:04d}", name=f"提出者{i}") for i in range(3)]
+    issuers = [Issuer(edinet_code=f"E4{i:04d}", name=f"銘柄{i}") for i in range(2)]
+    db.add_all([*filers, *issuers])
+    await db.flush()
+
+    # filers[1]が2銘柄、filers[0]が1銘柄、filers[2]は0銘柄
+    for n, (filer, issuer) in enumerate(
+        [(filers[1], issuers[0]), (filers[1], issuers[1]), (filers[0], issuers[0])]
+    ):
+        db.add(
+            Filing(
+                doc_id=f"S_PAGE_{n}",
+                filer_id=filer.id,
+                issuer_id=issuer.id,
+                submit_date=datetime.now(UTC),
+            )
+        )
+    await db.commit()
+
+    first = (await client.get("/api/filers?limit=2")).json()
+    assert [item["id"] for item in first["items"]] == [filers[1].id, filers[0].id]
+
+    second = (await client.get(f"/api/filers?limit=2&cursor={first['next_cursor']}")).json()
+    assert [item["id"] for item in second["items"]] == [filers[2].id]
+    assert second["next_cursor"] is None
+
+
+async def test_invalid_cursor_returns_400(client: AsyncClient) -> None:
+    """不正なカーソルは400を返すか"""
+    response = await client.get("/api/issuers?cursor=%%%")
+    assert response.status_code == 400
@@ -0,0 +1,117 @@
+"""
+リクエストのサンプリングプロファイラのテスト
+"""
+
+import importlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+
+from backend import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(profiling, "INTERVAL_MS", 1)
+    return tmp_path
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_formats() -> None:
+    """サンプルしたスタックをcollapsed・speedscope形式で出力するか"""
+    sampler = profiling.Sampler(threading.get_ident(), 0.001)
+    sampler.start()
+    _busy(0.05)
+    sampler.stop()
+    sampler.join()
+
+    assert sampler.samples > 0
+    collapsed = sampler.collapsed()
+    assert "_busy (backend/tests/test_profiling.py:" in collapsed
+    stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("_busy")
+    assert int(count) > 0
+
+    data = sampler.speedscope("test")
+    profile = data["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+    frames = data["shared"]["frames"]
+    assert all(index < len(frames) for sample in profile["samples"] for index in sample)
+
+
+def test_prune_keeps_newest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """PROFILE_MAX_FILESを超えた古いプロファイルを削除するか"""
+    monkeypatch.setattr(profiling, "MAX_FILES", 2)
+    for n in range(4):
+        path = tmp_path / f"{n}.speedscope.json"
+        path.write_text("{}")
+        os.utime(path, (n, n))
+    (tmp_path / "other.txt").write_text("")
+
+    profiling.prune(tmp_path)
+
+    assert sorted(entry.name for entry in tmp_path.iterdir()) == [
+        "2.speedscope.json",
+        "3.speedscope.json",
+        "other.txt",
+    ]
+
+
+async def test_header_requires_token(
+    client: AsyncClient, profile_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """トークンが一致するX-Profileヘッダのリクエストのみ計測するか"""
+    response = await client.get("/api/filers", headers={"X-Profile": "secret"})
+    assert "X-Profile-File" not in response.headers
+
+    monkeypatch.setattr(profiling, "TOKEN", "secret")
+    response = await client.get("/api/filers", headers={"X-Profile": "wrong"})
+    assert "X-Profile-File" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+    response = await client.get("/api/filers", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    name = response.headers["X-Profile-File"]
+    assert name.endswith("-GET-api_filers.speedscope.json")
+    data: dict[str, Any] = json.loads((profile_dir / name).read_text())
+    assert data["name"].startswith("GET /api/filers (")
+
+
+async def test_sample_rate(
+    client: AsyncClient, profile_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """PROFILE_SAMPLE_RATEで計測し、PROFILE_MIN_MS未満のリクエストは保存しないか"""
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(profiling, "FORMAT", "collapsed")
+    monkeypatch.setattr(profiling, "MIN_MS", 60_000)
+    await client.get("/")
+    assert list(profile_dir.iterdir()) == []
+
+    monkeypatch.setattr(profiling, "MIN_MS", 0)
+    response = await client.get("/")
+    assert "X-Profile-File" not in response.headers
+    files = list(profile_dir.iterdir())
+    assert len(files) == 1
+    assert files[0].name.endswith("-GET-root.collapsed.txt")
+
+
+def test_unknown_format_is_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    """保存数の上限の対象外になる未知のPROFILE_FORMATを起動時に拒否するか"""
+    monkeypatch.setenv("PROFILE_FORMAT", "json")
+    with pytest.raises(ValueError, match="PROFILE_FORMAT"):
+        importlib.reload(profiling)
+    monkeypatch.delenv("PROFILE_FORMAT")
+    importlib.reload(profiling)
@@ -0,0 +1,158 @@
+"""
+ルートごとのクエリ数の上限（@metrics.query_budget）のテスト
+
+複数の提出者・発行体・報告書（訂正報告書・保有詳細を含む）をシードし、
+各GETルートの1リクエストあたりのSQL実行数が宣言した上限内に収まることを確認する。
+件数に比例してクエリが増える（N+1）変更がcrudに入るとここで失敗する。
+"""
+
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi.routing import APIRoute
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import metrics
+from backend.main import app
+from backend.models import Filer, FilerCode, Filing, HoldingDetail, Issuer
+
+FILERS = 4
+ISSUERS = 6
+REPORTS_PER_PAIR = 3
+
+
+@pytest_asyncio.fixture
+async def seeded(db: AsyncSession) -> dict[str, int]:
+    """提出者×発行体ごとに報告書・訂正報告書・保有詳細を持つデータ"""
+    filers = [
+        Filer(edinet_code=f"E9{n:04d}", name=f"テスト提出者{n}", sec_code=f"9{n:03d}0")
+        for n in range(FILERS)
+    ]
+    issuers = [
+        Issuer(edinet_code=f"E8{n:04d}", name=f"テスト発行体{n}", sec_code=f"8{n:03d}0")
+        for n in range(ISSUERS)
+    ]
+    db.add_all([*filers, *issuers])
+    await db.flush()
+
+    for filer in filers:
+        # 提出者の複数のEDINETコード
+        db.add_all(
+            [
+                FilerCode(filer_id=filer.id, edinet_code=filer.edinet_code, name=filer.name),
+                FilerCode(filer_id=filer.id, edinet_code=f"{filer.edinet_code}X", name="旧名称"),
+            ]
+        )
+
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    number = 0
+    for filer in filers:
+        for issuer in issuers:
+            previous = None
+            for report in range(REPORTS_PER_PAIR):
+                number += 1
+                filing = Filing(
+                    doc_id=f"S9{number:06d}",
+                    filer_id=filer.id,
+                    issuer_id=issuer.id,
+                    doc_description="変更報告書" if report else "大量保有報告書",
+                    submit_date=start + timedelta(days=number),
+                    parent_doc_id=previous,
+                    csv_flag=True,
+                )
+                db.add(filing)
+                await db.flush()
+                db.add(
+                    HoldingDetail(
+                        filing_id=filing.id,
+                        shares_held=100_000 * (report + 1),
+                        holding_ratio=5.0 + report,
+                        purpose="純投資",
+                    )
+                )
+                previous = filing.doc_id
+    await db.commit()
+    return {"filer_id": filers[0].id, "issuer_id": issuers[0].id}
+
+
+@pytest.fixture
+def budgeted_routes() -> list[APIRoute]:
+    return [
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods and route.path.startswith("/api/")
+    ]
+
+
+@pytest.fixture
+def counted(db: AsyncSession) -> Generator[None, None, None]:
+    assert db.bind is not None
+    metrics.instrument_engine(db.bind.sync_engine)
+    metrics.registry.clear()
+    yield
+    metrics.registry.clear()
+
+
+# ルートごとに確認するクエリ（一覧は検索・総数の推定の組み合わせも確認する）
+QUERIES = {
+    "/api/filers": ["", "?limit=2", "?search=テスト", "?total=estimate"],
+    "/api/issuers": ["", "?limit=2", "?search=テスト", "?total=estimate"],
+    "/api/search/filings": ["?q=報告書", "?q=純投資&limit=5"],
+    "/api/search/suggest": ["?q=テスト", "?q=E9"],
+}
+
+
+def test_every_api_route_declares_a_budget(budgeted_routes: list[APIRoute]) -> None:
+    """/api配下のGETルートはすべてクエリ数の上限を宣言しているか"""
+    missing = [route.path for route in budgeted_routes if metrics.route_query_budget(route) is None]
+    assert missing == []
+
+
+async def test_routes_within_query_budget(
+    client: AsyncClient,
+    seeded: dict[str, int],
+    budgeted_routes: list[APIRoute],
+    counted: None,
+) -> None:
+    """シードしたデータで各ルートのSQL実行数が上限内に収まるか"""
+    over_budget = []
+    for route in budgeted_routes:
+        if route.path.startswith("/api/admin/"):
+            continue
+        budget = metrics.route_query_budget(route)
+        path = route.path.format(**seeded)
+        # 2回目は構築済みの索引など、初回のみの処理を含まない
+        for query in QUERIES.get(route.path, [""]) * 2:
+            metrics.registry.clear()
+            response = await client.get(path + query)
+            assert response.status_code == 200, (path + query, response.text)
+            queries = metrics.REQUEST_QUERIES.total((route.path,))
+            if budget is None or queries > budget:
+                over_budget.append(f"{path}{query}: {queries} queries (budget {budget})")
+
+    assert over_budget == []
+
+
+async def test_exceeding_budget_is_reported(
+    client: AsyncClient,
+    seeded: dict[str, int],
+    counted: None,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """上限を超えたリクエストを警告ログとメトリクスで検知できるか"""
+    route = next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path == "/api/filers/{filer_id}"
+    )
+    monkeypatch.setattr(route.endpoint, "query_budget", 1)
+
+    response = await client.get(f"/api/filers/{seeded['filer_id']}")
+
+    assert response.status_code == 200
+    assert metrics.QUERY_BUDGET_EXCEEDED.value(("/api/filers/{filer_id}",)) == 1
+    assert "Query budget exceeded: GET /api/filers/{filer_id} ran 2 queries" in caplog.text
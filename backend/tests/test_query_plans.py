@@ -0,0 +1,183 @@
+"""
+crudのクエリの実行計画のテスト
+
+各クエリが発行するSQLをそのままEXPLAINし、filings・holding_detailsを
+全件走査する計画になっていないことを確認する（インデックスの欠落・
+インデックスを使えない条件の混入を検出する）。
+
+- SQLite: EXPLAIN QUERY PLANに "SCAN <テーブル>" が含まれないこと
+- PostgreSQL: enable_seqscan=offでも "Seq Scan" が残らないこと
+  （小さいテーブルでは通常シーケンシャルスキャンが選ばれるため）
+"""
+
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import crud
+from backend.models import Filer, FilerCode, FilerStats, Filing, HoldingDetail, Issuer
+
+# 全件走査を許可しないテーブル
+GUARDED_TABLES = ("filings", "holding_details")
+
+Statement = tuple[str, Any]
+
+
+@asynccontextmanager
+async def capture_statements(db: AsyncSession) -> AsyncIterator[list[Statement]]:
+    """ブロック内で実行されたSQLとパラメータを記録"""
+    statements: list[Statement] = []
+    engine = db.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+async def full_scans(db: AsyncSession, statement: str, parameters: Any) -> list[str]:
+    """SQLの実行計画のうち、対象テーブルを全件走査するノード"""
+    conn = await db.connection()
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        details = [row[-1] for row in result]
+        return [
+            detail
+            for detail in details
+            if detail.split()[:1] == ["SCAN"] and detail.split()[1] in GUARDED_TABLES
+        ]
+
+    await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in GUARDED_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+async def assert_no_full_scan(db: AsyncSession, call: Callable[[], Awaitable[Any]]) -> None:
+    """呼び出し中に実行されたすべてのSQLについて、全件走査がないことを確認"""
+    async with capture_statements(db) as statements:
+        await call()
+
+    assert statements, "no statements were executed"
+    for statement, parameters in statements:
+        if (
+            not statement.lstrip()
+            .upper()
+            .startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"))
+        ):
+            continue
+        scans = await full_scans(db, statement, parameters)
+        assert not scans, f"{scans} in:\n{statement}"
+
+
+async def seed(db: AsyncSession) -> dict[str, int]:
+    """提出者3社・銘柄5社・報告書30件（保有詳細付き）"""
+    filers = [Filer(edinet_code=f"E0000{i}", name=f"提出者{i}") for i in range(3)]
+    issuers = [
+        Issuer(edinet_code=f"E1000{i}", name=f"発行体{i}", sec_code=f"1000{i}") for i in range(5)
+    ]
+    db.add_all([*filers, *issuers])
+    await db.flush()
+    db.add_all(FilerCode(filer_id=f.id, edinet_code=f.edinet_code) for f in filers)
+
+    base = datetime(2024, 1, 1, 9, 0)
+    for i in range(30):
+        filing = Filing(
+            doc_id=f"S{i:07d}",
+            filer_id=filers[i % 3].id,
+            issuer_id=issuers[i % 5].id,
+            doc_description="変更報告書",
+            submit_date=base + timedelta(days=i),
+        )
+        db.add(filing)
+        await db.flush()
+        db.add(HoldingDetail(filing_id=filing.id, holding_ratio=5.0 + i / 10, purpose="純投資"))
+    await db.commit()
+    return {"filer_id": filers[0].id, "issuer_id": issuers[0].id}
+
+
+async def test_list_and_detail_plans(db: AsyncSession) -> None:
+    """一覧・詳細・履歴のクエリ"""
+    ids = await seed(db)
+    filer_id, issuer_id = ids["filer_id"], ids["issuer_id"]
+
+    calls: list[Callable[[], Awaitable[Any]]] = [
+        lambda: crud.get_filers(db, limit=2),
+        lambda: crud.get_filers(db, search="提出者", limit=2),
+        lambda: crud.get_filer_detail(db, filer_id),
+        lambda: crud.get_issuers_by_filer(db, filer_id),
+        lambda: crud.get_issuers_by_filer(db, filer_id, sort="ratio_change", search="発行体"),
+        lambda: crud.get_issuers(db, limit=2),
+        lambda: crud.get_issuer_ownerships(db, issuer_id),
+        lambda: crud.get_issuer_history(db, filer_id, issuer_id),
+        lambda: crud.get_filings_by_filer(db, filer_id),
+    ]
+    for call in calls:
+        await assert_no_full_scan(db, call)
+
+
+async def test_filer_stats_fallback_plan(db: AsyncSession) -> None:
+    """集計テーブルにない提出者の統計をfilingsから求めるクエリ"""
+    ids = await seed(db)
+    await db.execute(delete(FilerStats).where(FilerStats.filer_id == ids["filer_id"]))
+
+    await assert_no_full_scan(db, lambda: crud.get_filer_stats(db, ids["filer_id"]))
+
+
+async def test_filing_search_plan(db: AsyncSession) -> None:
+    """全文検索（提出者・提出日の絞り込み、カーソル指定）"""
+    ids = await seed(db)
+    data = await crud.search_filings(db, "純投資", limit=2)
+
+    await assert_no_full_scan(
+        db,
+        lambda: crud.search_filings(
+            db,
+            "変更報告書",
+            filer_id=ids["filer_id"],
+            date_from=date(2024, 1, 1),
+            date_to=date(2024, 12, 31),
+            cursor=data["next_cursor"],
+        ),
+    )
+
+
+async def test_ingest_commit_plan(db: AsyncSession) -> None:
+    """報告書の追加をコミットしたときの変更追跡・集計テーブル更新のクエリ"""
+    ids = await seed(db)
+
+    async def ingest() -> None:
+        filing = Filing(
+            doc_id="S_NEW",
+            filer_id=ids["filer_id"],
+            issuer_id=ids["issuer_id"],
+            submit_date=datetime(2025, 1, 1),
+        )
+        db.add(filing)
+        await db.flush()
+        db.add(HoldingDetail(filing_id=filing.id, holding_ratio=9.9))
+        await db.commit()
+
+    await assert_no_full_scan(db, ingest)
@@ -0,0 +1,91 @@
+"""
+提出者名・銘柄名の部分一致検索のテスト
+"""
+
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import crud
+from backend.models import Filer, Issuer
+from backend.search import normalize_text, search_condition
+
+
+def test_normalize_text() -> None:
+    """全角・半角、大文字・小文字、ひらがな・カタカナ、空白の違いを吸収するか"""
+    assert normalize_text("株式会社 光通信") == "株式会社光通信"
+    assert normalize_text("ｺｰﾎﾟﾚｰｼｮﾝ") == "コーポレーション"
+    assert normalize_text("ＡＢＣ　ホールディングス") == "abcホールディングス"
+    assert normalize_text("ひかり") == normalize_text("ヒカリ")
+    assert normalize_text(None) == ""
+
+
+async def test_search_matches_variants(db: AsyncSession) -> None:
+    """表記ゆれのある検索語で同じ提出者に一致するか"""
+    db.add_all(
+        [
+            Filer(edinet_code="E04948", name="株式会社光通信"),
+            Filer(edinet_code="E00001", name="ＡＢＣキャピタル株式会社"),
+            Filer(edinet_code="E00002", name="ｴｰﾋﾞｰｼｰ投資"),
+        ]
+    )
+    await db.commit()
+
+    dialect = db.get_bind().dialect.name
+
+    async def names(term: str) -> list[str]:
+        stmt = select(Filer.name).where(search_condition(Filer, term, dialect))
+        return sorted((await db.execute(stmt)).scalars())
+
+    assert await names("光通信") == ["株式会社光通信"]
+    assert await names("株式会社 光通信") == ["株式会社光通信"]
+    assert await names("光通") == ["株式会社光通信"]
+    assert await names("abc") == ["ＡＢＣキャピタル株式会社"]
+    assert await names("えーびーしー") == ["ｴｰﾋﾞｰｼｰ投資"]
+    # LIKEのワイルドカードは文字として扱う
+    assert await names("%") == []
+
+
+async def test_issuer_search_codes(client: AsyncClient, db: AsyncSession) -> None:
+    """銘柄は名称・証券コード・EDINETコードで検索でき、項目をまたいで一致しないか"""
+    db.add(Issuer(edinet_code="E12345", name="サンプル工業", sec_code="67890"))
+    await db.commit()
+
+    for term in ["ｻﾝﾌﾟﾙ", "67890", "e12345", "工業"]:
+        response = await client.get("/api/issuers", params={"search": term})
+        assert response.json()["total"] == 1, term
+
+    response = await client.get("/api/issuers", params={"search": "工業67890"})
+    assert response.json()["total"] == 0
+
+
+async def test_search_index_follows_updates(db: AsyncSession) -> None:
+    """名称の変更・削除が検索結果に反映されるか"""
+    filer = Filer(edinet_code="E00003", name="旧名称株式会社")
+    db.add(filer)
+    await db.commit()
+
+    filer.name = "新名称ホールディングス"
+    await db.commit()
+
+    data = await crud.get_filers(db, search="新名称")
+    assert [item.id for item in data["items"]] == [filer.id]
+    data = await crud.get_filers(db, search="旧名称")
+    assert data["items"] == []
+
+    await db.delete(filer)
+    await db.commit()
+    data = await crud.get_filers(db, search="新名称")
+    assert data["items"] == []
+
+
+async def test_search_uses_fts_index(db: AsyncSession) -> None:
+    """SQLiteでは3文字以上の検索語をFTS5のインデックスで引くか"""
+    if db.get_bind().dialect.name != "sqlite":
+        return
+
+    stmt = select(Filer.id).where(search_condition(Filer, "光通信", "sqlite"))
+    compiled = stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "VIRTUAL TABLE INDEX" in details
@@ -0,0 +1,68 @@
+"""
+FAST_JSON経路（構造体 + orjson）のテスト
+"""
+
+import dataclasses
+from typing import Any
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from httpx import AsyncClient
+
+from backend import metrics, schemas, serialization
+
+LIST_PATHS = [
+    "/api/filers",
+    "/api/issuers",
+    "/api/filers/{filer_id}/issuers",
+    "/api/filers/{filer_id}/filings",
+    "/api/issuers/{issuer_id}/ownerships",
+]
+
+
+def test_struct_matches_schema_fields() -> None:
+    """構造体のフィールドと順序がPydanticモデルと一致するか"""
+    struct = serialization.struct_for(schemas.IssuerResponse)
+    names = [field.name for field in dataclasses.fields(struct)]
+    assert names == list(schemas.IssuerResponse.model_fields)
+
+
+@pytest.mark.skipif(serialization.orjson is None, reason="orjson is not installed")
+async def test_fast_json_output_is_identical(
+    client: AsyncClient, sample_data: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """FAST_JSONの有無で一覧レスポンスの本文がバイト単位で一致するか"""
+    ids = {"filer_id": sample_data["filer"].id, "issuer_id": sample_data["issuer"].id}
+    headers = {"Cache-Control": "no-cache"}
+
+    for template in LIST_PATHS:
+        path = template.format(**ids)
+        monkeypatch.setattr(serialization, "FAST_JSON", False)
+        expected = await client.get(path, headers=headers)
+        monkeypatch.setattr(serialization, "FAST_JSON", True)
+        actual = await client.get(path, headers=headers)
+
+        assert actual.status_code == expected.status_code == 200
+        assert actual.content == expected.content, path
+
+
+@pytest.mark.skipif(serialization.orjson is None, reason="orjson is not installed")
+async def test_fast_json_cached_output_is_identical(
+    client: AsyncClient, sample_data: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """FAST_JSONのレスポンスをキャッシュ（JsonCoder）から返した本文が生成時と一致するか"""
+    ids = {"filer_id": sample_data["filer"].id, "issuer_id": sample_data["issuer"].id}
+    monkeypatch.setattr(FastAPICache, "_backend", metrics.InstrumentedBackend(InMemoryBackend()))
+    monkeypatch.setattr(serialization, "FAST_JSON", True)
+    metrics.registry.clear()
+
+    for template in LIST_PATHS:
+        path = template.format(**ids)
+        fresh = await client.get(path)
+        cached = await client.get(path)
+
+        assert cached.status_code == fresh.status_code == 200
+        assert metrics.CACHE_REQUESTS.value((template, "hit")) == 1, path
+        assert cached.content == fresh.content, path
+    metrics.registry.clear()
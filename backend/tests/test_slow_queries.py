@@ -0,0 +1,121 @@
+"""
+遅いSQLの記録・実行計画の取得のテスト
+"""
+
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend import main, slow_queries
+
+
+@pytest_asyncio.fixture
+async def recording(
+    db: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[AsyncEngine, None]:
+    """テスト用エンジンの全SQLを遅いSQLとして記録する"""
+    assert isinstance(db.bind, AsyncEngine)
+    slow_queries.install(db.bind)
+    monkeypatch.setattr(slow_queries, "THRESHOLD_MS", 0)
+    slow_queries.clear()
+    yield db.bind
+    await slow_queries.wait_for_explains()
+    slow_queries.clear()
+
+
+def test_normalize_sql() -> None:
+    """リテラル・プレースホルダ・IN句の展開をまとめるか"""
+    statement = """
+        SELECT filings.id, 'a''b' AS label FROM filings
+        WHERE filings.filer_id IN (?, ?, ?) AND filings.holding_ratio > 5.5
+        AND filings.doc_id = $1 AND filings.issuer_id = :issuer_id_1 AND x::text = %(name)s
+        LIMIT 10 OFFSET ?
+    """
+
+    assert slow_queries.normalize_sql(statement) == (
+        "SELECT filings.id, ? AS label FROM filings "
+        "WHERE filings.filer_id IN (?, ...) AND filings.holding_ratio > ? "
+        "AND filings.doc_id = ? AND filings.issuer_id = ? AND x::text = ? "
+        "LIMIT ? OFFSET ?"
+    )
+
+
+def test_parameter_shape() -> None:
+    """値を含めず型と件数だけを残すか"""
+    assert slow_queries.parameter_shape((1, "secret", None, [1, 2])) == [
+        "int",
+        "str",
+        "NoneType",
+        "list[int]x2",
+    ]
+    assert slow_queries.parameter_shape({"doc_id": "S100"}) == {"doc_id": "str"}
+    assert slow_queries.parameter_shape([(1,), (2,)], executemany=True) == {
+        "rows": 2,
+        "first": ["int"],
+    }
+    shape = slow_queries.parameter_shape(tuple(range(60)))
+    assert len(shape) == 51
+    assert shape[-1] == "+10 more"
+
+
+async def test_records_route_and_plan(
+    client: AsyncClient, sample_data: dict[str, Any], recording: AsyncEngine
+) -> None:
+    """発行元のルートと実行計画（SQLiteはEXPLAIN QUERY PLAN）を記録するか"""
+    filer_id = sample_data["filer"].id
+    response = await client.get(f"/api/filers/{filer_id}/issuers")
+    assert response.status_code == 200
+    await slow_queries.wait_for_explains()
+
+    entries = slow_queries.entries()
+    assert entries
+    assert {entry.route for entry in entries} == {"/api/filers/{filer_id}/issuers"}
+    assert all(entry.method == "GET" for entry in entries)
+    assert all(str(filer_id) not in entry.statement.split() for entry in entries)
+
+    # 計画の取得は同時に1件まで（取得できたSELECTには計画が入る）
+    planned = [entry for entry in entries if entry.plan]
+    assert planned
+    if recording.dialect.name == "sqlite":
+        assert all(entry.plan_error is None for entry in planned)
+    # 計画の取得のためのクエリ自体は記録しない
+    assert not any(entry.statement.startswith("EXPLAIN") for entry in entries)
+
+
+async def test_explain_rate_limit(recording: AsyncEngine) -> None:
+    """同じ正規化SQLの計画はSLOW_QUERY_EXPLAIN_INTERVAL秒に1回だけ取得するか"""
+    dialect = recording.dialect.name
+    statement = "SELECT 1"
+    first = slow_queries.record(recording, dialect, statement, (), False, 500)
+    await slow_queries.wait_for_explains()
+    second = slow_queries.record(recording, dialect, statement, (), False, 500)
+    await slow_queries.wait_for_explains()
+
+    assert first.plan is not None
+    assert second.plan is None
+    assert first.fingerprint == second.fingerprint
+
+
+async def test_admin_endpoint(
+    client: AsyncClient, recording: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """ADMIN_TOKENの未設定時は無効、トークンが一致した場合のみ参照できるか"""
+    slow_queries.record(recording, recording.dialect.name, "UPDATE t SET a = 1", {}, False, 300)
+
+    response = await client.get("/api/admin/slow-queries")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    response = await client.get("/api/admin/slow-queries", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+    response = await client.get("/api/admin/slow-queries", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["threshold_ms"] == 0
+    assert data["items"][0]["statement"] == "UPDATE t SET a = ?"
+    assert data["items"][0]["plan"] is None
@@ -0,0 +1,119 @@
+"""
+事前生成スナップショットの生成・配信テスト
+"""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import main, snapshots
+from backend.models import Filer
+
+
+async def test_render_and_serve_snapshots(
+    client: AsyncClient,
+    sample_data: dict[str, Any],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """生成したスナップショットがDBを経由したレスポンスと同一内容で配信されるか"""
+    filer_id = sample_data["filer"].id
+    issuer_id = sample_data["issuer"].id
+
+    responses = await snapshots.render_snapshots(client, pages=1)
+    assert set(responses) == {
+        "/api/filers?limit=50&skip=0",
+        f"/api/filers/{filer_id}",
+        f"/api/filers/{filer_id}/issuers?limit=50&skip=0",
+        f"/api/issuers/{issuer_id}/ownerships",
+    }
+
+    store = snapshots.SnapshotStore(tmp_path)
+    assert store.write(3, responses) == 4
+    store.set_current_version(3)
+    monkeypatch.setattr(snapshots, "store", store)
+
+    body, etag = responses["/api/filers?limit=50&skip=0"]
+    served = await client.get("/api/filers?skip=0&limit=50")
+    assert served.status_code == 200
+    assert served.headers["X-Snapshot-Version"] == "3"
+    assert served.headers["ETag"] == etag
+    assert served.content == body
+
+    not_modified = await client.get("/api/filers?skip=0&limit=50", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    # 一致しないクエリはDBから取得する
+    response = await client.get("/api/filers?skip=0&limit=10")
+    assert "X-Snapshot-Version" not in response.headers
+
+
+def test_store_replaces_old_versions(tmp_path: Path) -> None:
+    """新しいバージョンの書き込みで古いファイルが削除され、clearで配信が止まるか"""
+    store = snapshots.SnapshotStore(tmp_path)
+    store.write(1, {"/api/filers": (b"[1]", '"a"')})
+    store.write(2, {"/api/filers": (b"[2]", '"b"')})
+    store.set_current_version(2)
+
+    assert not (tmp_path / "v1").exists()
+    snapshot = store.lookup("/api/filers", "")
+    assert snapshot is not None
+    assert snapshot.version == 2
+    assert snapshot.etag == '"b"'
+
+    store.clear()
+    assert store.lookup("/api/filers", "") is None
+
+
+async def test_stale_snapshots_are_not_served(
+    client: AsyncClient,
+    db: AsyncSession,
+    sample_data: dict[str, Any],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """データバージョンが変わった・確認できないスナップショットは配信しないか"""
+    store = snapshots.SnapshotStore(tmp_path, max_age=60)
+    monkeypatch.setattr(snapshots, "store", store)
+    version = await snapshots.refresh_current_version(db)
+    store.write(version, {"/api/filers": (b'{"items": []}', '"old"')})
+    response = await client.get("/api/filers")
+    assert response.headers["ETag"] == '"old"'
+
+    # 同じプロセス内の書き込みでは即座に配信を止める
+    db.add(Filer(edinet_code="E99999", name="新しい提出者"))
+    await db.commit()
+    response = await client.get("/api/filers", headers={"If-None-Match": '"old"'})
+    assert response.status_code == 200
+    assert "X-Snapshot-Version" not in response.headers
+    assert "新しい提出者" in response.text
+
+    # 他プロセスの書き込み（バージョンの不一致）も確認後は配信しない
+    assert await snapshots.refresh_current_version(db) == version + 1
+    assert store.lookup("/api/filers", "") is None
+
+    # 現在のバージョンを一定時間確認できなければ配信しない
+    store.write(version + 1, {"/api/filers": (b"{}", '"new"')})
+    assert store.lookup("/api/filers", "") is not None
+    store.max_age = 0
+    assert store.lookup("/api/filers", "") is None
+
+
+async def test_snapshots_are_rate_limited(
+    client: AsyncClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """スナップショット応答にもルートのレート制限を適用するか"""
+    store = snapshots.SnapshotStore(tmp_path)
+    store.write(1, {"/api/filers/1": (b"{}", '"a"')})
+    store.set_current_version(1)
+    monkeypatch.setattr(snapshots, "store", store)
+    main.limiter.reset()
+
+    statuses = [(await client.get("/api/filers/1")).status_code for _ in range(101)]
+
+    assert statuses[:100] == [200] * 100
+    assert statuses[100] == 429
+    main.limiter.reset()
@@ -0,0 +1,99 @@
+"""
+入力候補（typeahead）の索引と/api/search/suggestのテスト
+"""
+
+from typing import Any
+
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import suggest
+from backend.models import Filer
+from backend.suggest import SuggestIndex, Suggestion
+
+
+def build_index() -> SuggestIndex:
+    entries = [
+        Suggestion("filer", 1, "株式会社光通信", "E04948", "94350", 300),
+        Suggestion("filer", 2, "光通信キャピタル", "E35239", None, 10),
+        Suggestion("issuer", 3, "通信光学工業", "E11111", "67890", 50),
+        Suggestion("issuer", 4, "光ネット通信", "E22222", None, 999),
+    ]
+    keys = [
+        ["株式会社光通信", "e04948", "e35239", "94350", "9435"],
+        ["光通信キャピタル", "e35239"],
+        ["通信光学工業", "e11111", "67890"],
+        ["光ネット通信", "e22222"],
+    ]
+    return SuggestIndex(entries, keys, version=1)
+
+
+def test_suggest_ranks_prefix_then_activity() -> None:
+    """前方一致を優先し、同順位は活動量の多い順に並ぶか"""
+    index = build_index()
+
+    assert [s.id for s in index.search("光通信")] == [2, 1]
+    assert [s.id for s in index.search("通信")] == [3, 4, 1, 2]
+    assert [s.id for s in index.search("通信", limit=2)] == [3, 4]
+    assert [s.id for s in index.search("光")] == [4, 2, 1, 3]
+
+
+def test_suggest_codes_and_filters() -> None:
+    """EDINETコード・4桁/5桁の証券コード・種類の絞り込みで引けるか"""
+    index = build_index()
+
+    assert [s.id for s in index.search("E35239")] == [1, 2]
+    assert [s.id for s in index.search("9435")] == [1]
+    assert [s.id for s in index.search("９４３５０")] == [1]
+    assert [s.id for s in index.search("通信", kind="filer")] == [1, 2]
+    # n-gramをすべて含んでも連続していなければ一致しない
+    assert index.search("光工") == []
+    assert index.search("存在しない") == []
+    assert index.search("  ") == []
+
+
+async def test_suggest_endpoint(
+    client: AsyncClient, db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """索引の構築後はDBに問い合わせず、再構築で新しいデータが反映されるか"""
+    response = await client.get("/api/search/suggest", params={"q": "テスト"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [(item["kind"], item["name"]) for item in data["items"]] == [
+        ("filer", "テスト提出者"),
+        ("issuer", "テスト発行体"),
+    ]
+    assert data["items"][0]["edinet_code"] == "E00000"
+
+    db.add(Filer(edinet_code="E99999", name="テスト追加"))
+    await db.commit()
+
+    statements: list[str] = []
+    engine = db.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = await client.get("/api/search/suggest", params={"q": "テスト", "kind": "filer"})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+    assert len(response.json()["items"]) == 1
+
+    assert await suggest.holder.refresh(db)
+    assert not await suggest.holder.refresh(db)
+    response = await client.get("/api/search/suggest", params={"q": "テスト", "kind": "filer"})
+    assert [item["name"] for item in response.json()["items"]] == ["テスト提出者", "テスト追加"]
+
+
+async def test_suggest_validation(client: AsyncClient) -> None:
+    """検索語・件数・種類の検証"""
+    assert (await client.get("/api/search/suggest")).status_code == 422
+    assert (
+        await client.get("/api/search/suggest", params={"q": "a", "limit": 21})
+    ).status_code == 422
+    response = await client.get("/api/search/suggest", params={"q": "a", "kind": "x"})
+    assert response.status_code == 422
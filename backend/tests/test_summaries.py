@@ -0,0 +1,219 @@
+"""
+集計テーブル（filer_stats・current_positions）の保守テスト
+"""
+
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import crud
+from backend.models import CurrentPosition, Filer, FilerStats, Filing, HoldingDetail, Issuer
+from backend.summaries import rebuild_summaries
+
+
+async def test_filer_stats_follow_commits(db: AsyncSession, sample_data: dict[str, Any]) -> None:
+    """報告書の追加がコミット時にfiler_statsへ反映されるか"""
+    filer_id = sample_data["filer"].id
+
+    issuer = Issuer(edinet_code="E22222", name="別の発行体")
+    db.add(issuer)
+    await db.flush()
+    latest = datetime(2030, 1, 1, tzinfo=UTC)
+    db.add(Filing(doc_id="S_TEST_02", filer_id=filer_id, issuer_id=issuer.id, submit_date=latest))
+    await db.commit()
+
+    stats = await db.get(FilerStats, filer_id, populate_existing=True)
+    assert stats is not None
+    assert stats.filing_count == 2
+    assert stats.issuer_count == 2
+    assert stats.latest_filing_date is not None
+    assert stats.latest_filing_date.replace(tzinfo=UTC) == latest
+
+
+async def test_filer_without_filings_has_zero_stats(db: AsyncSession) -> None:
+    """報告書のない提出者も0件の集計行を持ち、一覧に含まれるか"""
+    filer = Filer(edinet_code="E00002", name="報告書なし")
+    db.add(filer)
+    await db.commit()
+
+    stats = await crud.get_filer_stats(db, filer.id)
+    assert stats == {"filing_count": 0, "issuer_count": 0, "latest_filing_date": None}
+
+    data = await crud.get_filers(db)
+    assert [item.id for item in data["items"]] == [filer.id]
+
+
+async def test_filer_without_stats_row_is_listed(
+    db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """集計行がない提出者（フックを経由しない書き込み）も一覧に含まれ、総数と一致するか"""
+    filer = Filer(edinet_code="E00006", name="集計行なし")
+    db.add(filer)
+    await db.commit()
+    await db.execute(delete(FilerStats).where(FilerStats.filer_id == filer.id))
+    await db.commit()
+
+    data = await crud.get_filers(db)
+    assert data["total"] == 2
+    assert [(item.id, item.issuer_count) for item in data["items"]] == [
+        (sample_data["filer"].id, 1),
+        (filer.id, 0),
+    ]
+
+    first = await crud.get_filers(db, limit=1)
+    second = await crud.get_filers(db, limit=1, cursor=first["next_cursor"])
+    assert [item.id for item in second["items"]] == [filer.id]
+    assert second["items"][0].filing_count == 0
+
+
+async def test_rebuild_and_fallback(db: AsyncSession, sample_data: dict[str, Any]) -> None:
+    """集計行がない場合はfilingsから集計し、全件再構築で復元できるか"""
+    filer_id = sample_data["filer"].id
+    await db.execute(delete(FilerStats))
+    await db.commit()
+
+    stats = await crud.get_filer_stats(db, filer_id)
+    assert stats["filing_count"] == 1
+    assert stats["issuer_count"] == 1
+
+    await db.run_sync(rebuild_summaries)
+    await db.commit()
+
+    count = (await db.execute(select(FilerStats.filing_count))).scalars().all()
+    assert count == [1]
+
+
+async def test_current_position_uses_latest_submit_date(db: AsyncSession) -> None:
+    """IDの大小ではなく提出日が最新の報告書を現在の保有状況とするか"""
+    filer = Filer(edinet_code="E00003", name="投資家")
+    issuer = Issuer(edinet_code="E33333", name="発行体")
+    db.add_all([filer, issuer])
+    await db.flush()
+
+    # 後から取り込んだ（IDが大きい）報告書の方が提出日は古い
+    newer = Filing(
+        doc_id="S_NEW", filer_id=filer.id, issuer_id=issuer.id, submit_date=datetime(2024, 6, 1)
+    )
+    older = Filing(
+        doc_id="S_OLD", filer_id=filer.id, issuer_id=issuer.id, submit_date=datetime(2024, 1, 1)
+    )
+    db.add(newer)
+    await db.flush()
+    db.add(older)
+    await db.flush()
+    db.add_all(
+        [
+            HoldingDetail(filing_id=newer.id, holding_ratio=7.5, purpose="純投資"),
+            HoldingDetail(filing_id=older.id, holding_ratio=5.2, purpose="純投資"),
+        ]
+    )
+    await db.commit()
+
+    position = await db.get(CurrentPosition, (filer.id, issuer.id), populate_existing=True)
+    assert position is not None
+    assert position.latest_filing_id == newer.id
+    assert position.holding_ratio == 7.5
+    assert position.previous_ratio == 5.2
+    assert position.filing_count == 2
+
+    data = await crud.get_issuers_by_filer(db, filer.id)
+    assert data is not None
+    assert data["items"][0].latest_ratio == 7.5
+
+    ownerships = await crud.get_issuer_ownerships(db, issuer.id)
+    assert ownerships is not None
+    assert [o.holding_ratio for o in ownerships["ownerships"]] == [7.5]
+
+
+async def test_deleting_latest_holding_updates_position(db: AsyncSession) -> None:
+    """current_positionsが参照する保有詳細を削除でき、コミット時に再計算されるか"""
+    filer = Filer(edinet_code="E00005", name="投資家")
+    issuer = Issuer(edinet_code="E66666", name="発行体")
+    db.add_all([filer, issuer])
+    await db.flush()
+    filing = Filing(doc_id="S_NA", filer_id=filer.id, issuer_id=issuer.id)
+    db.add(filing)
+    await db.flush()
+    holding = HoldingDetail(filing_id=filing.id, shares_held=None, holding_ratio=None)
+    db.add(holding)
+    await db.commit()
+
+    position = await db.get(CurrentPosition, (filer.id, issuer.id), populate_existing=True)
+    assert position is not None
+    assert position.latest_holding_id == holding.id
+
+    assert db.bind is not None
+    if db.bind.dialect.name == "sqlite":
+        # 外部キー制約の違反を検出できるようにする（PostgreSQLでは常に有効）
+        await db.execute(text("PRAGMA foreign_keys=ON"))
+    await db.delete(holding)
+    await db.commit()
+
+    position = await db.get(CurrentPosition, (filer.id, issuer.id), populate_existing=True)
+    assert position is not None
+    assert position.latest_filing_id == filing.id
+    assert position.latest_holding_id is None
+
+
+async def test_current_position_follows_issuer_change(
+    db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """報告書の発行体を付け替えると、変更前・変更後の両方の組が更新されるか"""
+    filer_id = sample_data["filer"].id
+    old_issuer_id = sample_data["issuer"].id
+    filing = sample_data["filing"]
+
+    issuer = Issuer(edinet_code="E44444", name="付け替え先")
+    db.add(issuer)
+    await db.flush()
+    filing.issuer_id = issuer.id
+    await db.commit()
+
+    rows = (await db.execute(select(CurrentPosition.filer_id, CurrentPosition.issuer_id))).all()
+    assert rows == [(filer_id, issuer.id)]
+    assert old_issuer_id != issuer.id
+
+
+async def test_ratio_change_stored_per_holding(db: AsyncSession) -> None:
+    """保有詳細ごとに提出日順の前回比率・増減が保存され、一覧で並べ替えられるか"""
+    filer = Filer(edinet_code="E00004", name="投資家")
+    issuers = [Issuer(edinet_code=f"E5555{i}", name=f"発行体{i}") for i in range(2)]
+    db.add_all([filer, *issuers])
+    await db.flush()
+
+    ratios: dict[int, list[float | None]] = {
+        issuers[0].id: [5.0, 6.25, None, 8.0],
+        issuers[1].id: [10.0, 7.0],
+    }
+    for issuer_id, chain in ratios.items():
+        # 提出日の新しい順に登録しても提出日順に計算される
+        for month, ratio in reversed(list(enumerate(chain, start=1))):
+            filing = Filing(
+                doc_id=f"S_{issuer_id}_{month}",
+                filer_id=filer.id,
+                issuer_id=issuer_id,
+                submit_date=datetime(2024, month, 1),
+            )
+            db.add(filing)
+            await db.flush()
+            db.add(HoldingDetail(filing_id=filing.id, holding_ratio=ratio))
+            await db.commit()
+
+    rows = (
+        await db.execute(
+            select(HoldingDetail.previous_ratio, HoldingDetail.ratio_change)
+            .join(Filing)
+            .where(Filing.issuer_id == issuers[0].id)
+            .order_by(Filing.submit_date)
+        )
+    ).all()
+    assert [tuple(r) for r in rows] == [(None, None), (5.0, 1.25), (6.25, None), (6.25, 1.75)]
+
+    data = await crud.get_issuers_by_filer(db, filer.id, sort="ratio_change")
+    assert data is not None
+    assert [(item.id, item.ratio_change) for item in data["items"]] == [
+        (issuers[0].id, 1.75),
+        (issuers[1].id, -3.0),
+    ]
@@ -0,0 +1,140 @@
+"""
+同期処理の段階別計測・実行レポートのテスト
+"""
+
+import json
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend import sync_edinet
+from backend.models import Filing
+from backend.sync_report import STAGES, SyncReport
+
+
+def _document(doc_id: str, edinet_code: str, ordinance: str = "060") -> dict[str, Any]:
+    return {
+        "docID": doc_id,
+        "edinetCode": edinet_code,
+        "filerName": f"提出者{edinet_code}",
+        "issuerEdinetCode": "E11111",
+        "ordinanceCode": ordinance,
+        "formCode": "010002",
+        "docDescription": "大量保有報告書",
+        "submitDateTime": "2025-01-06 09:00",
+        "csvFlag": "1",
+    }
+
+
+@pytest.fixture
+def sync_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Generator[sessionmaker[Session], None, None]:
+    """一時ディレクトリのSQLiteと一覧キャッシュで同期処理を動かす"""
+    engine = create_engine(f"sqlite:///{tmp_path}/sync.db")
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    @contextmanager
+    def get_session() -> Iterator[Session]:
+        with session_factory() as session:
+            yield session
+            session.commit()
+
+    monkeypatch.setattr(sync_edinet, "sync_engine", engine)
+    monkeypatch.setattr(sync_edinet, "get_sync_db_session", get_session)
+    monkeypatch.setattr(sync_edinet, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(sync_edinet, "API_KEY", "test")
+    yield session_factory
+    engine.dispose()
+
+
+class TestSyncReport:
+    """SyncReportの集計と出力"""
+
+    def test_stage_accumulates_time_and_counts(self) -> None:
+        report = SyncReport("documents")
+        for _ in range(3):
+            with report.stage("fetch") as stage:
+                stage.count += 1
+                stage.bytes += 100
+
+        fetch = report.stages["fetch"]
+        assert fetch.count == 3
+        assert fetch.bytes == 300
+        assert fetch.seconds > 0
+        assert report.stages["commit"].count == 0
+
+    def test_stage_records_time_on_exception(self) -> None:
+        report = SyncReport("documents")
+        with pytest.raises(RuntimeError), report.stage("download"):
+            raise RuntimeError
+
+        assert report.stages["download"].seconds > 0
+
+    def test_write_json(self, tmp_path: Path) -> None:
+        report = SyncReport("holdings")
+        report.counters["holdings_extracted"] += 2
+        report.finish()
+
+        path = report.write_json(tmp_path / "reports" / "run.json")
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["command"] == "holdings"
+        assert data["finished_at"] is not None
+        assert list(data["stages"]) == list(STAGES)
+        assert data["stages"]["parse"] == {"seconds": 0, "count": 0, "bytes": 0, "errors": 0}
+        assert data["counters"] == {"holdings_extracted": 2}
+
+    def test_prometheus_textfile(self, tmp_path: Path) -> None:
+        report = SyncReport("documents")
+        with report.stage("fetch") as stage:
+            stage.count += 5
+        report.counters["new_filings"] = 4
+        report.finish()
+
+        path = report.write_prometheus(tmp_path / "edinet_sync.prom")
+
+        text = path.read_text(encoding="utf-8")
+        assert "# TYPE edinet_sync_stage_seconds gauge" in text
+        assert 'edinet_sync_stage_items{command="documents",stage="fetch"} 5' in text
+        assert 'edinet_sync_records{command="documents",kind="new_filings"} 4' in text
+        assert 'edinet_sync_duration_seconds{command="documents"}' in text
+        # 一時ファイルは残らない
+        assert [p.name for p in tmp_path.iterdir()] == ["edinet_sync.prom"]
+
+
+class TestSyncDocumentsReport:
+    """sync_documentsの段階別計測"""
+
+    def test_stages_from_cached_lists(self, sync_session: sessionmaker[Session]) -> None:
+        cache_dir = Path(sync_edinet.CACHE_DIR)
+        cache_dir.mkdir()
+        results = [
+            _document("S1000001", "E00001"),
+            _document("S1000002", "E00001"),
+            _document("S1000003", "E00002"),
+            _document("S1000004", "E00003", ordinance="010"),
+        ]
+        (cache_dir / f"list_{sync_edinet.datetime.now():%Y-%m-%d}.json").write_text(
+            json.dumps({"results": results}), encoding="utf-8"
+        )
+        report = SyncReport("documents")
+
+        sync_edinet.sync_documents(days=0, report=report)
+
+        stages = report.stages
+        assert stages["cache_read"].count == 1
+        assert stages["cache_read"].bytes > 0
+        assert stages["fetch"].count == 0
+        assert stages["filter"].count == 4
+        assert stages["resolve"].count == 3
+        assert stages["insert"].count == 3
+        assert stages["commit"].seconds > 0
+        assert report.counters == {"new_filers": 2, "new_issuers": 1, "new_filings": 3}
+        with sync_session() as db:
+            assert db.scalar(select(func.count()).select_from(Filing)) == 3
@@ -0,0 +1,120 @@
+"""
+一覧の総数（メモ化・集計テーブル・推定）のテスト
+"""
+
+import asyncio
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend import crud
+from backend.models import Issuer
+from backend.totals import TotalsMemo, normalize_search, search_key
+
+
+def test_normalize_search() -> None:
+    """前後・連続する空白を正規化し、空の検索語はNoneになるか"""
+    assert normalize_search("  光通信   株式会社 ") == "光通信 株式会社"
+    assert normalize_search("   ") is None
+    assert normalize_search(None) is None
+    assert search_key("ABC 株式会社") == search_key("abc 株式会社")
+
+
+def test_memo_evicts_least_recently_used() -> None:
+    """上限を超えると最も古く参照されたキーから捨てられるか"""
+    memo = TotalsMemo(max_entries=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == 1
+    memo.put("c", 3)
+    assert memo.get("b") is None
+    assert memo.get("a") == 1
+    assert memo.get("c") == 3
+
+
+async def test_filtered_total_memoized_per_version(db: AsyncSession) -> None:
+    """検索ありの総数がデータバージョンごとにメモ化されるか"""
+    db.add_all([Issuer(edinet_code=f"E7000{i}", name=f"メモ銘柄{i}") for i in range(3)])
+    await db.commit()
+
+    data = await crud.get_issuers(db, search=" メモ銘柄 ", limit=1, data_version=1)
+    assert data["total"] == 3
+
+    db.add(Issuer(edinet_code="E70009", name="メモ銘柄9"))
+    await db.commit()
+
+    # 同じバージョンならメモの値、バージョンが変われば数え直す
+    data = await crud.get_issuers(db, search="メモ銘柄", limit=1, data_version=1)
+    assert data["total"] == 3
+    data = await crud.get_issuers(db, search="メモ銘柄", limit=1, data_version=2)
+    assert data["total"] == 4
+    data = await crud.get_issuers(db, search="メモ銘柄", limit=1)
+    assert data["total"] == 4
+
+
+async def test_filer_issuers_total_from_summary(
+    db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """検索なしの保有銘柄数はfiler_statsから求め、範囲外のページでも返るか"""
+    filer_id = sample_data["filer"].id
+
+    data = await crud.get_issuers_by_filer(db, filer_id, skip=50)
+    assert data is not None
+    assert data["items"] == []
+    assert data["total"] == 1
+
+    data = await crud.get_issuers_by_filer(db, filer_id, search="テスト", data_version=1)
+    assert data is not None
+    assert data["total"] == 1
+
+
+async def test_estimate_falls_back_to_exact(
+    client: AsyncClient, sample_data: dict[str, Any]
+) -> None:
+    """統計のないDBではtotal=estimateでも正確な件数を返し、推定でないことを示すか"""
+    response = await client.get("/api/filers", params={"total": "estimate"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["total_estimated"] is False
+
+    response = await client.get("/api/filers")
+    assert "total_estimated" not in response.json()
+
+
+async def test_total_on_connection_bound_session(
+    db: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """接続に結び付いたセッションでは総数とページを順に取得するか（並行に使わない）"""
+    db.add_all([Issuer(edinet_code=f"E7100{i}", name=f"接続銘柄{i}") for i in range(3)])
+    await db.commit()
+    assert isinstance(db.bind, AsyncEngine)
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async with db.bind.connect() as conn:
+        session = AsyncSession(bind=conn)
+        execute = session.execute
+
+        async def tracked_execute(*args: Any, **kwargs: Any) -> Any:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                await asyncio.sleep(0)
+                return await execute(*args, **kwargs)
+            finally:
+                in_flight -= 1
+
+        monkeypatch.setattr(session, "execute", tracked_execute)
+        issuers = await crud.get_issuers(session, search="接続銘柄", limit=2)
+        filers = await crud.get_filers(session, limit=2)
+        await session.close()
+
+    assert max_in_flight == 1
+    assert issuers["total"] == 3
+    assert len(issuers["items"]) == 2
+    assert filers["total"] == len(filers["items"]) == 0
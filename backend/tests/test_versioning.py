@@ -0,0 +1,107 @@
+"""
+データバージョン・条件付きGET（ETag）のテスト
+"""
+
+from datetime import UTC, datetime
+from typing import Any
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import versioning
+from backend.models import Filer, Filing, HoldingDetail
+
+
+async def test_commit_bumps_touched_scopes(db: AsyncSession, sample_data: dict[str, Any]) -> None:
+    """コミットで変更された提出者・発行体とglobalの世代番号が上がるか"""
+    filer_scope = versioning.filer_scope(sample_data["filer"].id)
+    issuer_scope = versioning.issuer_scope(sample_data["issuer"].id)
+
+    other = Filer(edinet_code="E00001", name="別の提出者")
+    db.add(other)
+    await db.commit()
+    other_scope = versioning.filer_scope(other.id)
+
+    before = await versioning.get_data_versions(
+        db, [versioning.GLOBAL_SCOPE, filer_scope, issuer_scope, other_scope]
+    )
+    assert before[filer_scope] >= 1
+    assert before[issuer_scope] >= 1
+
+    # HoldingDetailの追加は親Filingの提出者・発行体に反映される
+    db.add(HoldingDetail(filing_id=sample_data["filing"].id, shares_held=1, holding_ratio=6.0))
+    await db.commit()
+
+    after = await versioning.get_data_versions(
+        db, [versioning.GLOBAL_SCOPE, filer_scope, issuer_scope, other_scope]
+    )
+    assert after[versioning.GLOBAL_SCOPE] == before[versioning.GLOBAL_SCOPE] + 1
+    assert after[filer_scope] == before[filer_scope] + 1
+    assert after[issuer_scope] == before[issuer_scope] + 1
+    assert after[other_scope] == before[other_scope]
+
+
+async def test_get_returns_etag_and_not_modified(
+    client: AsyncClient, sample_data: dict[str, Any]
+) -> None:
+    """ETagを返し、If-None-Matchが一致すれば304を返すか"""
+    filer_id = sample_data["filer"].id
+
+    response = await client.get(f"/api/filers/{filer_id}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('"')
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    cached = await client.get(f"/api/filers/{filer_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+
+
+async def test_etag_changes_after_ingest(
+    client: AsyncClient, db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """データ追加後は古いETagで304にならないか"""
+    filer_id = sample_data["filer"].id
+    path = f"/api/filers/{filer_id}/issuers"
+
+    etag = (await client.get(path)).headers["ETag"]
+
+    db.add(
+        Filing(
+            doc_id="S_TEST_02",
+            filer_id=filer_id,
+            issuer_id=sample_data["issuer"].id,
+            submit_date=datetime.now(UTC),
+        )
+    )
+    await db.commit()
+
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["items"][0]["filing_count"] == 2
+
+
+def test_etag_matches() -> None:
+    """If-None-Matchの複数指定・弱いETag・ワイルドカードを扱えるか"""
+    assert versioning.etag_matches('"a", W/"b"', '"b"')
+    assert versioning.etag_matches("*", '"b"')
+    assert not versioning.etag_matches('"a"', '"b"')
+    assert not versioning.etag_matches(None, '"b"')
+
+
+async def test_pop_changes_returns_touched_ids(
+    db: AsyncSession, sample_data: dict[str, Any]
+) -> None:
+    """コミットで変更されたIDを同期後処理向けに取り出せるか"""
+    versioning.pop_changes(db)
+
+    db.add(HoldingDetail(filing_id=sample_data["filing"].id, shares_held=2, holding_ratio=7.0))
+    await db.commit()
+
+    changes = versioning.pop_changes(db)
+    assert changes.filer_ids == {sample_data["filer"].id}
+    assert changes.issuer_ids == {sample_data["issuer"].id}
+    assert not versioning.pop_changes(db)
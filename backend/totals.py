@@ -0,0 +1,162 @@
+"""
+一覧APIの総数（total）の取得戦略
+
+ページングのたびに件数を数え直さないよう、総数は次の順で求める。
+
+- 集計テーブルに件数があるもの（提出者ごとの保有銘柄数）はその値を使う
+- それ以外は（一覧の種類, データバージョン, 正規化した検索語）ごとにメモ化する。
+  データバージョンは取り込みのコミットで上がるため、同期までは数え直さない
+- total=estimateの場合はPostgreSQLのプランナ統計（EXPLAINの推定行数）を返す。
+  統計のないDB（SQLite）では正確な件数にフォールバックする
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Literal
+
+from sqlalchemy import Result, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend.search import normalize_text
+
+TotalMode = Literal["exact", "estimate"]
+
+_MAX_ENTRIES = 4096
+
+
+def normalize_search(search: str | None) -> str | None:
+    """検索語を正規化（前後の空白を除き、連続する空白を1つにまとめる。空ならNone）"""
+    if search is None:
+        return None
+    normalized = " ".join(search.split())
+    return normalized or None
+
+
+def search_key(search: str | None) -> str:
+    """メモ化に使う検索語のキー（検索結果が同じになる表記をまとめる）"""
+    return normalize_text(search)
+
+
+class TotalsMemo:
+    """総数のメモ（件数上限付きLRU、プロセス内）"""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, int] = OrderedDict()
+
+    def get(self, key: Hashable) -> int | None:
+        total = self._entries.get(key)
+        if total is not None:
+            self._entries.move_to_end(key)
+        return total
+
+    def put(self, key: Hashable, total: int) -> None:
+        self._entries[key] = total
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+memo = TotalsMemo()
+
+
+async def scalar_on_own_connection(db: AsyncSession, stmt: Select) -> Any:
+    """
+    セッションとは別のプール接続で1つの値を取得
+
+    セッションがエンジンではなく接続に結び付いている場合はセッション上で実行する
+    （その場合はセッションのクエリと並行に実行できない。execute_with_totalを参照）。
+    """
+    if not isinstance(db.bind, AsyncEngine):
+        return (await db.execute(stmt)).scalar_one()
+    async with db.bind.connect() as conn:
+        return (await conn.execute(stmt)).scalar_one()
+
+
+async def estimate_rows(db: AsyncSession, rows_stmt: Select) -> int | None:
+    """
+    プランナの推定行数を返す（PostgreSQL以外はNone）
+
+    EXPLAINは実行計画を作るだけなので、検索条件付きでもテーブルを走査しない。
+    """
+    if not isinstance(db.bind, AsyncEngine) or db.bind.dialect.name != "postgresql":
+        return None
+
+    compiled = rows_stmt.compile(dialect=db.bind.dialect)
+    params: Any = (
+        tuple(compiled.params[name] for name in compiled.positiontup)
+        if compiled.positiontup is not None
+        else compiled.params
+    )
+    async with db.bind.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", params)
+        plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def resolve_total(
+    db: AsyncSession,
+    rows_stmt: Select,
+    key: Hashable | None = None,
+    mode: TotalMode = "exact",
+) -> tuple[int, bool]:
+    """
+    一覧の総数を求める
+
+    Args:
+        db: セッション（件数は別のプール接続で数える）
+        rows_stmt: 一覧の対象行を返すSELECT（ORDER BY・LIMITなし）
+        key: メモ化のキー（データバージョンを含めること）。Noneなら毎回数える
+        mode: "estimate"ならプランナの推定値を優先する
+
+    Returns:
+        tuple[int, bool]: (総数, 推定値かどうか)
+    """
+    if mode == "estimate":
+        estimate = await estimate_rows(db, rows_stmt)
+        if estimate is not None:
+            return estimate, True
+
+    if key is not None:
+        cached = memo.get(key)
+        if cached is not None:
+            return cached, False
+
+    count_stmt = select(func.count()).select_from(rows_stmt.order_by(None).subquery())
+    total: int = await scalar_on_own_connection(db, count_stmt)
+    if key is not None:
+        memo.put(key, total)
+    return total, False
+
+
+async def execute_with_total(
+    db: AsyncSession,
+    stmt: Select,
+    rows_stmt: Select,
+    key: Hashable | None = None,
+    mode: TotalMode = "exact",
+) -> tuple[Result, int, bool]:
+    """
+    一覧のページを取得し、あわせて総数を求める
+
+    総数を別のプール接続で数えられる場合は、ページの取得と並行に実行する。
+    セッション上で数える場合はAsyncSessionを並行に使えないため、順に実行する。
+
+    Returns:
+        tuple[Result, int, bool]: (ページの結果, 総数, 推定値かどうか)
+    """
+    if isinstance(db.bind, AsyncEngine):
+        (total, estimated), result = await asyncio.gather(
+            resolve_total(db, rows_stmt, key, mode), db.execute(stmt)
+        )
+    else:
+        total, estimated = await resolve_total(db, rows_stmt, key, mode)
+        result = await db.execute(stmt)
+    return result, total, estimated
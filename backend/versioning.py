@@ -0,0 +1,272 @@
+"""
+データバージョン管理
+
+書き込みセッションのコミット時に変更された提出者・発行体を追跡し、
+data_versionsテーブルの世代番号を更新する。APIはこの世代番号から
+ETagを生成し、条件付きGET（If-None-Match）にSQLを実行せず304で応答する。
+
+変更追跡はSessionクラスのイベントで行うため、sync_edinet.pyだけでなく
+scripts配下のスクリプトやAPIのPOSTによる書き込みも対象になる。
+ただしCoreのbulk DML（delete()/update()文）はORMのflushを経由しないため追跡されない。
+"""
+
+import hashlib
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import chain
+from typing import Any, TypeVar
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.models import DataVersion, Filer, FilerCode, Filing, HoldingDetail, Issuer
+
+GLOBAL_SCOPE = "global"
+
+# レスポンスの形式を変更した場合はこの値を上げて既存のETagを無効化する
+ETAG_SCHEMA = 1
+
+# ブラウザには保存させるが、利用前に必ずETagで再検証させる
+CACHE_CONTROL = "no-cache"
+
+# コミット時に変更内容を受け取るフック（集計テーブルの更新など）
+CommitHook = Callable[[Session, "ChangeSet"], None]
+_commit_hooks: list[CommitHook] = []
+
+_T = TypeVar("_T", int, tuple[int, int])
+
+_PENDING_KEY = "edinet_pending_changes"
+_CHANGES_KEY = "edinet_changes"
+_CHUNK_SIZE = 500
+
+# ON CONFLICTによるupsertに対応した方言
+_UPSERT_INSERTS: dict[str, Callable[..., Any]] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def filer_scope(filer_id: int) -> str:
+    """提出者単位のスコープ名"""
+    return f"filer:{filer_id}"
+
+
+def issuer_scope(issuer_id: int) -> str:
+    """発行体単位のスコープ名"""
+    return f"issuer:{issuer_id}"
+
+
+@dataclass
+class ChangeSet:
+    """コミットによって内容が変わった提出者・発行体のID"""
+
+    filer_ids: set[int] = field(default_factory=set)
+    issuer_ids: set[int] = field(default_factory=set)
+    # 報告書・保有詳細が変更された（提出者ID, 発行体ID）の組
+    positions: set[tuple[int, int]] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.filer_ids or self.issuer_ids)
+
+    def update(self, other: "ChangeSet") -> None:
+        self.filer_ids |= other.filer_ids
+        self.issuer_ids |= other.issuer_ids
+        self.positions |= other.positions
+
+    def scopes(self) -> list[str]:
+        """世代番号を上げるスコープ（globalは常に含む）"""
+        return (
+            [GLOBAL_SCOPE]
+            + [filer_scope(i) for i in sorted(self.filer_ids)]
+            + [issuer_scope(i) for i in sorted(self.issuer_ids)]
+        )
+
+
+@dataclass
+class _PendingChanges:
+    """flush済み・未コミットの変更（コミット時にChangeSetへ解決する）"""
+
+    filer_ids: set[int] = field(default_factory=set)
+    issuer_ids: set[int] = field(default_factory=set)
+    positions: set[tuple[int, int]] = field(default_factory=set)
+    filing_ids: set[int] = field(default_factory=set)  # HoldingDetailの親Filing
+    renamed_filer_ids: set[int] = field(default_factory=set)
+    renamed_issuer_ids: set[int] = field(default_factory=set)
+
+
+def register_commit_hook(hook: CommitHook) -> CommitHook:
+    """コミット直前に、解決済みの変更を受け取る関数を登録する（デコレータとして使用）"""
+    _commit_hooks.append(hook)
+    return hook
+
+
+def chunked(ids: Iterable[_T]) -> Iterator[list[_T]]:
+    """IN句のパラメータ数を抑えるためにIDを分割"""
+    items = sorted(ids)
+    for i in range(0, len(items), _CHUNK_SIZE):
+        yield items[i : i + _CHUNK_SIZE]
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context: object) -> None:
+    """flushされたエンティティから影響を受ける提出者・発行体を記録"""
+    pending: _PendingChanges = session.info.setdefault(_PENDING_KEY, _PendingChanges())
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        is_update = obj in session.dirty
+        if is_update and not session.is_modified(obj):
+            continue
+
+        if isinstance(obj, Filing):
+            pending.filer_ids.add(obj.filer_id)
+            if obj.issuer_id is not None:
+                pending.issuer_ids.add(obj.issuer_id)
+                pending.positions.add((obj.filer_id, obj.issuer_id))
+            # 発行体の付け替え・削除では変更前の組も更新対象
+            history = inspect(obj).attrs.issuer_id.history
+            for old_issuer_id in history.deleted or ():
+                if old_issuer_id is not None:
+                    pending.issuer_ids.add(old_issuer_id)
+                    pending.positions.add((obj.filer_id, old_issuer_id))
+        elif isinstance(obj, HoldingDetail):
+            pending.filing_ids.add(obj.filing_id)
+        elif isinstance(obj, Filer):
+            pending.filer_ids.add(obj.id)
+            if is_update:
+                pending.renamed_filer_ids.add(obj.id)
+        elif isinstance(obj, FilerCode):
+            pending.filer_ids.add(obj.filer_id)
+        elif isinstance(obj, Issuer):
+            pending.issuer_ids.add(obj.id)
+            if is_update:
+                pending.renamed_issuer_ids.add(obj.id)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session: Session) -> None:
+    """コミット直前に変更を解決し、世代番号を更新"""
+    # 未flushの変更も追跡対象に含める
+    session.flush()
+
+    pending: _PendingChanges | None = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+
+    changes = _resolve_changes(session, pending)
+    if not changes:
+        return
+
+    for hook in _commit_hooks:
+        hook(session, changes)
+    bump_data_versions(session, changes.scopes())
+    session.info.setdefault(_CHANGES_KEY, ChangeSet()).update(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _resolve_changes(session: Session, pending: _PendingChanges) -> ChangeSet:
+    """保有詳細・名称変更を、表示内容が変わる提出者・発行体へ展開"""
+    changes = ChangeSet(set(pending.filer_ids), set(pending.issuer_ids), set(pending.positions))
+
+    for chunk in chunked(pending.filing_ids):
+        rows = session.execute(
+            select(Filing.filer_id, Filing.issuer_id).where(Filing.id.in_(chunk))
+        ).all()
+        for filer_id, issuer_id in rows:
+            changes.filer_ids.add(filer_id)
+            if issuer_id is not None:
+                changes.issuer_ids.add(issuer_id)
+                changes.positions.add((filer_id, issuer_id))
+
+    # 銘柄名は保有者の銘柄一覧に、提出者名は銘柄の保有者一覧に表示される
+    for chunk in chunked(pending.renamed_issuer_ids):
+        filer_stmt = select(Filing.filer_id).where(Filing.issuer_id.in_(chunk)).distinct()
+        changes.filer_ids.update(session.execute(filer_stmt).scalars())
+
+    for chunk in chunked(pending.renamed_filer_ids):
+        issuer_stmt = (
+            select(Filing.issuer_id)
+            .where(Filing.filer_id.in_(chunk))
+            .where(Filing.issuer_id.isnot(None))
+            .distinct()
+        )
+        changes.issuer_ids.update(i for i in session.execute(issuer_stmt).scalars() if i)
+
+    return changes
+
+
+def bump_data_versions(session: Session, scopes: Sequence[str]) -> None:
+    """指定スコープの世代番号を1つ上げる（未登録のスコープは1から開始）"""
+    upsert_insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    now = datetime.now(UTC)
+
+    for i in range(0, len(scopes), _CHUNK_SIZE):
+        chunk = list(scopes[i : i + _CHUNK_SIZE])
+        rows = [{"scope": s, "version": 1, "updated_at": now} for s in chunk]
+
+        if upsert_insert is not None:
+            insert_stmt = upsert_insert(DataVersion).values(rows)
+            session.execute(
+                insert_stmt.on_conflict_do_update(
+                    index_elements=[DataVersion.scope],
+                    set_={
+                        "version": DataVersion.version + 1,
+                        "updated_at": insert_stmt.excluded.updated_at,
+                    },
+                )
+            )
+            continue
+
+        existing = set(
+            session.execute(select(DataVersion.scope).where(DataVersion.scope.in_(chunk))).scalars()
+        )
+        if existing:
+            session.execute(
+                update(DataVersion)
+                .where(DataVersion.scope.in_(existing))
+                .values(version=DataVersion.version + 1, updated_at=now)
+            )
+        new_rows = [row for row in rows if row["scope"] not in existing]
+        if new_rows:
+            session.execute(insert(DataVersion), new_rows)
+
+
+def pop_changes(session: Session | AsyncSession) -> ChangeSet:
+    """このセッションでコミット済みの変更を取り出す（取り出した分はクリアされる）"""
+    changes: ChangeSet = session.info.pop(_CHANGES_KEY, None) or ChangeSet()
+    return changes
+
+
+async def get_data_versions(db: AsyncSession, scopes: Sequence[str]) -> dict[str, int]:
+    """スコープごとの世代番号を1クエリで取得（未登録は0）"""
+    stmt = select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(scopes))
+    result = await db.execute(stmt)
+
+    versions = dict.fromkeys(scopes, 0)
+    for scope, version in result.all():
+        versions[scope] = version
+    return versions
+
+
+def build_etag(versions: dict[str, int]) -> str:
+    """世代番号から強いETagを生成"""
+    payload = ";".join(f"{scope}={version}" for scope, version in versions.items())
+    digest = hashlib.sha1(f"{ETAG_SCHEMA}|{payload}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Matchヘッダが指定ETagに一致するか（弱い比較）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -66,11 +66,26 @@ export interface IssuerOwnershipResponse {
   }>;
 }
 
+export interface Suggestion {
+  kind: "filer" | "issuer";
+  id: number;
+  name: string;
+  edinet_code: string;
+  sec_code: string | null;
+}
+
+export interface SuggestResponse {
+  items: Suggestion[];
+  version: number;
+}
+
 export interface PaginatedResponse<T> {
   items: T[];
   total: number;
+  total_estimated?: boolean;
   skip: number;
   limit: number;
+  next_cursor?: string | null;
 }
 
 // APIクライアントクラス
@@ -143,6 +158,16 @@ class ApiClient {
     return this.fetch<IssuerOwnershipResponse>(`/api/issuers/${id}/ownerships`);
   }
 
+  // === Search ===
+  async suggest(
+    q: string,
+    limit: number = 10,
+    kind?: "filer" | "issuer"
+  ): Promise<SuggestResponse> {
+    const query = this.buildQueryString({ q, limit, kind });
+    return this.fetch<SuggestResponse>(`/api/search/suggest${query}`);
+  }
+
   // === History ===
   async getIssuerHistory(
     filerId: number,
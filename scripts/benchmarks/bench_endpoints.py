@@ -0,0 +1,312 @@
+"""
+主要エンドポイントのレイテンシ・スループットを計測するベンチマーク。
+
+httpxのASGITransportでアプリをプロセス内で呼び出し、指定した並列度で
+一覧・提出者の銘柄一覧・銘柄の保有者一覧・履歴にリクエストを送ります。
+APIキャッシュはRedisの代わりにインメモリのバックエンドを使います（--cache off で無効）。
+
+エンドポイントごとにp50/p95/p99レイテンシ・スループット・1リクエストあたりの
+クエリ数を表示し、次の場合に終了コード1で終了します。
+
+- endpoint_budgets.json の予算（p95のミリ秒・1リクエストあたりの最大クエリ数）を超えた
+- --baseline で指定した過去の計測結果よりp95が --tolerance を超えて悪化した、
+  またはクエリ数が増えた
+
+データは generate_dataset.py で作成したDBを使います（--generate で --database-url に
+明示したDBのテーブルを作り直して生成）。
+
+例:
+    python scripts/benchmarks/bench_endpoints.py --generate \\
+        --database-url sqlite+aiosqlite:///data/perf.db
+    python scripts/benchmarks/bench_endpoints.py --save-baseline /tmp/before.json
+    python scripts/benchmarks/bench_endpoints.py --baseline /tmp/before.json --concurrency 16
+"""
+
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import generate_dataset
+import httpx
+
+BUDGETS_PATH = Path(__file__).with_name("endpoint_budgets.json")
+
+# 計測対象（URLのテンプレート）
+ENDPOINTS = {
+    "filers": "/api/filers?limit=50&skip={skip}",
+    "filer_issuers": "/api/filers/{filer_id}/issuers",
+    "issuer_ownerships": "/api/issuers/{issuer_id}/ownerships",
+    "history": "/api/filers/{filer_id}/issuers/{issuer_id}/history",
+}
+
+# リクエストごとのクエリ数（ASGIアプリ内のタスクにも引き継がれる）
+_query_counter: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar(
+    "query_counter", default=None
+)
+
+
+@dataclass
+class Result:
+    """1エンドポイントの計測結果"""
+
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> dict[str, float]:
+        cuts = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return {
+            "p50_ms": round(cuts[49], 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "rps": round(len(self.latencies) / self.elapsed, 1),
+            "queries": round(statistics.mean(self.queries), 2),
+            "max_queries": max(self.queries),
+        }
+
+
+def count_queries(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+async def load_targets(db, pool: int) -> dict[str, list[str]]:
+    """
+    各エンドポイントのURL候補
+
+    報告書の多い提出者・保有者の多い銘柄・系列の長い組を優先し、
+    大口のデータで遅くなるクエリを計測対象に含める。
+    """
+    from sqlalchemy import func, select
+
+    from backend.models import CurrentPosition, FilerStats
+
+    filer_ids = await db.scalars(
+        select(FilerStats.filer_id).order_by(FilerStats.filing_count.desc()).limit(pool)
+    )
+    issuer_ids = await db.scalars(
+        select(CurrentPosition.issuer_id)
+        .group_by(CurrentPosition.issuer_id)
+        .order_by(func.count().desc())
+        .limit(pool)
+    )
+    pairs = await db.execute(
+        select(CurrentPosition.filer_id, CurrentPosition.issuer_id)
+        .order_by(CurrentPosition.filing_count.desc())
+        .limit(pool)
+    )
+
+    return {
+        "filers": [ENDPOINTS["filers"].format(skip=page * 50) for page in range(10)],
+        "filer_issuers": [ENDPOINTS["filer_issuers"].format(filer_id=i) for i in filer_ids],
+        "issuer_ownerships": [
+            ENDPOINTS["issuer_ownerships"].format(issuer_id=i) for i in issuer_ids
+        ],
+        "history": [
+            ENDPOINTS["history"].format(filer_id=filer_id, issuer_id=issuer_id)
+            for filer_id, issuer_id in pairs
+        ],
+    }
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    urls: list[str],
+    requests: int,
+    concurrency: int,
+    rng: random.Random,
+) -> Result:
+    """urlsからランダムに選んだrequests件を、concurrency並列で送る"""
+    queue = [rng.choice(urls) for _ in range(requests)]
+    result = Result()
+
+    async def worker() -> None:
+        while queue:
+            url = queue.pop()
+            counter = [0]
+            _query_counter.set(counter)
+            started = time.perf_counter()
+            response = await client.get(url)
+            result.latencies.append((time.perf_counter() - started) * 1000)
+            result.queries.append(counter[0])
+            if response.status_code != 200:
+                raise RuntimeError(f"{url}: {response.status_code} {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.create_task(worker()) for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def check(
+    name: str,
+    summary: dict[str, float],
+    budgets: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float,
+) -> list[str]:
+    """予算・ベースラインとの比較（違反内容のリスト）"""
+    failures = []
+    budget = budgets.get(name, {})
+    if "p95_ms" in budget and summary["p95_ms"] > budget["p95_ms"]:
+        failures.append(f"{name}: p95 {summary['p95_ms']}ms > budget {budget['p95_ms']}ms")
+    if "queries" in budget and summary["max_queries"] > budget["queries"]:
+        failures.append(
+            f"{name}: {summary['max_queries']} queries/request > budget {budget['queries']}"
+        )
+
+    previous = baseline.get(name)
+    if previous:
+        limit = previous["p95_ms"] * (1 + tolerance)
+        if summary["p95_ms"] > limit:
+            failures.append(
+                f"{name}: p95 {summary['p95_ms']}ms > baseline {previous['p95_ms']}ms "
+                f"+{tolerance:.0%}"
+            )
+        if summary["max_queries"] > previous["max_queries"]:
+            failures.append(
+                f"{name}: {summary['max_queries']} queries/request > "
+                f"baseline {previous['max_queries']}"
+            )
+    return failures
+
+
+async def benchmark(args: argparse.Namespace) -> int:
+    # DATABASE_URL・SNAPSHOT_DIRを設定してからアプリを読み込む
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from sqlalchemy import event, func, select
+
+    from backend.cache import CACHE_PREFIX, request_key_builder
+    from backend.database import AsyncSessionLocal, async_engine
+    from backend.main import app, limiter
+    from backend.models import Filer
+
+    limiter.enabled = False
+    FastAPICache.init(
+        InMemoryBackend(),
+        prefix=CACHE_PREFIX,
+        key_builder=request_key_builder,
+        enable=args.cache == "memory",
+    )
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_queries)
+
+    async with AsyncSessionLocal() as db:
+        if not await db.scalar(select(func.count()).select_from(Filer)):
+            await async_engine.dispose()
+            sys.exit("The database is empty; run with --generate or generate_dataset.py")
+        targets = await load_targets(db, args.pool)
+
+    budgets = json.loads(BUDGETS_PATH.read_text(encoding="utf-8"))
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else {}
+
+    rng = random.Random(args.seed)
+    summaries = {}
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'endpoint':18s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'req/s':>8s} {'queries':>8s}")
+        for name in args.endpoints:
+            urls = targets[name]
+            if not urls:
+                print(f"{name:18s} (no data)")
+                continue
+            await run_endpoint(client, urls, args.warmup, args.concurrency, rng)
+            result = await run_endpoint(client, urls, args.requests, args.concurrency, rng)
+            summary = result.summary()
+            summaries[name] = summary
+            failures += check(name, summary, budgets, baseline, args.tolerance)
+            print(
+                f"{name:18s} {summary['p50_ms']:7.2f}ms {summary['p95_ms']:7.2f}ms "
+                f"{summary['p99_ms']:7.2f}ms {summary['rps']:8.1f} {summary['queries']:8.2f}"
+            )
+
+    await async_engine.dispose()
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(
+            json.dumps(summaries, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+        print(f"Saved baseline to {args.save_baseline}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エンドポイントのレイテンシ計測")
+    parser.add_argument(
+        "--database-url",
+        help="計測対象のDB（デフォルト: 環境変数DATABASE_URL。--generate時は指定必須）",
+    )
+    parser.add_argument(
+        "--generate",
+        action="store_true",
+        help="計測前に--database-urlのDBのテーブルを削除して合成データを生成",
+    )
+    parser.add_argument("--filers", type=int, default=500, help="--generate時の提出者数")
+    parser.add_argument("--issuers", type=int, default=5000, help="--generate時の発行体数")
+    parser.add_argument("--filings", type=int, default=100_000, help="--generate時の報告書数")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="エンドポイントごとの計測回数")
+    parser.add_argument("--warmup", type=int, default=50, help="計測前に送るリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=8, help="並列リクエスト数")
+    parser.add_argument("--pool", type=int, default=50, help="エンドポイントごとのURL候補数")
+    parser.add_argument(
+        "--cache", choices=["memory", "off"], default="memory", help="APIキャッシュ"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--baseline", help="比較する過去の計測結果（JSON）")
+    parser.add_argument("--save-baseline", help="計測結果の保存先（JSON）")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="ベースラインからのp95悪化の許容率"
+    )
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        # 既存のテーブルを削除するため、環境変数（アプリの接続先）は使わない
+        if args.generate:
+            parser.error("--generate requires an explicit --database-url")
+        args.database_url = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///data/perf.db")
+
+    if args.generate:
+        asyncio.run(
+            generate_dataset.generate(
+                argparse.Namespace(
+                    database_url=args.database_url,
+                    filers=args.filers,
+                    issuers=args.issuers,
+                    filings=args.filings,
+                    seed=args.seed,
+                    batch_size=20000,
+                    drop=True,
+                )
+            )
+        )
+
+    os.environ["DATABASE_URL"] = args.database_url
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        # 事前生成スナップショットを経由させない
+        os.environ["SNAPSHOT_DIR"] = snapshot_dir
+        sys.exit(asyncio.run(benchmark(args)))
+
+
+if __name__ == "__main__":
+    main()
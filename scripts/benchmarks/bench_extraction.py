@@ -0,0 +1,154 @@
+"""
+保有詳細の抽出（CSVのZIP → 保有株数・保有割合・保有目的）の速度と正確さを
+パーサー実装ごとに計測するベンチマーク。
+
+edinet_corpus.pyの合成コーパス（またはその書き出し先ディレクトリ）を各パーサーで
+処理し、1秒あたりの処理件数・ピークメモリ（tracemalloc）・項目ごとの正解率と、
+ケースごとの不一致件数を表示します。
+
+パーサーは "名前=モジュール:関数" で追加できます（関数はZIPのbytesを受け取り、
+shares_held・holding_ratio・purposeを持つdictを返す）。
+
+例:
+    python scripts/benchmarks/bench_extraction.py --count 300
+    python scripts/benchmarks/bench_extraction.py --corpus /tmp/edinet_corpus \\
+        --parser fast=backend.fast_parser:extract --min-accuracy 1.0
+"""
+
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import argparse
+import contextlib
+import importlib
+import io
+import math
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import edinet_corpus
+from edinet_corpus import Document
+
+Parser = Callable[[bytes], Any]
+
+# 標準で計測するパーサー
+PARSERS = {"pandas": "backend.sync_edinet:extract_holding_data_from_csv"}
+
+FIELDS = ("shares_held", "holding_ratio", "purpose")
+
+
+def load_parser(spec: str) -> Parser:
+    """「モジュール:関数」の指定からパーサーを読み込む"""
+    module_name, function_name = spec.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def field_matches(field: str, actual: Any, expected: Any) -> bool:
+    if field == "holding_ratio" and actual is not None and expected is not None:
+        return math.isclose(actual, expected, abs_tol=1e-6)
+    return actual == expected
+
+
+def run_parser(parser: Parser, documents: Sequence[Document]) -> list[Any]:
+    # パーサーのエラー出力は計測の邪魔になるので捨てる
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [parser(document.content) for document in documents]
+
+
+def measure(parser: Parser, documents: Sequence[Document], repeat: int) -> dict[str, Any]:
+    """処理速度（最良値）・ピークメモリ・正解率"""
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = run_parser(parser, documents)
+        best = min(best, time.perf_counter() - started)
+
+    # tracemallocは処理を遅くするため、速度とは別に1回だけ計測する
+    tracemalloc.start()
+    run_parser(parser, documents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    correct = Counter[str]()
+    mismatches = Counter[str]()
+    for document, result in zip(documents, results, strict=True):
+        expected = document.expected
+        ok = True
+        for field in FIELDS:
+            if field_matches(field, result[field], getattr(expected, field)):
+                correct[field] += 1
+            else:
+                ok = False
+        if not ok:
+            mismatches[expected.case] += 1
+
+    return {
+        "per_second": len(documents) / best,
+        "peak_mb": peak / 1024 / 1024,
+        "accuracy": {field: correct[field] / len(documents) for field in FIELDS},
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="保有詳細の抽出の速度・正確さの計測")
+    parser.add_argument("--corpus", help="edinet_corpus.pyの出力ディレクトリ（省略時は生成）")
+    parser.add_argument("--count", type=int, default=300, help="生成するファイル数")
+    parser.add_argument("--seed", type=int, default=42, help="コーパスの乱数シード")
+    parser.add_argument("--repeat", type=int, default=3, help="速度の計測回数")
+    parser.add_argument(
+        "--parser",
+        action="append",
+        default=[],
+        metavar="NAME=MODULE:FUNCTION",
+        help="追加で計測するパーサー",
+    )
+    parser.add_argument(
+        "--min-accuracy", type=float, help="いずれかの項目の正解率がこれを下回ったら失敗"
+    )
+    args = parser.parse_args()
+
+    if args.corpus:
+        documents = edinet_corpus.read_corpus(Path(args.corpus))
+    else:
+        documents = list(edinet_corpus.generate_corpus(args.count, args.seed))
+    cases = Counter(document.expected.case for document in documents)
+    size = sum(len(document.content) for document in documents) / len(documents)
+    print(f"Corpus: {len(documents)} documents, {size / 1024:.1f} KiB average, {dict(cases)}")
+
+    specs = dict(PARSERS)
+    for option in args.parser:
+        name, spec = option.split("=", 1)
+        specs[name] = spec
+
+    failed = False
+    print(
+        f"{'parser':12s} {'docs/s':>9s} {'peak MiB':>9s} "
+        + " ".join(f"{field:>13s}" for field in FIELDS)
+    )
+    for name, spec in specs.items():
+        stats = measure(load_parser(spec), documents, args.repeat)
+        accuracy = stats["accuracy"]
+        print(
+            f"{name:12s} {stats['per_second']:9.1f} {stats['peak_mb']:9.1f} "
+            + " ".join(f"{accuracy[field]:13.1%}" for field in FIELDS)
+        )
+        if stats["mismatches"]:
+            print(f"{'':12s} mismatches by case: {dict(stats['mismatches'])}")
+        if args.min_accuracy is not None and min(accuracy.values()) < args.min_accuracy:
+            failed = True
+
+    if failed:
+        sys.exit(f"Accuracy below {args.min_accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+一覧レスポンスのJSONシリアライズ速度を、通常経路（Pydantic + jsonable_encoder）と
+FAST_JSON経路（構造体 + orjson）で比較するベンチマーク。
+インメモリSQLiteに合成データを作り、crudの実際の行で両経路の出力が
+バイト単位で一致することを確認してから計測します。
+
+例:
+    python scripts/benchmarks/bench_serialization.py --rows 100 --repeat 500
+"""
+
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from starlette.responses import JSONResponse
+
+from backend import crud, schemas, serialization
+from backend.models import Base, Filer, FilerCode, FilerStats, Filing, Issuer
+
+
+async def load_rows(count: int) -> dict[str, tuple[type[BaseModel], list]]:
+    """合成データを作成し、各一覧のcrudが返す行を取得"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        base_date = datetime(2024, 4, 1, 15, 0, tzinfo=UTC)
+        await conn.execute(
+            insert(Filer),
+            [
+                {
+                    "id": i,
+                    "edinet_code": f"E{i:05d}",
+                    "name": f"株式会社テスト{i}",
+                    "sec_code": None,
+                }
+                for i in range(1, count + 1)
+            ],
+        )
+        await conn.execute(
+            insert(FilerCode),
+            [{"filer_id": i, "edinet_code": f"E{i:05d}"} for i in range(1, count + 1)],
+        )
+        await conn.execute(
+            insert(FilerStats),
+            [
+                {
+                    "filer_id": i,
+                    "filing_count": i * 3,
+                    "issuer_count": i,
+                    "latest_filing_date": base_date + timedelta(days=i, microseconds=i),
+                }
+                for i in range(1, count + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Issuer),
+            [
+                {
+                    "id": i,
+                    "edinet_code": f"E9{i:04d}",
+                    "name": f"発行体{i}",
+                    "sec_code": f"{i:04d}0",
+                }
+                for i in range(1, count + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Filing),
+            [
+                {
+                    "doc_id": f"S{i:07d}",
+                    "filer_id": 1,
+                    "issuer_id": i,
+                    "doc_description": "変更報告書（特例対象株券等）",
+                    "submit_date": base_date - timedelta(hours=i),
+                    "csv_flag": True,
+                }
+                for i in range(1, count + 1)
+            ],
+        )
+
+    async with AsyncSession(engine) as db:
+        filers = await crud.get_filers(db, limit=count)
+        issuers = await crud.get_issuers(db, limit=count)
+        filings = await crud.get_filings_by_filer(db, 1, count)
+    await engine.dispose()
+
+    return {
+        "filers": (schemas.FilerResponse, filers["items"]),
+        "issuers": (schemas.IssuerResponse, issuers["items"]),
+        "filings": (schemas.FilingResponse, filings or []),
+    }
+
+
+def render_pydantic(model: type[BaseModel], rows: list) -> bytes:
+    """通常経路: Pydanticモデル → jsonable_encoder → JSONResponse"""
+    content = {"items": [model.model_validate(row) for row in rows], "total": len(rows)}
+    return bytes(JSONResponse(jsonable_encoder(content)).body)
+
+
+def render_fast(model: type[BaseModel], rows: list) -> bytes:
+    """FAST_JSON経路: 構造体 → orjson"""
+    content = {"items": serialization.rows(model, rows), "total": len(rows)}
+    return bytes(serialization.FastJSONResponse(content).body)
+
+
+def measure(func: Callable[[], bytes], repeat: int) -> float:
+    """1回あたりの中央値（ミリ秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一覧レスポンスのシリアライズ速度比較")
+    parser.add_argument("--rows", type=int, default=100, help="1ページの行数")
+    parser.add_argument("--repeat", type=int, default=500, help="計測回数")
+    args = parser.parse_args()
+
+    if serialization.orjson is None:
+        sys.exit("orjson is not installed")
+
+    pages = asyncio.run(load_rows(args.rows))
+
+    print(f"{'endpoint':10s} {'pydantic':>10s} {'orjson':>10s} {'speedup':>8s}")
+    for name, (model, rows) in pages.items():
+        serialization.FAST_JSON = False
+        expected = render_pydantic(model, rows)
+        serialization.FAST_JSON = True
+        actual = render_fast(model, rows)
+        if actual != expected:
+            sys.exit(f"{name}: output differs\n{expected[:300]!r}\n{actual[:300]!r}")
+
+        serialization.FAST_JSON = False
+        slow = measure(lambda m=model, r=rows: render_pydantic(m, r), args.repeat)
+        serialization.FAST_JSON = True
+        fast = measure(lambda m=model, r=rows: render_fast(m, r), args.repeat)
+        print(f"{name:10s} {slow:9.3f}ms {fast:9.3f}ms {slow / fast:7.1f}x")
+
+    print(f"Output identical for {len(pages)} endpoints ({args.rows} rows each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+同期処理（sync_documents → sync_holding_details）のスループットを、
+ローカルのEDINET APIスタブ（fake_edinet.py）に対して計測するベンチマーク。
+
+一時ディレクトリのSQLiteと書類一覧キャッシュを使い、次の3段階を実行します。
+
+1. 書類一覧の同期（キャッシュなし）
+2. 書類一覧の同期（キャッシュあり、2回目の実行）
+3. 保有詳細の同期（CSVのダウンロード・抽出）
+
+段階ごとに処理件数・件数/秒・API呼び出し回数（ステータス別）・書類一覧キャッシュの
+ヒット率・DB書き込み時間（INSERT/UPDATE/DELETEの実行時間とコミット時間）を表示し、
+最後にスタブが返した大量保有報告書のうちDBに登録された割合を表示します。
+API制限対策の待ち時間は0にして計測します。
+
+例:
+    python scripts/benchmarks/bench_sync.py --days 30
+    python scripts/benchmarks/bench_sync.py --latency-ms 50 --error-rate 0.02 --rate 50
+"""
+
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from fake_edinet import FakeEdinet
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+@dataclass
+class DbTimer:
+    """DBへの書き込み（文の実行・コミット）にかかった時間"""
+
+    statements: float = 0.0
+    commits: float = 0.0
+
+    def install(self, engine: Any, session_class: Any) -> None:
+        from sqlalchemy import event
+
+        started: dict[int, float] = {}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(WRITE_STATEMENTS):
+                started[id(cursor)] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            begin = started.pop(id(cursor), None)
+            if begin is not None:
+                self.statements += time.perf_counter() - begin
+
+        commit_started: dict[int, float] = {}
+
+        @event.listens_for(session_class, "before_commit")
+        def before_commit(session):
+            commit_started[id(session)] = time.perf_counter()
+
+        @event.listens_for(session_class, "after_commit")
+        def after_commit(session):
+            begin = commit_started.pop(id(session), None)
+            if begin is not None:
+                self.commits += time.perf_counter() - begin
+
+
+def run_phase(
+    name: str,
+    func: Callable[[], Any],
+    count: Callable[[], int],
+    fake: FakeEdinet,
+    timer: DbTimer,
+    cache_hits: tuple[int, int] | None = None,
+) -> None:
+    """1段階を実行し、結果を1行表示"""
+    calls_before = dict(fake.calls)
+    db_before = (timer.statements, timer.commits)
+    count_before = count()
+
+    started = time.perf_counter()
+    # 同期処理の進捗表示（print・tqdm）は計測結果の邪魔になるので捨てる
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        func()
+    elapsed = time.perf_counter() - started
+
+    processed = count() - count_before
+    calls = {
+        key: value - calls_before.get(key, 0)
+        for key, value in fake.calls.items()
+        if value - calls_before.get(key, 0)
+    }
+    by_status = ", ".join(
+        f"{endpoint} {status}: {number}" for (endpoint, status), number in sorted(calls.items())
+    )
+    hits = f"{cache_hits[0]}/{cache_hits[1]}" if cache_hits else "-"
+    print(
+        f"{name:22s} {elapsed:7.2f}s {processed:7d} {processed / elapsed:9.1f} "
+        f"{sum(calls.values()):6d} {hits:>9s} "
+        f"{(timer.statements - db_before[0]) * 1000:8.1f} {(timer.commits - db_before[1]) * 1000:9.1f}"
+    )
+    if by_status:
+        print(f"{'':22s} {by_status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同期処理のスループット計測")
+    parser.add_argument("--days", type=int, default=30, help="同期する日数")
+    parser.add_argument("--docs-per-day", type=int, default=200, help="平日1日あたりの書類数")
+    parser.add_argument("--holding-share", type=float, default=0.3, help="大量保有報告書の割合")
+    parser.add_argument("--holdings-limit", type=int, default=500, help="保有詳細の同期件数")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="APIの応答遅延（ミリ秒）")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="応答遅延のゆらぎ（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="APIが500を返す割合")
+    parser.add_argument("--rate", type=float, default=None, help="APIの流量上限（件/秒）")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    fake = FakeEdinet(
+        seed=args.seed,
+        docs_per_day=args.docs_per_day,
+        holding_share=args.holding_share,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate=args.rate,
+    )
+
+    with tempfile.TemporaryDirectory() as workdir, fake.running() as base_url:
+        # 同期処理のモジュールを読み込む前に、接続先・キャッシュ・待ち時間を差し替える
+        cache_dir = os.path.join(workdir, "cache")
+        os.environ |= {
+            "SQLITE_URL": f"sqlite:///{workdir}/sync.db",
+            "EDINET_API_BASE": base_url,
+            "EDINET_CACHE_DIR": cache_dir,
+            "EDINET_LIST_INTERVAL": "0",
+            "EDINET_DOWNLOAD_INTERVAL": "0",
+            "API_KEY": "bench",
+        }
+        from sqlalchemy import func, select
+        from sqlalchemy.orm import Session
+
+        from backend import sync_edinet
+        from backend.database import SyncSessionLocal, sync_engine
+        from backend.models import Base, Filing, HoldingDetail
+
+        # 件数を数えるため、同期処理より先にテーブルを作っておく
+        Base.metadata.create_all(bind=sync_engine)
+        timer = DbTimer()
+        timer.install(sync_engine, Session)
+
+        def count(model: Any) -> Callable[[], int]:
+            def counter() -> int:
+                with SyncSessionLocal() as db:
+                    return db.scalar(select(func.count()).select_from(model)) or 0
+
+            return counter
+
+        end = datetime.now()
+        dates = [end - timedelta(days=offset) for offset in range(args.days + 1)]
+
+        def cached_dates() -> tuple[int, int]:
+            names = set(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else set()
+            hits = sum(f"list_{d.strftime('%Y-%m-%d')}.json" in names for d in dates)
+            return hits, len(dates)
+
+        print(
+            f"Fake EDINET: {args.docs_per_day} docs/weekday, latency {args.latency_ms}ms"
+            f"±{args.jitter_ms}ms, error rate {args.error_rate:.0%}, rate limit {args.rate}"
+        )
+        print(
+            f"{'phase':22s} {'time':>8s} {'docs':>7s} {'docs/s':>9s} {'calls':>6s} "
+            f"{'cache hit':>9s} {'write ms':>8s} {'commit ms':>9s}"
+        )
+        sync_engine_count = count(Filing)
+        for label in ("documents (cold cache)", "documents (warm cache)"):
+            hits = cached_dates()
+            run_phase(
+                label,
+                lambda: sync_edinet.sync_documents(days=args.days),
+                sync_engine_count,
+                fake,
+                timer,
+                hits,
+            )
+        run_phase(
+            "holding details",
+            lambda: sync_edinet.sync_holding_details(limit=args.holdings_limit),
+            count(HoldingDetail),
+            fake,
+            timer,
+        )
+
+        served = {
+            doc["docID"]
+            for d in dates
+            for doc in fake.documents(d.date())
+            if doc["ordinanceCode"] == "060"
+        }
+        with SyncSessionLocal() as db:
+            stored = set(db.scalars(select(Filing.doc_id).where(Filing.doc_id.in_(served))))
+        print(f"Stored {len(stored)}/{len(served)} large shareholding reports from the fake API")
+        sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+保有詳細の抽出（extract_holding_data_from_csv）を計測・検証するための
+合成EDINET CSV（type=5）ZIPのコーパス生成。
+
+実データと同じ形式（UTF-16・タブ区切り・引用符付き、要素ID〜値の9列）のCSVに、
+保有割合・保有株券等の数・保有目的と、それ以外の記載項目（提出者の情報、
+最近60日間の取得・処分の明細など）を含めます。ファイルごとに正解
+（shares_held・holding_ratio・purpose）を持ちます。
+
+ケース:
+- standard: 提出者1名、保有割合は小数（0.0712）
+- percent: 保有割合を百分率・%付き、株数を「株」・桁区切り付きで記載
+- joint_holders: 共同保有者の行と合計行（正解は合計）
+- multi_member: 保有の記載がない表紙のCSVの後に本体のCSV、CSV以外のファイルも含む
+- change_report: 直前の報告書の保有割合・増減の行を含む（正解は今回の値）
+- cp932: cp932・カンマ区切りのCSV（UTF-16で読めない場合のフォールバック）
+- no_purpose: 保有目的が「－」（正解はNone）
+
+例:
+    python scripts/benchmarks/edinet_corpus.py --count 500 --output /tmp/edinet_corpus
+"""
+
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import argparse
+import io
+import json
+import random
+import zipfile
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+GOLDEN_NAME = "golden.json"
+
+COLUMNS = [
+    "要素ID",
+    "項目名",
+    "コンテキストID",
+    "相対年度",
+    "連結・個別",
+    "期間・時点",
+    "ユニットID",
+    "単位",
+    "値",
+]
+
+# ケースと出現比率
+CASES = {
+    "standard": 40,
+    "percent": 10,
+    "joint_holders": 15,
+    "multi_member": 15,
+    "change_report": 12,
+    "cp932": 5,
+    "no_purpose": 3,
+}
+
+PURPOSES = [
+    "純投資",
+    "政策投資のため",
+    "投資一任契約に基づく顧客の資産運用のため",
+    "重要提案行為等を行うことがある。経営陣との対話を通じて企業価値の向上を図るため",
+    "安定株主として長期保有するため",
+]
+
+RATIO = ("jplvh_cor:HoldingRatioOfShareCertificatesEtc", "株券等保有割合")
+PREVIOUS_RATIO = (
+    "jplvh_cor:HoldingRatioOfShareCertificatesEtcPerLastReport",
+    "直前の報告書に記載された株券等保有割合",
+)
+RATIO_CHANGE = ("jplvh_cor:IncreaseDecreaseOfHoldingRatio", "株券等保有割合の増減")
+SHARES = ("jplvh_cor:TotalNumberOfStocksEtcHeld", "保有株券等の数（総数）")
+PURPOSE = ("jplvh_cor:PurposeOfHolding", "保有の目的")
+NOTE = ("jplvh_cor:NotesRegardingHoldingRatio", "株券等保有割合（欄外注記）")
+
+
+@dataclass(frozen=True)
+class Expected:
+    """抽出結果の正解"""
+
+    case: str
+    shares_held: int | None
+    holding_ratio: float | None
+    purpose: str | None
+
+
+@dataclass(frozen=True)
+class Document:
+    """コーパスの1ファイル"""
+
+    name: str
+    content: bytes
+    expected: Expected
+
+
+def _row(element: tuple[str, str], value: str, context: str = "FilingDateInstant") -> list[str]:
+    return [element[0], element[1], context, "当期", "その他", "時点", "", "", value]
+
+
+def _filler_rows(rng: random.Random, filed: date) -> list[list[str]]:
+    """保有の記載以外の項目（表紙・提出者の情報・取得処分の明細）"""
+    rows = [
+        _row(("jplvh_cor:DocumentTitleCoverPage", "表紙"), "変更報告書"),
+        _row(("jplvh_cor:FilingDateCoverPage", "提出日"), filed.isoformat()),
+        _row(("jplvh_cor:NameOfIssuer", "発行者の名称"), f"株式会社サンプル{rng.randint(1, 9999)}"),
+        _row(("jplvh_cor:SecurityCodeOfIssuer", "証券コード"), f"{rng.randint(1300, 9999)}"),
+        _row(("jplvh_cor:StockListing", "上場・店頭の別"), "上場"),
+        _row(("jplvh_cor:ListedStockExchange", "上場金融商品取引所"), "東京"),
+        _row(
+            ("jplvh_cor:DateWhenFilingRequirementWasTriggered", "報告義務発生日"), filed.isoformat()
+        ),
+        _row(
+            ("jplvh_cor:AddressOfFiler", "住所又は本店所在地"), "東京都千代田区丸の内一丁目1番1号"
+        ),
+        _row(("jplvh_cor:BusinessOfFiler", "事業内容"), "投資運用業、投資助言・代理業"),
+        _row(
+            ("jplvh_cor:TotalNumberOfOutstandingStocksEtc", "発行済株式等総数"),
+            f"{rng.randint(10**6, 10**9)}",
+        ),
+    ]
+    # 最近60日間の取得又は処分の状況（件数は偏らせる）
+    for i in range(min(int(rng.expovariate(1 / 15)), 200)):
+        day = filed - timedelta(days=rng.randint(1, 60))
+        context = f"Row{i + 1}Member"
+        rows += [
+            _row(("jplvh_cor:DateOfAcquisitionOrDisposal", "年月日"), day.isoformat(), context),
+            _row(("jplvh_cor:TypeOfShareCertificatesEtc", "株券等の種類"), "普通株式", context),
+            _row(
+                ("jplvh_cor:NumberOfShareCertificatesEtc", "数量"),
+                f"{rng.randint(100, 10**6)}",
+                context,
+            ),
+            _row(
+                ("jplvh_cor:AcquisitionOrDisposal", "取得又は処分の別"),
+                rng.choice(["取得", "処分"]),
+                context,
+            ),
+            _row(("jplvh_cor:UnitPrice", "単価"), f"{rng.randint(100, 10000)}", context),
+        ]
+    return rows
+
+
+def _holding_rows(
+    rng: random.Random, case: str, ratio: float, shares: int, purpose: str
+) -> list[list[str]]:
+    """保有割合・保有株券等の数・保有目的の行"""
+    if case == "percent":
+        return [
+            _row(PURPOSE, purpose),
+            _row(SHARES, f"{shares:,}株"),
+            _row(RATIO, f"{ratio:.2f}%"),
+            _row(NOTE, "（注）発行済株式総数は直近の四半期報告書による"),
+        ]
+
+    if case == "joint_holders":
+        # 提出者・共同保有者ごとの行と合計行（個別の保有割合は1%未満のこともある）
+        holders = rng.randint(2, 5)
+        weights = [rng.random() + 0.2 for _ in range(holders)]
+        shares_each = [int(shares * w / sum(weights)) for w in weights]
+        shares_each[0] += shares - sum(shares_each)
+        rows = []
+        for index, held in enumerate(shares_each):
+            context = "FilerLargeVolumeHolder1Member" if index == 0 else f"JointHolder{index}Member"
+            rows += [
+                _row(PURPOSE, purpose if index == 0 else rng.choice(PURPOSES), context),
+                _row(SHARES, str(held), context),
+                _row(RATIO, f"{ratio * held / shares / 100:.4f}", context),
+            ]
+        total = "TotalOfFilerAndJointHoldersMember"
+        return rows + [_row(SHARES, str(shares), total), _row(RATIO, f"{ratio / 100:.4f}", total)]
+
+    rows = [_row(PURPOSE, purpose), _row(SHARES, str(shares)), _row(RATIO, f"{ratio / 100:.4f}")]
+    if case == "change_report":
+        # 半数は直前の値の方が大きい（処分して保有割合が下がった）
+        previous = ratio + rng.choice([-1, 1]) * rng.uniform(1, 5)
+        rows += [
+            _row(PREVIOUS_RATIO, f"{previous / 100:.4f}"),
+            _row(RATIO_CHANGE, f"{(ratio - previous) / 100:.4f}"),
+        ]
+    return rows
+
+
+def _encode(rows: list[list[str]], case: str) -> bytes:
+    """EDINETのCSV（UTF-16・タブ区切り・引用符付き）、cp932ケースはカンマ区切り"""
+    if case == "cp932":
+        lines = [",".join(f'"{value}"' for value in row) for row in [COLUMNS, *rows]]
+        return ("\r\n".join(lines) + "\r\n").encode("cp932")
+    lines = ["\t".join(f'"{value}"' for value in row) for row in [COLUMNS, *rows]]
+    return ("\n".join(lines) + "\n").encode("utf-16")
+
+
+def make_document(rng: random.Random, number: int, case: str) -> Document:
+    """1件のZIPと正解"""
+    filed = date(2024, 1, 1) + timedelta(days=rng.randint(0, 700))
+    # 保有割合は5%付近に集中し裾が長い（小数4桁で記載されるため2桁に丸める）
+    ratio = round(min(5 + rng.paretovariate(2.5) - 1 + rng.random() * 3, 95.0), 2)
+    shares = rng.randint(10**5, 10**8)
+    purpose = rng.choice(PURPOSES)
+
+    rows = _filler_rows(rng, filed)
+    holding = _holding_rows(rng, case, ratio, shares, purpose)
+    insert_at = rng.randint(0, len(rows))
+    rows[insert_at:insert_at] = holding
+    if case == "no_purpose":
+        rows = [_row(PURPOSE, "－") if row[1] == PURPOSE[1] else row for row in rows]
+
+    code = f"E{rng.randint(10000, 99999)}"
+    member = (
+        f"XBRL_TO_CSV/jplvh010000-lvh-001_{code}-000_{filed.isoformat()}_01_{filed.isoformat()}.csv"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        if case == "multi_member":
+            cover = _filler_rows(rng, filed)[:10]
+            zf.writestr(member.replace("-001_", "-000_"), _encode(cover, case))
+            zf.writestr("XBRL_TO_CSV/manifest.txt", "XBRL_TO_CSV")
+        zf.writestr(member, _encode(rows, case))
+
+    expected = Expected(
+        case=case,
+        shares_held=shares,
+        holding_ratio=ratio,
+        purpose=None if case == "no_purpose" else purpose,
+    )
+    return Document(f"{number:05d}_{case}.zip", buffer.getvalue(), expected)
+
+
+def generate_corpus(count: int, seed: int = 42) -> Iterator[Document]:
+    """count件のコーパス（同じseedなら同じ内容）"""
+    rng = random.Random(seed)
+    cases, weights = zip(*CASES.items(), strict=True)
+    for number in range(count):
+        # すべてのケースを少なくとも1件含める
+        case = cases[number] if number < len(cases) else rng.choices(cases, weights)[0]
+        yield make_document(rng, number, case)
+
+
+def write_corpus(documents: Iterator[Document], output: Path) -> int:
+    """ZIPと正解（golden.json）をディレクトリに書き出す"""
+    output.mkdir(parents=True, exist_ok=True)
+    golden = {}
+    for document in documents:
+        (output / document.name).write_bytes(document.content)
+        golden[document.name] = asdict(document.expected)
+    (output / GOLDEN_NAME).write_text(
+        json.dumps(golden, indent=1, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+    return len(golden)
+
+
+def read_corpus(directory: Path) -> list[Document]:
+    """write_corpusで書き出したコーパスを読み込む"""
+    golden = json.loads((directory / GOLDEN_NAME).read_text(encoding="utf-8"))
+    return [
+        Document(name, (directory / name).read_bytes(), Expected(**expected))
+        for name, expected in sorted(golden.items())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成EDINET CSVコーパスの生成")
+    parser.add_argument("--count", type=int, default=500, help="ファイル数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--output", required=True, help="出力ディレクトリ")
+    args = parser.parse_args()
+
+    count = write_corpus(generate_corpus(args.count, args.seed), Path(args.output))
+    print(f"Wrote {count} documents and {GOLDEN_NAME} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+EDINET API v2のローカルスタブサーバー。
+
+同期処理（sync_documents・sync_holding_details）をAPIキーや本番サービスなしで
+計測するため、日付ごとの書類一覧（documents.json）と書類ごとのZIP（type=5: CSV、
+type=1: 提出本文書）を合成データから返します。内容は乱数シード・日付・書類管理番号から
+決まるため、何度呼んでも同じ応答になります。
+
+- 書類一覧: 平日は --docs-per-day 件（うち --holding-share が大量保有報告書、
+  ordinanceCode=060）、土日は0件
+- type=5のZIP: edinet_corpus.pyと同じ形式のCSV
+- 応答遅延（--latency-ms・--jitter-ms）、エラー率（--error-rate で500）、
+  流量制限（--rate を超えると429）を設定できる
+
+例:
+    python scripts/benchmarks/fake_edinet.py --port 8080 --latency-ms 50 --rate 20
+    EDINET_API_BASE=http://127.0.0.1:8080/api/v2 API_KEY=dummy \\
+        python backend/sync_edinet.py --days 7
+"""
+
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import argparse
+import io
+import json
+import random
+import threading
+import time
+import zipfile
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import edinet_corpus
+
+API_PREFIX = "/api/v2"
+
+# 書類管理番号 = "S1" + (基準日からの日数 * DOC_ID_STRIDE + 連番) の36進6桁
+DOC_ID_EPOCH = date(2000, 1, 1)
+DOC_ID_STRIDE = 10000
+
+# 複数のEDINETコードで提出する提出者（光通信グループ）
+KNOWN_FILERS = [("E04948", "株式会社光通信"), ("E35239", "株式会社光通信")]
+
+OTHER_FORMS = [
+    ("010", "030000", "120", "有価証券報告書"),
+    ("010", "043000", "140", "四半期報告書"),
+    ("010", "053000", "180", "臨時報告書"),
+    ("015", "010000", "220", "自己株券買付状況報告書"),
+]
+
+
+def _base36(value: int, width: int = 6) -> str:
+    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, 36)
+        digits.append(alphabet[digit])
+    return "".join(reversed(digits))
+
+
+def doc_id_for(day: date, seq: int) -> str:
+    return "S1" + _base36((day - DOC_ID_EPOCH).days * DOC_ID_STRIDE + seq)
+
+
+def date_of(doc_id: str) -> date | None:
+    """書類管理番号から提出日を求める（このサーバーの番号でなければNone）"""
+    if len(doc_id) != 8 or not doc_id.startswith("S1"):
+        return None
+    try:
+        days, _ = divmod(int(doc_id[2:], 36), DOC_ID_STRIDE)
+    except ValueError:
+        return None
+    return DOC_ID_EPOCH + timedelta(days=days)
+
+
+class FakeEdinet:
+    """書類一覧・書類ZIPの生成と、応答遅延・エラー・流量制限・呼び出し回数の管理"""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        docs_per_day: int = 200,
+        holding_share: float = 0.3,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate: float | None = None,
+    ):
+        self.seed = seed
+        self.docs_per_day = docs_per_day
+        self.holding_share = holding_share
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate = rate
+
+        self.calls: Counter[tuple[str, int]] = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._tokens = rate or 0.0
+        self._refilled = time.monotonic()
+
+        rng = random.Random(seed)
+        self.filers = KNOWN_FILERS + [
+            (f"E{code:05d}", f"合成アセットマネジメント{code}")
+            for code in rng.sample(range(10000, 30000), 300)
+        ]
+        self.issuers = [f"E{code:05d}" for code in rng.sample(range(30000, 99999), 3000)]
+
+    # === 応答内容 ===
+
+    @lru_cache(maxsize=4096)  # noqa: B019 - サーバーの寿命の間だけ保持する
+    def documents(self, day: date) -> list[dict]:
+        """指定日の書類一覧（documents.jsonのresults）"""
+        if day.weekday() >= 5:
+            return []
+        rng = random.Random(f"{self.seed}:{day.isoformat()}")
+        results = []
+        holdings: list[str] = []
+        for seq in range(self.docs_per_day):
+            doc_id = doc_id_for(day, seq)
+            submitted = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=9, minutes=rng.randint(0, 540)
+            )
+            doc = {
+                "seqNumber": seq + 1,
+                "docID": doc_id,
+                "submitDateTime": submitted.strftime("%Y-%m-%d %H:%M"),
+                "parentDocID": None,
+                "withdrawalStatus": "0",
+                "xbrlFlag": "1",
+                "pdfFlag": "1",
+                "csvFlag": "1",
+            }
+            if rng.random() < self.holding_share:
+                edinet_code, name = rng.choices(self.filers, cum_weights=self._filer_weights())[0]
+                correction = bool(holdings) and rng.random() < 0.03
+                doc |= {
+                    "edinetCode": edinet_code,
+                    "filerName": name,
+                    "secCode": "94350" if edinet_code == "E04948" else None,
+                    "JCN": None,
+                    "ordinanceCode": "060",
+                    "formCode": "010002" if not correction else "010003",
+                    "docTypeCode": "350" if not correction else "360",
+                    "docDescription": "変更報告書" if not correction else "訂正報告書",
+                    "issuerEdinetCode": rng.choice(self.issuers),
+                    "parentDocID": rng.choice(holdings) if correction else None,
+                    "csvFlag": "1" if rng.random() < 0.95 else "0",
+                }
+                holdings.append(doc_id)
+            else:
+                ordinance, form, doc_type, description = rng.choice(OTHER_FORMS)
+                doc |= {
+                    "edinetCode": rng.choice(self.issuers),
+                    "filerName": "合成株式会社",
+                    "secCode": None,
+                    "JCN": None,
+                    "ordinanceCode": ordinance,
+                    "formCode": form,
+                    "docTypeCode": doc_type,
+                    "docDescription": description,
+                    "issuerEdinetCode": None,
+                }
+            results.append(doc)
+        return results
+
+    @lru_cache(maxsize=1)  # noqa: B019
+    def _filer_weights(self) -> list[float]:
+        # 少数の大口提出者に集中させる（光通信が最も多い）
+        weights, total = [], 0.0
+        for rank in range(1, len(self.filers) + 1):
+            total += 1 / rank
+            weights.append(total)
+        return weights
+
+    def document_zip(self, doc_id: str, doc_type: str) -> bytes | None:
+        """書類のZIP（type=5はCSV、type=1は提出本文書）"""
+        day = date_of(doc_id)
+        if day is None:
+            return None
+        rng = random.Random(f"{self.seed}:{doc_id}")
+        if doc_type == "5":
+            cases, weights = zip(*edinet_corpus.CASES.items(), strict=True)
+            case = rng.choices(cases, weights)[0]
+            return edinet_corpus.make_document(rng, 0, case).content
+        if doc_type == "1":
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(
+                    f"XBRL/PublicDoc/jplvh010000-lvh-001_{doc_id}.xbrl",
+                    f'<?xml version="1.0" encoding="UTF-8"?><xbrli:xbrl id="{doc_id}"/>',
+                )
+            return buffer.getvalue()
+        return None
+
+    def list_response(self, day: date) -> dict:
+        results = self.documents(day)
+        return {
+            "metadata": {
+                "title": "提出された書類を把握するためのAPI",
+                "parameter": {"date": day.isoformat(), "type": "2"},
+                "resultset": {"count": len(results)},
+                "processDateTime": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "status": "200",
+                "message": "OK",
+            },
+            "results": results,
+        }
+
+    # === 遅延・エラー・流量制限 ===
+
+    def throttled(self) -> bool:
+        """トークンバケットで流量を制限（rate件/秒、バースト上限もrate件）"""
+        if not self.rate:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def delay(self) -> None:
+        with self._lock:
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            failed = self._rng.random() < self.error_rate
+        time.sleep(self.latency + extra)
+        if failed:
+            raise RuntimeError("injected error")
+
+    def record(self, endpoint: str, status: int) -> None:
+        with self._lock:
+            self.calls[(endpoint, status)] += 1
+
+    def call_count(self, endpoint: str | None = None, status: int | None = None) -> int:
+        with self._lock:
+            return sum(
+                count
+                for (name, code), count in self.calls.items()
+                if (endpoint is None or name == endpoint) and (status is None or code == status)
+            )
+
+    # === HTTPサーバー ===
+
+    @contextmanager
+    def running(self, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+        """バックグラウンドのスレッドでサーバーを起動し、APIのベースURLを返す"""
+        server = ThreadingHTTPServer((host, port), self._handler())
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://{host}:{server.server_address[1]}{API_PREFIX}"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def send_body(self, status: int, body: bytes, content_type: str) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode()
+                self.send_body(status, body, "application/json; charset=utf-8")
+
+            def do_GET(self) -> None:  # noqa: N802
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                path = url.path.removeprefix(API_PREFIX)
+                endpoint = "documents.json" if path == "/documents.json" else "documents"
+                status = self.respond(path, params)
+                fake.record(endpoint, status)
+
+            def respond(self, path: str, params: dict[str, str]) -> int:
+                if fake.throttled():
+                    self.send_json(429, {"StatusCode": 429, "message": "Too Many Requests"})
+                    return 429
+                if not params.get("Subscription-Key"):
+                    self.send_json(401, {"StatusCode": 401, "message": "Access denied"})
+                    return 401
+                try:
+                    fake.delay()
+                except RuntimeError:
+                    self.send_json(500, {"StatusCode": 500, "message": "Internal Server Error"})
+                    return 500
+
+                if path == "/documents.json":
+                    try:
+                        day = date.fromisoformat(params.get("date", ""))
+                    except ValueError:
+                        self.send_json(400, {"StatusCode": 400, "message": "Bad Request"})
+                        return 400
+                    self.send_json(200, fake.list_response(day))
+                    return 200
+
+                if path.startswith("/documents/"):
+                    content = fake.document_zip(path.rsplit("/", 1)[1], params.get("type", "1"))
+                    if content is not None:
+                        self.send_body(200, content, "application/octet-stream")
+                        return 200
+                self.send_json(404, {"StatusCode": 404, "message": "Not Found"})
+                return 404
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EDINET API v2のスタブサーバー")
+    parser.add_argument("--port", type=int, default=8080, help="待ち受けポート")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--docs-per-day", type=int, default=200, help="平日1日あたりの書類数")
+    parser.add_argument("--holding-share", type=float, default=0.3, help="大量保有報告書の割合")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="応答遅延（ミリ秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="応答遅延のゆらぎ（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500を返す割合")
+    parser.add_argument("--rate", type=float, default=None, help="1秒あたりの上限（超えると429）")
+    args = parser.parse_args()
+
+    fake = FakeEdinet(
+        seed=args.seed,
+        docs_per_day=args.docs_per_day,
+        holding_share=args.holding_share,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate=args.rate,
+    )
+    with fake.running(port=args.port) as base_url:
+        print(f"Serving fake EDINET API at {base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
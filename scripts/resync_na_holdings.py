@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import argparse
 import asyncio
 
-from sqlalchemy import delete, or_, select
+from sqlalchemy import or_, select
 
 from backend.database import get_db_session
 from backend.models import Filer, FilerCode, Filing, HoldingDetail
@@ -71,10 +71,16 @@ async def delete_na_holdings(filer_edinet_code: str | None = None, dry_run: bool
             return len(na_ids)
 
         if na_ids:
-            delete_stmt = delete(HoldingDetail).where(HoldingDetail.id.in_(na_ids))
-            result = await db.execute(delete_stmt)
+            # ORMで削除し、コミット時に集計テーブル・データバージョンを更新させる
+            holdings = (
+                (await db.execute(select(HoldingDetail).where(HoldingDetail.id.in_(na_ids))))
+                .scalars()
+                .all()
+            )
+            for hd in holdings:
+                await db.delete(hd)
             await db.commit()
-            deleted = result.rowcount
+            deleted = len(holdings)
             print(f"削除完了: {deleted}件")
             return deleted
 